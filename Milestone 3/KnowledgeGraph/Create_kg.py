@@ -124,7 +124,8 @@ for hotel in hotels:
             location_base: $location_base,
             staff_base: $staff_base,
             value_for_money_base: $value_for_money_base,
-            average_reviews_score: $average_reviews_score
+            average_reviews_score: $average_reviews_score,
+            location: point({latitude: $lat, longitude: $lon})
         })
     """,
         hotel_id=hotel_id,
@@ -136,9 +137,11 @@ for hotel in hotels:
         location_base=float(hotel['location_base']),
         staff_base=float(hotel['staff_base']),
         value_for_money_base=float(hotel['value_for_money_base']),
-        average_reviews_score=avg_score
+        average_reviews_score=avg_score,
+        lat=float(hotel['lat']),
+        lon=float(hotel['lon'])
     )
-print(f"Created {len(hotels)} Hotel nodes with all 6 base aspect scores")
+print(f"Created {len(hotels)} Hotel nodes with all 6 base aspect scores and locations")
 
 # Review
 print("Creating Review nodes...")
@@ -186,6 +189,7 @@ session.run("CREATE INDEX hotel_hotel_id IF NOT EXISTS FOR (h:Hotel) ON (h.hotel
 session.run("CREATE INDEX review_review_id IF NOT EXISTS FOR (r:Review) ON (r.review_id)")
 session.run("CREATE INDEX city_name IF NOT EXISTS FOR (c:City) ON (c.name)")
 session.run("CREATE INDEX country_name IF NOT EXISTS FOR (c:Country) ON (c.name)")
+session.run("CREATE POINT INDEX hotel_location IF NOT EXISTS FOR (h:Hotel) ON (h.location)")
 print("Created indexes for faster relationship creation")
 
 # (City)-[:LOCATED_IN]->(Country)
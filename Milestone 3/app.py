@@ -1,10 +1,14 @@
+import html
+import time
+
 import streamlit as st
 from dotenv import load_dotenv
 
 load_dotenv()
 
 # Import only what's needed at startup
-from hotel_assistant.config import DEFAULT_TOP_K, DEFAULT_SIMILARITY_THRESHOLD, AVAILABLE_MODELS, AVAILABLE_EMBEDDING_MODELS
+from hotel_assistant.config import AVAILABLE_MODELS, AVAILABLE_EMBEDDING_MODELS
+from hotel_assistant.conversation import ConversationHistory, compact_turn
 
 # Cached resource loaders
 @st.cache_resource
@@ -18,20 +22,16 @@ def get_intent_classifier():
     return IntentClassifier()
 
 @st.cache_resource
-def get_heavy_modules():
-    """Load and cache heavy modules (embeddings, etc.)"""
-    from hotel_assistant.database.query_executor import select_and_execute_query
-    from hotel_assistant.nlp.entity_extractor import extract_entities
-    from hotel_assistant.nlp.embeddings import semantic_search_mpnet, semantic_search_minilm
-    from hotel_assistant.llm.llm_layer import llm_layer
-
-    return {
-        'select_and_execute_query': select_and_execute_query,
-        'extract_entities': extract_entities,
-        'semantic_search_mpnet': semantic_search_mpnet,
-        'semantic_search_minilm': semantic_search_minilm,
-        'llm_layer': llm_layer
-    }
+def start_metrics_endpoint():
+    from hotel_assistant.config import METRICS_ENABLED
+    from hotel_assistant.monitoring.metrics_server import start_metrics_server
+    return start_metrics_server() if METRICS_ENABLED else None
+
+@st.cache_resource
+def get_query_pipeline():
+    """Build the shared query pipeline (embedding models load on the first RAG query)"""
+    from hotel_assistant.pipeline.query_pipeline import create_query_pipeline
+    return create_query_pipeline(get_neo4j_connection())
 
 st.set_page_config(page_title="Hotel Assistant", page_icon="🏨", layout="wide", initial_sidebar_state="expanded")
 
@@ -239,7 +239,9 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 if 'conversation_history' not in st.session_state:
-    st.session_state.conversation_history = []
+    st.session_state.conversation_history = ConversationHistory()
+if 'history_page' not in st.session_state:
+    st.session_state.history_page = 0
 if 'conn' not in st.session_state:
     st.session_state.conn = None
 if 'intent_classifier' not in st.session_state:
@@ -272,48 +274,152 @@ def process_query(user_query, use_rag=True, model="gpt-4o-mini", embedding_model
         if st.session_state.intent_classifier is None:
             return {'success': False, 'error': 'Intent classifier not initialized. Please refresh the page.'}
 
-        # Load heavy modules (cached after first load)
-        # Show special message on first load
-        if 'models_loaded' not in st.session_state:
-            with st.spinner("🔄 Loading AI models (one-time setup, ~30 seconds)..."):
-                modules = get_heavy_modules()
-                st.session_state.models_loaded = True
-        else:
-            modules = get_heavy_modules()
+        pipeline = get_query_pipeline()
 
-        select_and_execute_query = modules['select_and_execute_query']
-        extract_entities = modules['extract_entities']
-        llm_layer = modules['llm_layer']
+        # Embedding models (torch) are only loaded once RAG is used; show special message on first load
+        loaded_key = f"{embedding_model}_loaded"
+        if use_rag and loaded_key not in st.session_state:
+            with st.spinner("🔄 Loading AI models (one-time setup, ~30 seconds)..."):
+                pipeline.warm_embedder(embedding_model)
+                st.session_state[loaded_key] = True
 
+        # Classification/extraction/Cypher and the vector search run in parallel
         with st.spinner("🔍 Processing your query..."):
-            intent = st.session_state.intent_classifier.classify(user_query)
-            entities = extract_entities(user_query, intent)
-            cypher_results = select_and_execute_query(st.session_state.conn, intent, entities)
-
-            embedding_results = []
-            if use_rag:
-                # Select the appropriate embedding search function based on model choice
-                if embedding_model == "minilm":
-                    semantic_search = modules['semantic_search_minilm']
-                else:
-                    semantic_search = modules['semantic_search_mpnet']
-
-                embedding_results = semantic_search(user_query, top_k=DEFAULT_TOP_K, threshold=DEFAULT_SIMILARITY_THRESHOLD)
-
-            llm_result = llm_layer(user_query, intent, cypher_results, embedding_results if use_rag else None, model=model)
-
-        return {
-            'success': True,
-            'intent': intent,
-            'entities': entities,
-            'cypher_results': cypher_results,
-            'embedding_results': embedding_results,
-            'llm_response': llm_result
-        }
+            return pipeline.process(user_query, use_rag=use_rag, model=model, embedding_model=embedding_model)
     except Exception as e:
         return {'success': False, 'error': str(e)}
 
-def display_chat_message(message_type, content, show_details=False, result=None):
+def display_graph_analytics():
+    """Sidebar view of the materialized analytics (read from the results store, never the live graph)"""
+    from hotel_assistant.analytics.store import get_results_store
+
+    try:
+        records = get_results_store(get_neo4j_connection()).all()
+    except Exception:
+        return
+    if not records:
+        return
+    with st.expander("📊 Graph Analytics", expanded=False):
+        for record in records:
+            age_min = (time.time() - record['computed_at']) / 60
+            st.markdown(f"**{record['name']}**")
+            st.caption(f"{record['params']} | refreshed {age_min:.0f} min ago in {record['duration_ms']:.0f} ms")
+            st.dataframe(record['rows'], use_container_width=True)
+
+def display_metrics_summary():
+    """Sidebar summary of the process-wide metrics registry"""
+    from hotel_assistant.monitoring.metrics import summary
+
+    server = start_metrics_endpoint()
+    stats = summary()
+    if not stats['requests_by_intent']:
+        return
+    with st.expander("📈 Metrics", expanded=False):
+        if server is not None:
+            host, port = server.server_address[:2]
+            st.caption(f"Prometheus: http://{host}:{port}/metrics")
+        st.markdown("**Requests by intent**")
+        st.json({intent: int(count) for intent, count in stats['requests_by_intent'].items()})
+        for model, latency in stats['llm_latency_s'].items():
+            st.caption(f"{model}: {latency['count']} calls | p50 {latency['p50']:.2f}s | p95 {latency['p95']:.2f}s | "
+                       f"{int(stats['llm_tokens'].get(model, 0))} tokens")
+        for template, latency in sorted(stats['neo4j_latency_s'].items()):
+            st.caption(f"Neo4j {template}: {latency['count']} queries | p95 {latency['p95'] * 1000:.0f} ms")
+        for cache, rate in stats['cache_hit_rate'].items():
+            st.caption(f"Cache {cache}: {rate:.0%} hits")
+        for template, rate in stats['template_fallback_rate'].items():
+            st.caption(f"Template {template}: {rate:.0%} fallback")
+        if stats['planner_skips']:
+            st.caption("Skipped by planner: " + ", ".join(f"{stage} {int(n)}"
+                                                          for stage, n in stats['planner_skips'].items()))
+        if stats['degradations']:
+            st.caption("Degraded: " + ", ".join(f"{kind} {int(n)}" for kind, n in stats['degradations'].items()))
+
+def render_trace_waterfall(trace):
+    """HTML waterfall of a query trace (one bar per span, indented by depth)"""
+    spans = trace.get('spans', [])
+    total = trace.get('duration_ms') or max((s['start_ms'] + s['duration_ms'] for s in spans), default=0) or 1
+    depth = {}
+    for s in spans:
+        depth[s['span_id']] = depth.get(s['parent_id'], -1) + 1 if s['parent_id'] else 0
+
+    rows = []
+    for s in spans:
+        left = 100 * s['start_ms'] / total
+        width = min(max(100 * s['duration_ms'] / total, 0.5), 100 - left)
+        attrs = ", ".join(f"{k}={v}" for k, v in s['attributes'].items()
+                          if k in ('template', 'rows', 'model', 'prompt_tokens', 'completion_tokens',
+                                   'cached_tokens', 'context_tokens', 'intent'))
+        color = "#e74c3c" if s.get('error') else "#f39c12" if s.get('abandoned') else "#667eea"
+        rows.append(f"""
+        <div style="display:flex;align-items:center;font-size:12px;margin:2px 0;">
+            <div style="width:35%;padding-left:{depth[s['span_id']] * 12}px;white-space:nowrap;overflow:hidden;
+                        text-overflow:ellipsis;" title="{html.escape(attrs)}">{html.escape(s['name'])}</div>
+            <div style="width:50%;position:relative;height:14px;background:#f0f0f5;border-radius:3px;">
+                <div style="position:absolute;left:{left:.2f}%;width:{width:.2f}%;height:100%;
+                            background:{color};border-radius:3px;"></div>
+            </div>
+            <div style="width:15%;text-align:right;">{s['duration_ms']:.0f} ms{'+' if s.get('abandoned') else ''}</div>
+        </div>""")
+    return "".join(rows)
+
+def display_query_details(turn, payload):
+    """Intent, entities, KG/RAG results and trace for one turn"""
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.markdown("**Intent**")
+        st.code(turn['intent'])
+        st.markdown("**Entities**")
+        st.json(turn['entities'])
+    
+    with col2:
+        st.markdown("**Knowledge Graph Results**")
+        if turn['kg_count']:
+            st.info(f"{turn['kg_count']} results")
+            if payload:
+                with st.expander("View KG Data"):
+                    st.json(payload['cypher_results'])
+                if payload.get('next_cursor') and st.button("Load more", key=f"more_{turn['id']}"):
+                    page = get_query_pipeline().more_results(turn['intent'], turn['entities'],
+                                                             payload['next_cursor'])
+                    st.session_state.conversation_history.extend_results(turn['id'], page, page.next_cursor)
+                    st.rerun()
+        else:
+            st.warning("No KG results")
+    
+    with col3:
+        st.markdown("**Semantic Search Results**")
+        if turn['rag_count']:
+            st.info(f"{turn['rag_count']} reviews")
+            if payload:
+                with st.expander("View RAG Data"):
+                    for i, review in enumerate(payload['embedding_results'][:3], 1):
+                        st.markdown(f"**{i}. {review.get('hotel_name', 'N/A')}** (Score: {review.get('score', 0):.2f})")
+                        st.caption(f"{review.get('review_text', '')[:200]}...")
+                        if i < 3:
+                            st.markdown("---")
+        else:
+            st.warning("No RAG results")
+    
+    metadata = turn['metadata']
+    st.markdown("---")
+    st.caption(f"Tokens: {metadata.get('tokens_used', 0)} (cached {metadata.get('cached_tokens', 0)}) | "
+               f"Context: {metadata.get('context_tokens', 0)}/{metadata.get('context_token_budget', 0)} "
+               f"(saved {metadata.get('context_tokens_saved', 0)})")
+    if metadata.get('degradations'):
+        st.warning(f"Answered in degraded mode to stay within the latency budget: "
+                   f"{', '.join(metadata['degradations'])}")
+
+    if payload is None:
+        st.caption("Full KG/RAG results and trace are only kept for the most recent turns.")
+        return
+    trace = payload.get('trace')
+    if trace:
+        st.markdown(f"**Trace** ({trace['duration_ms']:.0f} ms)")
+        st.markdown(render_trace_waterfall(trace), unsafe_allow_html=True)
+
+def display_chat_message(message_type, content, turn=None):
     """Display a single chat message in mobile chat style"""
     if message_type == "user":
         st.markdown(f"""
@@ -329,42 +435,10 @@ def display_chat_message(message_type, content, show_details=False, result=None)
         </div>
         """, unsafe_allow_html=True)
         
-        if show_details and result:
-            with st.expander("📊 Query Details", expanded=False):
-                col1, col2, col3 = st.columns(3)
-                
-                with col1:
-                    st.markdown("**Intent**")
-                    st.code(result['intent'])
-                    st.markdown("**Entities**")
-                    st.json(result['entities'])
-                
-                with col2:
-                    st.markdown("**Knowledge Graph Results**")
-                    if result['cypher_results']:
-                        st.info(f"{len(result['cypher_results'])} results")
-                        with st.expander("View KG Data"):
-                            st.json(result['cypher_results'])
-                    else:
-                        st.warning("No KG results")
-                
-                with col3:
-                    st.markdown("**Semantic Search Results**")
-                    if result['embedding_results']:
-                        st.info(f"{len(result['embedding_results'])} reviews")
-                        with st.expander("View RAG Data"):
-                            for i, review in enumerate(result['embedding_results'][:3], 1):
-                                st.markdown(f"**{i}. {review.get('hotel_name', 'N/A')}** (Score: {review.get('score', 0):.2f})")
-                                st.caption(f"{review.get('review_text', '')[:200]}...")
-                                if i < 3:
-                                    st.markdown("---")
-                    else:
-                        st.warning("No RAG results")
-                
-                llm_data = result.get('llm_response', {})
-                metadata = llm_data.get('metadata', {})
-                st.markdown("---")
-                st.caption(f"Tokens: {metadata.get('tokens_used', 0)}")
+        if turn:
+            # Details are only read from the payload store while the toggle is on
+            if st.toggle("📊 Query Details", key=f"details_{turn['id']}"):
+                display_query_details(turn, st.session_state.conversation_history.details(turn['id']))
     
     elif message_type == "info":
         st.markdown(f"""
@@ -382,7 +456,10 @@ def display_results(result):
     llm_data = result['llm_response']
 
     if llm_data['success']:
-        display_chat_message("bot", llm_data["response"], show_details=True, result=result)
+        turn, payload = compact_turn(-1, llm_data['metadata'].get('query', ''), result)
+        display_chat_message("bot", llm_data["response"])
+        with st.expander("📊 Query Details", expanded=False):
+            display_query_details(turn, payload)
     else:
         display_chat_message("bot", f"❌ LLM Error: {llm_data.get('error', 'Unknown')}")
 
@@ -419,8 +496,11 @@ def main():
             st.success("✅ Connected")
         else:
             st.warning("⚠️ Not connected")
+
+        display_metrics_summary()
+        display_graph_analytics()
         
-        if st.session_state.conversation_history:
+        if len(st.session_state.conversation_history):
             st.info(f"💬 {len(st.session_state.conversation_history)} messages")
 
     if not initialize_connections():
@@ -443,23 +523,29 @@ def main():
         with messages_container:
             st.markdown('<div class="chat-messages">', unsafe_allow_html=True)
             
-            # Display conversation history
-            if not st.session_state.conversation_history:
+            # Display conversation history (one page of turns, most recent page by default)
+            history = st.session_state.conversation_history
+            if not len(history):
                 display_chat_message("info", "👋 Welcome! Ask me anything about hotels, recommendations, or visa requirements.")
             else:
-                for conv in st.session_state.conversation_history:
+                page = min(st.session_state.history_page, history.page_count() - 1)
+                if page < history.page_count() - 1 and st.button("⬆️ Show older messages", use_container_width=True):
+                    st.session_state.history_page = page + 1
+                    st.rerun()
+
+                for turn in history.page(page):
                     # User message
-                    display_chat_message("user", conv['query'])
+                    display_chat_message("user", turn['query'])
                     
                     # Bot response
-                    if conv['result']['success']:
-                        llm_data = conv['result']['llm_response']
-                        if llm_data['success']:
-                            display_chat_message("bot", llm_data["response"], show_details=True, result=conv['result'])
-                        else:
-                            display_chat_message("bot", f"❌ Error: {llm_data.get('error', 'Unknown')}")
+                    if turn['success']:
+                        display_chat_message("bot", turn['answer'], turn=turn)
                     else:
-                        display_chat_message("bot", f"❌ Error: {conv['result']['error']}")
+                        display_chat_message("bot", f"❌ Error: {turn['error']}")
+
+                if page > 0 and st.button("⬇️ Show newer messages", use_container_width=True):
+                    st.session_state.history_page = page - 1
+                    st.rerun()
             
             st.markdown('</div>', unsafe_allow_html=True)
         
@@ -475,13 +561,15 @@ def main():
             clear_button = st.button("Clear", use_container_width=True)
 
     if clear_button:
-        st.session_state.conversation_history = []
+        st.session_state.conversation_history.clear()
+        st.session_state.history_page = 0
         st.session_state.selected_question = ""
         st.rerun()
 
     if submit_button and user_query:
         result = process_query(user_query, use_rag=use_rag, model=selected_model, embedding_model=embedding_model)
-        st.session_state.conversation_history.append({'query': user_query, 'result': result})
+        st.session_state.conversation_history.add(user_query, result)
+        st.session_state.history_page = 0  # jump back to the newest messages
         st.session_state.selected_question = ""  # Clear the input after sending
         st.rerun()
 
@@ -0,0 +1 @@
+"""Hotel Assistant Benchmarks"""
@@ -0,0 +1,221 @@
+"""Cypher Plan Profiles of the QueryLibrary Templates, with a Regression Gate
+
+Runs every template with representative parameters through PROFILE (or
+EXPLAIN) against a local Neo4j and records, per template:
+
+- db_hits, rows, page_cache_hits and page_cache_misses (PROFILE only)
+- the operators of the plan, e.g. NodeIndexSeek vs NodeByLabelScan
+- the label scans (operator and pattern, e.g. "NodeByLabelScan h:Hotel")
+
+The report can be saved as a baseline. With --compare the run fails when a
+template starts scanning a label it did not scan in the baseline, or when its
+db hits grew beyond the threshold; for a template that already scans, growing
+db hits mean the scan is getting more expensive as the data grows.
+
+A template that issues several queries (R4 with its R3 fallback) is reported
+as the sum of its queries.
+
+Usage (from "Milestone 3", with the KG loaded by Create_kg.py):
+    python -m benchmarks.cypher_plans --save-baseline
+    python -m benchmarks.cypher_plans --compare
+    python -m benchmarks.cypher_plans --explain --templates L1 D1
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from hotel_assistant.config import PLAN_BASELINE_PATH, PLAN_DB_HITS_THRESHOLD
+from hotel_assistant.database.query_library import QueryLibrary
+
+LABEL_SCANS = {'AllNodesScan', 'NodeByLabelScan', 'UnionNodeByLabelsScan', 'IntersectionNodeByLabelsScan',
+               'DirectedAllRelationshipsScan', 'UndirectedAllRelationshipsScan',
+               'DirectedRelationshipTypeScan', 'UndirectedRelationshipTypeScan'}
+
+BIG_BEN = {'lat': 51.5007, 'lon': -0.1246}
+
+# Template id -> (QueryLibrary method, representative arguments). "@page2" cases
+# profile the second keyset page, whose WHERE clause carries the cursor (the
+# dataset has one hotel per city, so only L3 has a second page).
+TEMPLATE_CASES: Dict[str, Tuple[str, Dict[str, Any]]] = {
+    'L1': ('template_L1_list_by_city', {'city': 'London'}),
+    'L2': ('template_L2_list_by_country', {'country': 'United Kingdom'}),
+    'L3': ('template_L3_list_by_rating', {'star_rating': 5}),
+    'L3@page2': ('template_L3_list_by_rating', {'star_rating': 5, 'page_size': 5}),
+    'L4': ('template_L4_list_by_city_and_rating', {'city': 'London', 'star_rating': 5}),
+    'L5': ('template_L5_list_by_country_and_rating', {'country': 'United Kingdom', 'star_rating': 5}),
+    'L6': ('template_L6_list_near_point', {**BIG_BEN, 'radius_km': 10}),
+    'R1': ('template_R1_recommend_by_location', {'city': 'London'}),
+    'R3': ('template_R3_recommend_by_aspects', {'city': 'London', 'aspects': ['cleanliness', 'staff']}),
+    'R4': ('template_R4_recommend_by_traveller_and_aspects',
+           {'city': 'London', 'traveller_type': 'Business', 'aspects': ['cleanliness', 'staff']}),
+    'R5': ('template_R5_recommend_with_rating_filter', {'city': 'London', 'star_rating': 5}),
+    'R6': ('template_R6_recommend_nearest', {**BIG_BEN, 'k': 5}),
+    'D1': ('template_D1_describe_all_aspects', {'hotel_name': 'The Royal Compass'}),
+    'D2': ('template_D2_describe_specific_aspects', {'hotel_name': 'The Royal Compass', 'aspects': ['staff']}),
+    'C1': ('template_C1_compare_all_aspects', {'hotel1': 'The Royal Compass', 'hotel2': 'The Azure Tower'}),
+    'C2': ('template_C2_compare_with_traveller_type',
+           {'hotel1': 'The Royal Compass', 'hotel2': 'The Azure Tower', 'traveller_type': 'Business'}),
+    'V1': ('template_V1_check_visa_requirement', {'from_country': 'China', 'to_country': 'United Kingdom'}),
+}
+
+
+class PlanRecorder:
+    """Connection wrapper that runs each query through PROFILE/EXPLAIN and keeps the plans."""
+
+    def __init__(self, conn, explain: bool = False):
+        self.conn = conn
+        self.explain = explain
+        self.plans: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def execute_query(self, query: str, parameters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        rows, plan = self.conn.profile_query(query, parameters, explain=self.explain)
+        with self._lock:
+            self.plans.append(plan)
+        return rows
+
+    def stream_query(self, query: str, parameters: Optional[Dict[str, Any]] = None, columns=None):
+        for row in self.execute_query(query, parameters):
+            yield {c: row[c] for c in columns} if columns else row
+
+
+def _operators(plan: Dict[str, Any]):
+    """Depth-first plan nodes."""
+    yield plan
+    for child in plan.get('children') or []:
+        yield from _operators(child)
+
+
+def _operator_name(node: Dict[str, Any]) -> str:
+    return node.get('operatorType', '?').split('@')[0]  # "NodeIndexSeek@neo4j" on Neo4j 5
+
+
+def summarize_plan(plan: Dict[str, Any]) -> Dict[str, Any]:
+    nodes = list(_operators(plan))
+    summary = {'operators': sorted({_operator_name(n) for n in nodes}),
+               'label_scans': sorted({f"{_operator_name(n)} {(n.get('args') or {}).get('Details', '')}".strip()
+                                      for n in nodes if _operator_name(n) in LABEL_SCANS})}
+    if 'dbHits' in plan:
+        summary.update(db_hits=sum(n.get('dbHits', 0) for n in nodes), rows=plan.get('rows', 0),
+                       page_cache_hits=sum(n.get('pageCacheHits', 0) for n in nodes),
+                       page_cache_misses=sum(n.get('pageCacheMisses', 0) for n in nodes))
+    else:
+        summary['estimated_rows'] = (plan.get('args') or {}).get('EstimatedRows')
+    return summary
+
+
+def merge_summaries(summaries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """One template's summary over all the queries it issued."""
+    merged = {'queries': len(summaries),
+              'operators': sorted({op for s in summaries for op in s['operators']}),
+              'label_scans': sorted({scan for s in summaries for scan in s['label_scans']})}
+    for key in ('db_hits', 'rows', 'page_cache_hits', 'page_cache_misses'):
+        if summaries and all(key in s for s in summaries):
+            merged[key] = sum(s[key] for s in summaries)
+    return merged
+
+
+def profile_template(conn, template_id: str, explain: bool = False) -> Dict[str, Any]:
+    method, kwargs = TEMPLATE_CASES[template_id]
+    template = getattr(QueryLibrary, method)
+    kwargs = dict(kwargs)
+    if template_id.endswith('@page2'):
+        kwargs['cursor'] = getattr(template(conn, **kwargs), 'next_cursor', None)
+        if kwargs['cursor'] is None:
+            return {'error': 'no second page for these parameters'}
+    recorder = PlanRecorder(conn, explain)
+    template(recorder, **kwargs)
+    return merge_summaries([summarize_plan(plan) for plan in recorder.plans])
+
+
+def compare_to_baseline(report: Dict[str, Any], baseline: Dict[str, Any], threshold: float,
+                        min_db_hits: int = 100) -> List[str]:
+    """Templates that started scanning labels or whose db hits grew by more than `threshold`."""
+    regressions = []
+    for template_id, now in report['templates'].items():
+        base = baseline.get('templates', {}).get(template_id)
+        if base is None or 'error' in now or 'error' in base:
+            continue
+        for scan in sorted(set(now['label_scans']) - set(base['label_scans'])):
+            regressions.append(f"{template_id}: new label scan {scan} (operators now {', '.join(now['operators'])})")
+        if 'db_hits' in now and 'db_hits' in base:
+            grown = now['db_hits'] - base['db_hits']
+            if grown >= min_db_hits and now['db_hits'] > base['db_hits'] * (1 + threshold):
+                cause = " - label scan cost grows with the data" if now['label_scans'] else ""
+                regressions.append(f"{template_id}: {now['db_hits']} db hits vs baseline {base['db_hits']} "
+                                   f"(+{grown / max(base['db_hits'], 1):.0%}){cause}")
+    return regressions
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"{'template':<10} {'db hits':>9} {'rows':>6} {'cache hit':>9} {'miss':>6}  operators")
+    for template_id, s in report['templates'].items():
+        if 'error' in s:
+            print(f"{template_id:<10} {s['error']}")
+            continue
+        numbers = (f"{s['db_hits']:>9} {s['rows']:>6} {s['page_cache_hits']:>9} {s['page_cache_misses']:>6}"
+                   if 'db_hits' in s else f"{'-':>9} {'-':>6} {'-':>9} {'-':>6}")
+        print(f"{template_id:<10} {numbers}  {', '.join(s['operators'])}")
+    scanning = {t: s['label_scans'] for t, s in report['templates'].items() if s.get('label_scans')}
+    if scanning:
+        print("\nLabel scans (cost grows with the number of nodes):")
+        for template_id, scans in scanning.items():
+            print(f"  {template_id}: {'; '.join(scans)}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="PROFILE/EXPLAIN every QueryLibrary template against Neo4j")
+    parser.add_argument("--templates", nargs="+", choices=list(TEMPLATE_CASES), default=list(TEMPLATE_CASES))
+    parser.add_argument("--explain", action="store_true", help="Plan only (EXPLAIN): no db hits, nothing executed")
+    parser.add_argument("--output", help="Write the report JSON here")
+    parser.add_argument("--save-baseline", action="store_true", help="Save the report as the baseline")
+    parser.add_argument("--compare", action="store_true", help="Fail on plan regressions against the baseline")
+    parser.add_argument("--baseline", default=PLAN_BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=PLAN_DB_HITS_THRESHOLD,
+                        help="Allowed db hits growth per template (fraction)")
+    parser.add_argument("--min-db-hits", type=int, default=100, help="Ignore db hits increases smaller than this")
+    args = parser.parse_args(argv)
+
+    from hotel_assistant.database.neo4j_connection import Neo4jConnection
+    conn = Neo4jConnection()
+    try:
+        templates = {t: profile_template(conn, t, args.explain) for t in args.templates}
+    finally:
+        conn.close()
+    report = {'mode': 'explain' if args.explain else 'profile',
+              'created_at': time.strftime("%Y-%m-%dT%H:%M:%S"), 'templates': templates}
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"\nNo baseline at {args.baseline}; run with --save-baseline first")
+            return 2
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('mode') != report['mode']:
+            print(f"\nWarning: baseline was recorded with {baseline.get('mode')}, not {report['mode']}")
+        regressions = compare_to_baseline(report, baseline, args.threshold, args.min_db_hits)
+        if regressions:
+            print(f"\nFAIL: {len(regressions)} plan regressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"\nOK: no new label scans and no db hits growth beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
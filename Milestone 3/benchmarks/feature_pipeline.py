@@ -0,0 +1,142 @@
+"""Feature Pipeline Benchmark: Notebook Preprocessing vs Chunked Columnar Build
+
+Builds the Milestone 1 feature table three ways at growing reviews.csv sizes:
+
+- notebook: the notebook's cells (whole-file reads with default dtypes,
+  merges, one deviation column at a time, Series.map for the target)
+- chunked:  hotel_assistant.analytics.features.build_features
+- cached:   load_features from a cache written beforehand
+
+Each run is a fresh process so peak memory (max RSS above the process's RSS
+after imports) is not polluted by the other runs. The synthetic reviews.csv
+scales with --scales (x1 = about 2 reviews per users.csv traveller).
+The notebook and chunked tables must agree on every deviation and target.
+
+Usage (from "Milestone 3"):
+    python -m benchmarks.feature_pipeline
+    python -m benchmarks.feature_pipeline --scales 1 10 --chunk-rows 50000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+MILESTONE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASE_REVIEWS_PER_TRAVELLER = 2.0
+
+
+def _peak_rss_mb() -> float:
+    """This process's RSS high-water mark (VmHWM; ru_maxrss also counts the parent's before exec)."""
+    try:
+        with open('/proc/self/status', encoding='ascii') as f:
+            return next(int(line.split()[1]) for line in f if line.startswith('VmHWM:')) / 1024
+    except (OSError, StopIteration):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+
+def notebook_features(dataset_dir: str):
+    """The notebook's sections 1.2-4.1, cell by cell."""
+    import pandas as pd
+    from hotel_assistant.analytics.features import COUNTRY_TO_GROUP
+
+    df_hotels = pd.read_csv(os.path.join(dataset_dir, 'hotels.csv'))
+    df_hotels.columns = [col if col in ('hotel_id', 'hotel_name') else 'hotel_' + col for col in df_hotels.columns]
+    df_reviews = pd.read_csv(os.path.join(dataset_dir, 'reviews.csv'))
+    df_reviews.columns = [col if col in ('review_id', 'user_id', 'hotel_id', 'review_date', 'review_text')
+                          else 'review_' + col for col in df_reviews.columns]
+    df_users = pd.read_csv(os.path.join(dataset_dir, 'users.csv'))
+    df_users.columns = [col if col in ('user_id', 'user_gender') else 'user_' + col for col in df_users.columns]
+
+    df_merged = pd.merge(df_reviews, df_users, on='user_id', how='left')
+    df_merged = pd.merge(df_merged, df_hotels, on='hotel_id', how='left')
+    df_merged.drop(columns=['review_date', 'review_text', 'user_join_date', 'hotel_name'], inplace=True)
+    df_merged['country_group'] = df_merged['hotel_country'].map(COUNTRY_TO_GROUP)
+    for aspect in ('cleanliness', 'comfort', 'facilities', 'location', 'staff', 'value_for_money'):
+        df_merged[f'deviation_{aspect}'] = df_merged[f'review_score_{aspect}'] - df_merged[f'hotel_{aspect}_base']
+    return df_merged
+
+
+def _fingerprint(frame) -> Dict[str, Any]:
+    from hotel_assistant.analytics.features import DEVIATION_COLUMNS, TARGET
+    frame = frame.sort_values('review_id')
+    return {'rows': len(frame),
+            'deviation_sums': [round(float(frame[c].astype('float64').sum()), 1) for c in DEVIATION_COLUMNS],
+            'targets': {str(k): int(v) for k, v in frame[TARGET].value_counts().items() if v}}
+
+
+def worker(mode: str, dataset_dir: str, cache_dir: str, chunk_rows: int) -> Dict[str, Any]:
+    import pandas  # noqa: F401  (imported before the RSS baseline)
+    from hotel_assistant.analytics import features
+
+    baseline_mb = _peak_rss_mb()
+    start = time.perf_counter()
+    if mode == "notebook":
+        frame = notebook_features(dataset_dir)
+    elif mode == "chunked":
+        frame = features.build_features(dataset_dir, chunk_rows)
+    else:
+        frame = features.load_features(dataset_dir, cache_dir, chunk_rows)
+    wall_ms = (time.perf_counter() - start) * 1000
+    return {'mode': mode, 'wall_ms': wall_ms, 'peak_mb': _peak_rss_mb() - baseline_mb,
+            'frame_mb': features.memory_mb(frame), **_fingerprint(frame)}
+
+
+def run_worker(mode: str, dataset_dir: str, cache_dir: str, chunk_rows: int) -> Dict[str, Any]:
+    out = subprocess.run([sys.executable, "-m", "benchmarks.feature_pipeline", "--worker", mode,
+                          "--dataset-dir", dataset_dir, "--cache-dir", cache_dir, "--chunk-rows", str(chunk_rows)],
+                         cwd=MILESTONE_DIR, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def bench_scale(scale: float, chunk_rows: int, seed: int) -> Dict[str, Any]:
+    from hotel_assistant.analytics.features import load_features
+
+    from .standins import write_synthetic_dataset
+    with tempfile.TemporaryDirectory() as directory:
+        dataset_dir, cache_dir = os.path.join(directory, 'dataset'), os.path.join(directory, 'cache')
+        write_synthetic_dataset(dataset_dir, BASE_REVIEWS_PER_TRAVELLER * scale, seed)
+        load_features(dataset_dir, cache_dir, chunk_rows)
+        runs = {mode: run_worker(mode, dataset_dir, cache_dir, chunk_rows)
+                for mode in ("notebook", "chunked", "cached")}
+        csv_mb = os.path.getsize(os.path.join(dataset_dir, 'reviews.csv')) / 2 ** 20
+    fields = ('rows', 'deviation_sums', 'targets')
+    match = all(runs['notebook'][f] == runs[m][f] for m in ('chunked', 'cached') for f in fields)
+    return {'scale': scale, 'csv_mb': csv_mb, 'runs': runs, 'match': match}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Notebook vs chunked columnar feature build at growing sizes")
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--chunk-rows", type=int, default=None, help="Default: FEATURE_CHUNK_ROWS")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--worker", choices=["notebook", "chunked", "cached"], help=argparse.SUPPRESS)
+    parser.add_argument("--dataset-dir", help=argparse.SUPPRESS)
+    parser.add_argument("--cache-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    from hotel_assistant.config import FEATURE_CHUNK_ROWS
+    chunk_rows = args.chunk_rows or FEATURE_CHUNK_ROWS
+    if args.worker:
+        print(json.dumps(worker(args.worker, args.dataset_dir, args.cache_dir, chunk_rows)))
+        return 0
+
+    print(f"chunks of {chunk_rows} rows; peak = max RSS above the worker's RSS after imports\n")
+    print(f"{'scale':>6} {'reviews':>9} {'csv':>8}  {'mode':<9} {'wall':>9} {'peak':>9} {'table':>9}  match")
+    mismatches = 0
+    for scale in args.scales:
+        row = bench_scale(scale, chunk_rows, args.seed)
+        mismatches += not row['match']
+        for i, (mode, run) in enumerate(row['runs'].items()):
+            head = (f"{scale:>5g}x {run['rows']:>9} {row['csv_mb']:>5.1f} MB" if i == 0 else " " * 27)
+            print(f"{head}  {mode:<9} {run['wall_ms']:>6.0f} ms {run['peak_mb']:>6.1f} MB "
+                  f"{run['frame_mb']:>6.1f} MB  {'' if i else ('yes' if row['match'] else 'NO')}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
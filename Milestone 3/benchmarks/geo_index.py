@@ -0,0 +1,98 @@
+"""Geo Index Benchmark: KD-Tree vs Naive Scan
+
+Radius and k-nearest searches from the landmarks in nlp.geocoder, timed on the
+KD-tree of database.geo_index and on a haversine scan over every hotel, at
+growing hotel counts. The dataset's hotels are repeated with a few km of jitter
+to reach each size. Both must return the same hotels.
+
+Usage (from "Milestone 3"):
+    python -m benchmarks.geo_index
+    python -m benchmarks.geo_index --sizes 1000 100000 --radius-km 5 --k 10
+"""
+import argparse
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+from hotel_assistant.database.geo_index import HotelGeoIndex, haversine_km
+from hotel_assistant.monitoring.stats import summarize
+from hotel_assistant.nlp.geocoder import LANDMARKS
+
+
+def synthetic_hotels(size: int, seed: int = 0) -> List[Dict[str, Any]]:
+    base = HotelGeoIndex.from_csv().hotels
+    rng = random.Random(seed)
+    hotels = []
+    for i in range(size):
+        hotel = dict(base[i % len(base)])
+        if i >= len(base):
+            hotel['hotel_name'] = f"{hotel['hotel_name']} #{i}"
+            hotel['lat'] += rng.gauss(0, 0.05)  # ~5 km
+            hotel['lon'] += rng.gauss(0, 0.05)
+        hotels.append(hotel)
+    return hotels
+
+
+def naive_within(hotels: List[Dict[str, Any]], lat: float, lon: float, radius_km: float) -> List[str]:
+    scored = [(haversine_km(lat, lon, h['lat'], h['lon']), h['hotel_name']) for h in hotels]
+    return [name for distance, name in sorted(scored) if distance <= radius_km]
+
+
+def naive_nearest(hotels: List[Dict[str, Any]], lat: float, lon: float, k: int) -> List[str]:
+    scored = [(haversine_km(lat, lon, h['lat'], h['lon']), h['hotel_name']) for h in hotels]
+    return [name for _, name in sorted(scored)[:k]]
+
+
+def _p50_us(fn, points) -> Dict[str, Any]:
+    samples, results = [], []
+    for lat, lon in points:
+        start = time.perf_counter()
+        results.append(fn(lat, lon))
+        samples.append((time.perf_counter() - start) * 1e6)
+    return {'p50_us': summarize(samples, percentiles=(50,))['p50'], 'results': results}
+
+
+def bench_size(size: int, radius_km: float, k: int, seed: int) -> Dict[str, Any]:
+    hotels = synthetic_hotels(size, seed)
+    start = time.perf_counter()
+    index = HotelGeoIndex(hotels)
+    build_ms = (time.perf_counter() - start) * 1000
+    points = list(LANDMARKS.values())
+
+    tree_radius = _p50_us(lambda lat, lon: [r['hotel_name'] for r in index.within(lat, lon, radius_km, limit=size)],
+                          points)
+    scan_radius = _p50_us(lambda lat, lon: naive_within(hotels, lat, lon, radius_km), points)
+    tree_knn = _p50_us(lambda lat, lon: [r['hotel_name'] for r in index.nearest(lat, lon, k)], points)
+    scan_knn = _p50_us(lambda lat, lon: naive_nearest(hotels, lat, lon, k), points)
+    return {
+        'size': size, 'build_ms': build_ms,
+        'radius': {'tree_us': tree_radius['p50_us'], 'scan_us': scan_radius['p50_us'],
+                   'match': [sorted(r) for r in tree_radius['results']] == [sorted(r) for r in scan_radius['results']]},
+        'nearest': {'tree_us': tree_knn['p50_us'], 'scan_us': scan_knn['p50_us'],
+                    'match': [sorted(r) for r in tree_knn['results']] == [sorted(r) for r in scan_knn['results']]}
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="KD-tree vs naive scan for radius and k-nearest searches")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[25, 1000, 10000, 100000])
+    parser.add_argument("--radius-km", type=float, default=10.0)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    print(f"{len(LANDMARKS)} landmarks, radius {args.radius_km:g} km, k={args.k}\n")
+    print(f"{'hotels':>8} {'build':>10} {'radius tree':>12} {'radius scan':>12} {'knn tree':>10} {'knn scan':>10}  match")
+    mismatches = 0
+    for size in args.sizes:
+        row = bench_size(size, args.radius_km, args.k, args.seed)
+        match = row['radius']['match'] and row['nearest']['match']
+        mismatches += not match
+        print(f"{size:>8} {row['build_ms']:>7.0f} ms {row['radius']['tree_us']:>9.0f} us "
+              f"{row['radius']['scan_us']:>9.0f} us {row['nearest']['tree_us']:>7.0f} us "
+              f"{row['nearest']['scan_us']:>7.0f} us  {'yes' if match else 'NO'}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,184 @@
+"""CSR Projection vs Cypher Traversal Benchmark
+
+Times the vectorized algorithms in hotel_assistant.analytics.graph_algorithms
+against the traversal each replaces and checks both return the same numbers.
+
+- `--backend standin` (default): the projection is exported from a synthetic
+  reviews.csv next to the dataset CSVs; the reference is a row-by-row
+  traversal of the reviews in Python, the work a Cypher expansion does
+- `--backend neo4j`: the projection is exported from the live KG and the
+  reference is the equivalent Cypher query
+
+Personalized PageRank has no plain-Cypher equivalent, so only its in-process
+time is reported.
+
+Usage (from "Milestone 3"):
+    python -m benchmarks.graph_projection
+    python -m benchmarks.graph_projection --reviews-per-traveller 20 --repeat 5
+    python -m benchmarks.graph_projection --backend neo4j
+"""
+import argparse
+import csv
+import os
+import tempfile
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from hotel_assistant.analytics import graph_algorithms as ga
+from hotel_assistant.analytics.projection import GraphProjection
+from hotel_assistant.monitoring.stats import summarize
+
+from .standins import write_synthetic_dataset
+
+DEGREE_CYPHER = """MATCH (t:Traveller)-[:WROTE]->(:Review)-[:REVIEWED]->(h:Hotel)
+RETURN h.hotel_id AS hotel_id, count(DISTINCT t) AS value"""
+CO_OCCURRENCE_CYPHER = """MATCH (h1:Hotel)<-[:REVIEWED]-(:Review)<-[:WROTE]-(t:Traveller)-[:WROTE]->(:Review)-[:REVIEWED]->(h2:Hotel)
+RETURN h1.hotel_id AS hotel1, h2.hotel_id AS hotel2, count(DISTINCT t) AS value"""
+SEGMENT_CYPHER = """MATCH (t:Traveller)-[:WROTE]->(:Review)-[:REVIEWED]->(h:Hotel)
+RETURN t.type AS segment, h.hotel_id AS hotel_id, count(DISTINCT t) AS value"""
+
+
+def _time(fn: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    samples, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {'result': result, **summarize(samples, percentiles=(50,))}
+
+
+class RowTraversal:
+    """Reference answers computed review by review, as a graph traversal visits them."""
+
+    def __init__(self, dataset_dir: str):
+        with open(os.path.join(dataset_dir, 'users.csv'), newline='', encoding='utf-8') as f:
+            self.traveller_type = {row['user_id']: row['traveller_type'] for row in csv.DictReader(f)}
+        with open(os.path.join(dataset_dir, 'reviews.csv'), newline='', encoding='utf-8') as f:
+            self.reviews = [(row['user_id'], row['hotel_id']) for row in csv.DictReader(f)]
+
+    def _hotels_by_traveller(self) -> Dict[str, set]:
+        hotels = defaultdict(set)
+        for user_id, hotel_id in self.reviews:
+            hotels[user_id].add(hotel_id)
+        return hotels
+
+    def degree(self) -> Dict[tuple, int]:
+        travellers = defaultdict(set)
+        for user_id, hotel_id in self.reviews:
+            travellers[hotel_id].add(user_id)
+        return {(h,): len(t) for h, t in travellers.items()}
+
+    def co_occurrence(self) -> Dict[tuple, int]:
+        counts = defaultdict(int)
+        for hotels in self._hotels_by_traveller().values():
+            for h1 in hotels:
+                for h2 in hotels:
+                    counts[(h1, h2)] += 1
+        return dict(counts)
+
+    def segment(self) -> Dict[tuple, int]:
+        counts = defaultdict(int)
+        for user_id, hotels in self._hotels_by_traveller().items():
+            for hotel_id in hotels:
+                counts[(self.traveller_type[user_id], hotel_id)] += 1
+        return dict(counts)
+
+
+class CypherTraversal:
+    """Reference answers from the live KG."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def _run(self, query: str, keys: List[str]) -> Dict[tuple, int]:
+        return {tuple(str(row[k]) for k in keys): row['value'] for row in self.conn.execute_query(query)}
+
+    def degree(self):
+        return self._run(DEGREE_CYPHER, ['hotel_id'])
+
+    def co_occurrence(self):
+        return self._run(CO_OCCURRENCE_CYPHER, ['hotel1', 'hotel2'])
+
+    def segment(self):
+        return self._run(SEGMENT_CYPHER, ['segment', 'hotel_id'])
+
+
+def _as_dict(projection: GraphProjection, name: str, result) -> Dict[tuple, int]:
+    """Vectorized result keyed like the reference (non-zero entries only)."""
+    hotel_ids = [str(h) for h in projection.hotel_ids]
+    if name == 'degree':
+        return {(hotel_ids[i],): int(v) for i, v in enumerate(result) if v}
+    if name == 'co_occurrence':
+        rows, cols = np.nonzero(result)
+        return {(hotel_ids[r], hotel_ids[c]): int(result[r, c]) for r, c in zip(rows, cols)}
+    return {(segment, hotel_ids[i]): int(v) for segment, counts in result.items() for i, v in enumerate(counts) if v}
+
+
+def run(projection: GraphProjection, reference, repeat: int) -> List[Dict[str, Any]]:
+    vectorized = {
+        'degree': lambda: ga.hotel_degree(projection),
+        'co_occurrence': lambda: ga.co_occurrence_matrix(projection),
+        'segment': lambda: ga.segment_popularity(projection)
+    }
+    rows = []
+    for name, fn in vectorized.items():
+        ours = _time(fn, repeat)
+        theirs = _time(getattr(reference, name), repeat)
+        rows.append({'name': name, 'vectorized_ms': ours['p50'], 'reference_ms': theirs['p50'],
+                     'match': _as_dict(projection, name, ours['result']) == theirs['result']})
+    seed = int(np.argmax(ga.hotel_degree(projection)))
+    ppr = _time(lambda: ga.personalized_pagerank(projection, [seed]), repeat)
+    rows.append({'name': 'personalized_pagerank', 'vectorized_ms': ppr['p50'], 'reference_ms': None, 'match': None})
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="CSR projection algorithms vs graph traversal")
+    parser.add_argument("--backend", choices=["standin", "neo4j"], default="standin")
+    parser.add_argument("--reviews-per-traveller", type=float, default=5.0, help="Synthetic data size (standin)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.backend == "neo4j":
+            from hotel_assistant.database.neo4j_connection import Neo4jConnection
+            conn = Neo4jConnection()
+            start = time.perf_counter()
+            projection, reference = GraphProjection.from_graph(conn), CypherTraversal(conn)
+            export_ms = (time.perf_counter() - start) * 1000
+        else:
+            dataset_dir = write_synthetic_dataset(os.path.join(tmp, 'dataset'), args.reviews_per_traveller, args.seed)
+            start = time.perf_counter()
+            projection = GraphProjection.from_csv(dataset_dir)
+            export_ms = (time.perf_counter() - start) * 1000
+            reference = RowTraversal(dataset_dir)
+        projection.save(os.path.join(tmp, 'projection'))
+        start = time.perf_counter()
+        GraphProjection.load(os.path.join(tmp, 'projection'))
+        load_ms = (time.perf_counter() - start) * 1000
+
+        summary = projection.summary()
+        print(f"{args.backend}: {summary['travellers']} travellers, {summary['hotels']} hotels, "
+              f"{summary['edges']} edges ({summary['reviews']} reviews)")
+        print(f"export {export_ms:.0f} ms, load from .npy {load_ms:.1f} ms\n")
+        rows = run(projection, reference, args.repeat)
+
+    label = "Cypher" if args.backend == "neo4j" else "row traversal"
+    print(f"{'algorithm':24} {'vectorized p50':>15} {label + ' p50':>20} {'speed-up':>9}  match")
+    mismatches = 0
+    for row in rows:
+        reference_ms = f"{row['reference_ms']:.2f} ms" if row['reference_ms'] is not None else "-"
+        speedup = f"{row['reference_ms'] / max(row['vectorized_ms'], 1e-6):.0f}x" \
+            if row['reference_ms'] is not None else "-"
+        match = {True: "yes", False: "NO", None: "-"}[row['match']]
+        mismatches += row['match'] is False
+        print(f"{row['name']:24} {row['vectorized_ms']:>12.2f} ms {reference_ms:>20} {speedup:>9}  {match}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,288 @@
+"""End-to-End Latency Benchmarks with Regression Gates
+
+Uses the Test_Cases queries as the workload. Each pipeline stage is timed in
+isolation (classify, extract, cypher, encode, vector_search, llm) and the whole
+QueryPipeline end to end. Reports p50/p95/p99 latency and throughput per stage
+and per intent, can save the numbers as a JSON baseline and exits non-zero
+when p50 or p95 regress beyond the threshold.
+
+By default everything runs in process: StandInGraph instead of Neo4j, the
+hashing embedder instead of SentenceTransformer and the stub LLM client with a
+seeded latency model. `--backend neo4j` uses the real database and embedders.
+
+Usage (from "Milestone 3"):
+    python -m benchmarks.run_benchmarks --save-baseline
+    python -m benchmarks.run_benchmarks --compare --threshold 0.2
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Keep benchmark runs off the network and out of the trace file; set before the package reads its config
+os.environ.setdefault("LLM_CLIENT_MODE", "stub")
+os.environ.setdefault("TRACING_ENABLED", "0")
+
+from hotel_assistant.config import (BENCHMARK_BASELINE_PATH, BENCHMARK_REGRESSION_THRESHOLD, DEFAULT_LLM_MODEL,
+                                    DEFAULT_SIMILARITY_THRESHOLD, DEFAULT_TOP_K)
+from hotel_assistant.monitoring.stats import summarize
+from hotel_assistant.pipeline.planner import plan_retrieval
+from hotel_assistant.query_sets import load_test_cases
+
+STAGES = ["classify", "extract", "cypher", "encode", "vector_search", "llm"]
+GATED_PERCENTILES = ("p50", "p95")
+
+
+class Harness:
+    """Pipeline components wired to either the in-process stand-ins or the real backends."""
+
+    def __init__(self, backend: str = "standin", neo4j_latency_ms: float = 5.0, seed: int = 0,
+                 llm_ttft_ms: float = 50.0, llm_tokens_per_second: float = 1000.0):
+        from hotel_assistant.llm.gateway import LLMGateway, set_gateway
+        from hotel_assistant.llm.llm_client import LatencyModel, StubClient, StubEngine, get_llm_client
+
+        if os.environ["LLM_CLIENT_MODE"] == "stub":
+            client = StubClient(StubEngine(LatencyModel(llm_ttft_ms, tokens_per_second=llm_tokens_per_second,
+                                                        seed=seed)))
+        else:
+            client = get_llm_client()
+        # No request rate limit so the benchmark measures the pipeline, not the token bucket
+        set_gateway(LLMGateway(client=client, rate_per_second=0))
+
+        from hotel_assistant.database.query_executor import select_and_execute_query
+        from hotel_assistant.llm.llm_layer import llm_layer
+        from hotel_assistant.nlp.entity_extractor import extract_entities
+        from hotel_assistant.nlp.intent_classifier import IntentClassifier
+        from hotel_assistant.pipeline.query_pipeline import QueryPipeline
+
+        if backend == "neo4j":
+            from hotel_assistant.database.neo4j_connection import Neo4jConnection
+            from hotel_assistant.nlp import embeddings
+            self.conn = Neo4jConnection()
+            self.embedder = embeddings.get_embedder_mpnet()
+            self.vector_conn = embeddings.get_conn_rag()
+            self.index = 'review_mpnet_index'
+            search = embeddings.semantic_search_mpnet
+        else:
+            from .standins import StandInGraph, make_semantic_search
+            self.conn = StandInGraph(latency_ms=neo4j_latency_ms, seed=seed)
+            self.embedder = self.conn.embedder
+            self.vector_conn = self.conn
+            self.index = 'review_standin_index'
+            search = make_semantic_search(self.embedder, self.conn, self.index)
+
+        self.classifier = IntentClassifier()
+        self.extract_entities = extract_entities
+        self.select_and_execute_query = select_and_execute_query
+        self.llm_layer = llm_layer
+        self.semantic_search = search
+        self.pipeline = QueryPipeline(self.conn, self.classifier, select_and_execute_query, extract_entities,
+                                      llm_layer, semantic_search={'mpnet': search, 'minilm': search})
+
+    def encode(self, query: str) -> List[float]:
+        embedding = self.embedder.encode([query], convert_to_numpy=True)[0]
+        return embedding.tolist() if hasattr(embedding, 'tolist') else embedding
+
+    def vector_search(self, embedding: List[float]) -> List[Dict[str, Any]]:
+        return self.vector_conn.execute_query(
+            f"CALL db.index.vector.queryNodes('{self.index}', $top_k, $query_embedding) YIELD node, score "
+            f"RETURN node, score", {'query_embedding': embedding, 'top_k': DEFAULT_TOP_K})
+
+
+def _timed(fn: Callable, *args, **kwargs) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def bench_stages(harness: Harness, cases: List[Dict[str, Any]], model: str) -> Dict[str, Dict[str, List[float]]]:
+    """Time each stage in isolation, serially; returns {stage: {intent: [ms, ...]}}."""
+    samples: Dict[str, Dict[str, List[float]]] = {stage: {} for stage in STAGES}
+
+    def record(stage: str, intent: str, ms: float):
+        samples[stage].setdefault(intent, []).append(ms)
+
+    for case in cases:
+        query, label = case['query'], case.get('expected_intent') or 'NONE'
+        intent, ms = _timed(harness.classifier.classify, query)
+        record("classify", label, ms)
+        # Downstream stages use the expected intent so every case exercises its own templates
+        intent = case.get('expected_intent') or intent
+        entities, ms = _timed(harness.extract_entities, query, intent)
+        record("extract", label, ms)
+        cypher_results, ms = _timed(harness.select_and_execute_query, harness.conn, intent, entities)
+        record("cypher", label, ms)
+        reviews = []
+        # Only the searches the pipeline runs: a filtered listing is answered without reviews
+        if plan_retrieval(intent, entities).rag_top_k:
+            embedding, ms = _timed(harness.encode, query)
+            record("encode", label, ms)
+            reviews, ms = _timed(harness.vector_search, embedding)
+            record("vector_search", label, ms)
+            reviews = [r for r in reviews if r['score'] >= DEFAULT_SIMILARITY_THRESHOLD]
+        _, ms = _timed(harness.llm_layer, query, intent, cypher_results or [], reviews, model=model)
+        record("llm", label, ms)
+    return samples
+
+
+def bench_end_to_end(harness: Harness, cases: List[Dict[str, Any]], model: str,
+                     concurrency: int = 1) -> Tuple[Dict[str, List[float]], float, int]:
+    """Run the full pipeline over all cases; returns ({intent: [ms, ...]}, wall seconds, errors)."""
+    def run(case):
+        result, ms = _timed(harness.pipeline.process, case['query'], use_rag=True, model=model)
+        return case.get('expected_intent') or 'NONE', ms, result.get('success', False)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        outcomes = list(pool.map(run, cases))
+    wall_s = time.perf_counter() - start
+
+    samples: Dict[str, List[float]] = {}
+    for intent, ms, _ in outcomes:
+        samples.setdefault(intent, []).append(ms)
+    return samples, wall_s, sum(1 for _, _, ok in outcomes if not ok)
+
+
+def _stats(values: List[float], wall_s: Optional[float] = None) -> Dict[str, Any]:
+    summary = summarize(values, percentiles=(50, 95, 99))
+    busy_s = (wall_s if wall_s is not None else sum(values) / 1000) or 0
+    summary['throughput_per_s'] = len(values) / busy_s if busy_s else None
+    return summary
+
+
+def build_report(stage_samples, e2e_samples, e2e_wall_s, e2e_errors, settings) -> Dict[str, Any]:
+    stages = {}
+    for stage, by_intent in stage_samples.items():
+        stages[stage] = {'all': _stats(sum(by_intent.values(), [])),
+                         'by_intent': {intent: _stats(values) for intent, values in sorted(by_intent.items())}}
+    return {
+        'settings': settings,
+        'created_at': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'stages': stages,
+        'end_to_end': {
+            'all': _stats(sum(e2e_samples.values(), []), e2e_wall_s),
+            'by_intent': {intent: _stats(values) for intent, values in sorted(e2e_samples.items())},
+            'errors': e2e_errors
+        }
+    }
+
+
+def compare_to_baseline(report: Dict[str, Any], baseline: Dict[str, Any],
+                        threshold: float = BENCHMARK_REGRESSION_THRESHOLD, min_delta_ms: float = 1.0) -> List[str]:
+    """
+    Regressions where p50/p95 grew by more than `threshold` (fraction) over the baseline.
+
+    Increases below `min_delta_ms` are ignored so sub-millisecond stages don't fail on timer noise.
+    """
+    def rows(r):
+        yield "end_to_end", r['end_to_end']['all']
+        for intent, s in r['end_to_end']['by_intent'].items():
+            yield f"end_to_end[{intent}]", s
+        for stage, s in r['stages'].items():
+            yield stage, s['all']
+
+    current = dict(rows(report))
+    regressions = []
+    base_tput = baseline['end_to_end']['all'].get('throughput_per_s')
+    now_tput = report['end_to_end']['all'].get('throughput_per_s')
+    if base_tput and now_tput is not None and now_tput < base_tput / (1 + threshold):
+        regressions.append(f"end_to_end throughput: {now_tput:.1f}/s vs baseline {base_tput:.1f}/s "
+                           f"({(now_tput / base_tput - 1) * 100:.0f}%)")
+    for name, base in rows(baseline):
+        now = current.get(name)
+        if now is None:
+            continue
+        for pct in GATED_PERCENTILES:
+            if (base.get(pct) and now.get(pct) is not None and now[pct] > base[pct] * (1 + threshold)
+                    and now[pct] - base[pct] >= min_delta_ms):
+                regressions.append(f"{name} {pct}: {now[pct]:.1f} ms vs baseline {base[pct]:.1f} ms "
+                                   f"(+{(now[pct] / base[pct] - 1) * 100:.0f}%)")
+    return regressions
+
+
+def print_report(report: Dict[str, Any]):
+    def line(name, s):
+        fmt = lambda v: "    n/a" if v is None else f"{v:7.1f}"
+        tput = s.get('throughput_per_s')
+        print(f"{name:28} n={s['count']:3}  p50 {fmt(s['p50'])}  p95 {fmt(s['p95'])}  p99 {fmt(s['p99'])} ms  "
+              f"{'' if tput is None else f'{tput:8.1f}/s'}")
+
+    print("\nStages (isolated, serial)")
+    print("-" * 90)
+    for stage, s in report['stages'].items():
+        line(stage, s['all'])
+        for intent, si in s['by_intent'].items():
+            line(f"  {intent}", si)
+    print("\nEnd to end")
+    print("-" * 90)
+    line("all", report['end_to_end']['all'])
+    for intent, s in report['end_to_end']['by_intent'].items():
+        line(f"  {intent}", s)
+    if report['end_to_end']['errors']:
+        print(f"  errors: {report['end_to_end']['errors']}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Pipeline latency benchmarks over Test_Cases")
+    parser.add_argument("--backend", choices=["standin", "neo4j"], default="standin")
+    parser.add_argument("--model", default=DEFAULT_LLM_MODEL)
+    parser.add_argument("--repeat", type=int, default=1, help="Run the workload this many times")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent queries in the end-to-end run")
+    parser.add_argument("--neo4j-latency-ms", type=float, default=5.0, help="Stand-in graph round trip")
+    # Faster than the app's stub defaults so a full run takes well under a minute
+    parser.add_argument("--llm-ttft-ms", type=float, default=50.0, help="Stub LLM median time to first token")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=1000.0, help="Stub LLM decode rate")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the report JSON here")
+    parser.add_argument("--save-baseline", action="store_true", help="Save the report as the baseline")
+    parser.add_argument("--compare", action="store_true", help="Fail on regressions against the baseline")
+    parser.add_argument("--baseline", default=BENCHMARK_BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=BENCHMARK_REGRESSION_THRESHOLD,
+                        help="Allowed p50/p95 growth as a fraction (0.2 = 20%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="Ignore increases smaller than this")
+    args = parser.parse_args(argv)
+
+    cases = load_test_cases() * args.repeat
+    harness = Harness(args.backend, args.neo4j_latency_ms, args.seed, args.llm_ttft_ms, args.llm_tokens_per_second)
+    print(f"Benchmarking {len(cases)} queries on the {args.backend} backend (LLM: {os.environ['LLM_CLIENT_MODE']})")
+
+    stage_samples = bench_stages(harness, cases, args.model)
+    e2e_samples, e2e_wall_s, e2e_errors = bench_end_to_end(harness, cases, args.model, args.concurrency)
+    settings = {k: getattr(args, k) for k in ('backend', 'model', 'repeat', 'concurrency', 'neo4j_latency_ms',
+                                              'llm_ttft_ms', 'llm_tokens_per_second', 'seed')}
+    settings['llm_client_mode'] = os.environ['LLM_CLIENT_MODE']
+    report = build_report(stage_samples, e2e_samples, e2e_wall_s, e2e_errors, settings)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"\nNo baseline at {args.baseline}; run with --save-baseline first")
+            return 2
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('settings') != settings:
+            print("\nWarning: baseline was recorded with different settings:", baseline.get('settings'))
+        regressions = compare_to_baseline(report, baseline, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"\nFAIL: {len(regressions)} regressions beyond {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"\nOK: no regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,297 @@
+"""In-Process Stand-Ins for Neo4j and the Embedding Models
+
+StandInGraph answers every QueryLibrary template and the vector index query
+from the KnowledgeGraph CSVs and synthetic_reviews.json, with a simulated
+round-trip latency, so the pipeline can be benchmarked without a database.
+Rows are projected onto the aliases in the query's RETURN clause, so they have
+the same keys the real templates return.
+"""
+import csv
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from hotel_assistant.config import ASPECT_TYPES
+from hotel_assistant.database.geo_index import haversine_km
+
+MILESTONE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET_DIR = os.path.join(MILESTONE_DIR, 'KnowledgeGraph', 'Dataset')
+REVIEWS_PATH = os.path.join(MILESTONE_DIR, 'synthetic_reviews.json')
+
+_ALIAS = re.compile(r'\bAS\s+(\w+)', re.IGNORECASE)
+_LIMIT = re.compile(r'\bLIMIT\s+(\d+)', re.IGNORECASE)
+_TOKEN = re.compile(r"[a-z0-9']+")
+
+
+class HashingEmbedder:
+    """Deterministic bag-of-words embedder (feature hashing), a CPU stand-in for SentenceTransformer."""
+
+    def __init__(self, dimensions: int = 384):
+        self.dimensions = dimensions
+
+    def encode_one(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        for token in _TOKEN.findall(text.lower()):
+            digest = hashlib.md5(token.encode('utf-8')).digest()
+            index = int.from_bytes(digest[:4], 'little') % self.dimensions
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def encode(self, texts: List[str], convert_to_numpy: bool = False) -> List[List[float]]:
+        return [self.encode_one(text) for text in texts]
+
+
+class StandInGraph:
+    """
+    Neo4jConnection stand-in backed by the dataset files.
+
+    Args:
+        latency_ms: Median simulated round trip per query
+        latency_sigma: Log-normal spread of the round trip
+        seed: Seed for the latency draws
+        embedder: Embedder used to index the reviews for the vector query
+    """
+
+    def __init__(self, latency_ms: float = 5.0, latency_sigma: float = 0.3, seed: Optional[int] = 0,
+                 embedder: Optional[HashingEmbedder] = None):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.queries = 0
+
+        with open(os.path.join(DATASET_DIR, 'hotels.csv'), newline='', encoding='utf-8') as f:
+            self.hotels = [self._parse_hotel(row) for row in csv.DictReader(f)]
+        self._hotels_by_name = {h['hotel_name'].lower(): h for h in self.hotels}
+        with open(os.path.join(DATASET_DIR, 'visa.csv'), newline='', encoding='utf-8') as f:
+            self.visa = {(row['from'].lower(), row['to'].lower()): row for row in csv.DictReader(f)}
+        with open(os.path.join(DATASET_DIR, 'users.csv'), newline='', encoding='utf-8') as f:
+            self.countries = sorted({row['country'] for row in csv.DictReader(f)} | {h['country'] for h in self.hotels})
+        with open(REVIEWS_PATH, encoding='utf-8') as f:
+            self.reviews = json.load(f)
+        for i, review in enumerate(self.reviews, 1):
+            review.setdefault('review_id', i)
+
+        self.review_counts: Dict[str, int] = {}
+        for review in self.reviews:
+            self.review_counts[review['hotel_name']] = self.review_counts.get(review['hotel_name'], 0) + 1
+
+        self.embedder = embedder or HashingEmbedder()
+        self._review_vectors = [self.embedder.encode_one(r['review_text']) for r in self.reviews]
+
+    @staticmethod
+    def _parse_hotel(row: Dict[str, str]) -> Dict[str, Any]:
+        hotel = {'hotel_id': row['hotel_id'], 'hotel_name': row['hotel_name'], 'city': row['city'],
+                 'country': row['country'], 'star_rating': int(float(row['star_rating'])),
+                 'lat': float(row['lat']), 'lon': float(row['lon'])}
+        for aspect in ASPECT_TYPES:
+            hotel[f'{aspect}_base'] = float(row[f'{aspect}_base'])
+        hotel['overall'] = sum(hotel[f'{a}_base'] for a in ASPECT_TYPES) / len(ASPECT_TYPES)
+        return hotel
+
+    def _sleep(self):
+        if self.latency_ms <= 0:
+            return
+        with self._rng_lock:
+            delay = self.latency_ms * math.exp(self._rng.gauss(0, self.latency_sigma))
+        time.sleep(delay / 1000)
+
+    def execute_query(self, query: str, parameters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        self.queries += 1
+        self._sleep()
+        params = parameters or {}
+        if 'query_embedding' in params:
+            return self._vector_search(params['query_embedding'], params.get('top_k', 5))
+        if 'from_country' in params:
+            return self._visa(params['from_country'], params['to_country'])
+        if 'NEEDS_VISA' in query:
+            return self._visa_edges()
+
+        return_start = query.upper().rfind('RETURN')
+        return_clause = query[return_start:]
+        aliases = _ALIAS.findall(return_clause)
+        # Values computed in a WITH and returned under their own name
+        aliases += [a for a in _ALIAS.findall(query[:return_start])
+                    if a not in aliases and re.search(rf'\b{a}\b', return_clause)]
+        limit_match = _LIMIT.search(return_clause)
+        limit = int(limit_match.group(1)) if limit_match else None
+
+        if 'hotel1' in params:
+            h1 = self._hotels_by_name.get(str(params['hotel1']).lower())
+            h2 = self._hotels_by_name.get(str(params['hotel2']).lower())
+            if h1 is None or h2 is None:
+                return []
+            row = {}
+            for alias in aliases:
+                hotel, field = (h1, alias[len('hotel1_'):]) if alias.startswith('hotel1_') else (h2, alias[len('hotel2_'):])
+                row[alias] = self._value(hotel, 'hotel_name' if field == 'name' else field)
+            return [row]
+
+        hotels = [h for h in self.hotels if self._matches(h, params)]
+        if 'lat' in params:
+            return self._near(hotels, params, aliases)
+        rows = [{alias: self._value(h, alias) for alias in aliases} for h in hotels]
+        for row in rows:
+            reviews = [k for k in row if k.endswith('_review')]
+            if 'composite_aspect_score' in row and reviews:
+                row['composite_aspect_score'] = sum(row[k] for k in reviews) / len(reviews)
+        if 'limit' in params and 'hotel_id' in aliases:
+            return self._keyset(rows, params)
+        for key in ('composite_aspect_score', 'overall_review_score'):
+            if rows and key in rows[0]:
+                rows.sort(key=lambda r: r[key], reverse=True)
+                break
+        return rows[:limit] if limit else rows
+
+    def stream_query(self, query: str, parameters: Optional[Dict[str, Any]] = None,
+                     columns: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+        for row in self.execute_query(query, parameters):
+            yield {c: row[c] for c in columns} if columns else row
+
+    @staticmethod
+    def _keyset(rows: List[Dict[str, Any]], params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Pageable templates: ORDER BY <sort> DESC, hotel_id, rows after (after_sort, after_id), LIMIT $limit."""
+        key = 'overall_review_score' if rows and 'overall_review_score' in rows[0] else 'star_rating'
+        rows.sort(key=lambda r: (-r[key], r['hotel_id']))
+        if 'after_sort' in params:
+            after = (-params['after_sort'], params['after_id'])
+            rows = [r for r in rows if (-r[key], r['hotel_id']) > after]
+        return rows[:params['limit']]
+
+    @staticmethod
+    def _matches(hotel: Dict[str, Any], params: Dict[str, Any]) -> bool:
+        if params.get('city') and hotel['city'].lower() != str(params['city']).lower():
+            return False
+        if params.get('country') and hotel['country'].lower() != str(params['country']).lower():
+            return False
+        if params.get('star_rating') and hotel['star_rating'] != int(params['star_rating']):
+            return False
+        if params.get('hotel_name') and hotel['hotel_name'].lower() != str(params['hotel_name']).lower():
+            return False
+        return True
+
+    def _value(self, hotel: Dict[str, Any], alias: str) -> Any:
+        if alias in ('hotel_name', 'name'):
+            return hotel['hotel_name']
+        if alias in ('city_name', 'city'):
+            return hotel['city']
+        if alias in ('country_name', 'country'):
+            return hotel['country']
+        if alias in ('star_rating', 'hotel_id', 'lat', 'lon'):
+            return hotel[alias]
+        if alias.endswith('_base'):
+            return hotel.get(alias)
+        if alias.endswith('_review'):
+            return hotel.get(alias[:-len('_review')] + '_base')
+        if alias in ('overall_review_score', 'composite_aspect_score'):
+            return hotel['overall']
+        if alias == 'review_count':
+            return self.review_counts.get(hotel['hotel_name'], 1)
+        return None
+
+    def _near(self, hotels: List[Dict[str, Any]], params: Dict[str, Any], aliases: List[str]) -> List[Dict[str, Any]]:
+        """Templates L6/R6: hotels by distance from (lat, lon), within radius_m and/or the k nearest."""
+        scored = [(haversine_km(params['lat'], params['lon'], h['lat'], h['lon']), h) for h in hotels]
+        scored = sorted(((d, h) for d, h in scored if not params.get('radius_m') or d * 1000 <= params['radius_m']),
+                        key=lambda item: item[0])
+        rows = []
+        for distance, hotel in scored[:params.get('k') or 50]:
+            row = {alias: self._value(hotel, alias) for alias in aliases}
+            row['distance_km'] = round(distance, 1)
+            rows.append(row)
+        return rows
+
+    def _visa(self, from_country: str, to_country: str) -> List[Dict[str, Any]]:
+        row = self.visa.get((str(from_country).lower(), str(to_country).lower()))
+        required = row is not None and row['requires_visa'].strip().lower() == 'yes'
+        return [{'from_country': from_country, 'to_country': to_country,
+                 'visa_type': row['visa_type'] if required else None, 'visa_required': required}]
+
+    def _visa_edges(self) -> List[Dict[str, Any]]:
+        """Rows of visa_matrix.VISA_MATRIX_QUERY: each country's NEEDS_VISA edges (or one null row)."""
+        rows = []
+        for country in self.countries:
+            edges = [{'from_country': country, 'to_country': row['to'], 'visa_type': row['visa_type']}
+                     for (origin, _), row in self.visa.items()
+                     if origin == country.lower() and row['requires_visa'].strip().lower() == 'yes']
+            rows.extend(edges or [{'from_country': country, 'to_country': None, 'visa_type': None}])
+        return rows
+
+    def _vector_search(self, embedding: List[float], top_k: int) -> List[Dict[str, Any]]:
+        scored = []
+        for review, vector in zip(self.reviews, self._review_vectors):
+            # Map cosine from [-1, 1] to [0, 1] like the Neo4j vector index score
+            cosine = sum(a * b for a, b in zip(embedding, vector))
+            scored.append(((cosine + 1) / 2, review))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [{'review_id': r['review_id'], 'hotel_name': r['hotel_name'], 'city': r['city'],
+                 'country': r['country'], 'traveller_type': r['traveller_type'],
+                 'review_text': r['review_text'], 'score': score}
+                for score, r in scored[:top_k]]
+
+    def close(self):
+        pass
+
+
+REVIEW_COLUMNS = ['review_id', 'user_id', 'hotel_id', 'review_date', 'review_text', 'score_overall'] + \
+    [f'score_{aspect}' for aspect in ASPECT_TYPES]
+
+
+def synthetic_review_rows(reviews_per_traveller: float = 2.0, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    reviews.csv-shaped rows (the dataset directory ships without reviews.csv).
+
+    Every users.csv traveller reviews about `reviews_per_traveller` hotels, favouring
+    a few hotels per traveller type; scores are the hotel's base scores plus noise.
+    """
+    rng = random.Random(seed)
+    with open(os.path.join(DATASET_DIR, 'users.csv'), newline='', encoding='utf-8') as f:
+        users = list(csv.DictReader(f))
+    with open(os.path.join(DATASET_DIR, 'hotels.csv'), newline='', encoding='utf-8') as f:
+        hotels = list(csv.DictReader(f))
+    preferences: Dict[str, List[float]] = {}
+    rows = []
+    for user in users:
+        weights = preferences.setdefault(user['traveller_type'], [rng.random() ** 3 for _ in hotels])
+        for _ in range(max(1, round(rng.expovariate(1 / reviews_per_traveller)))):
+            hotel = rng.choices(hotels, weights)[0]
+            scores = {aspect: min(10.0, max(1.0, float(hotel[f'{aspect}_base']) + rng.gauss(0, 0.8)))
+                      for aspect in ASPECT_TYPES}
+            row = {'review_id': len(rows) + 1, 'user_id': user['user_id'], 'hotel_id': hotel['hotel_id'],
+                   'review_date': f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}", 'review_text': '',
+                   'score_overall': round(sum(scores.values()) / len(scores), 1)}
+            row.update({f'score_{aspect}': round(score, 1) for aspect, score in scores.items()})
+            rows.append(row)
+    return rows
+
+
+def write_synthetic_dataset(directory: str, reviews_per_traveller: float = 2.0, seed: int = 0) -> str:
+    """Copy users.csv/hotels.csv/visa.csv to `directory` and add a synthetic reviews.csv."""
+    os.makedirs(directory, exist_ok=True)
+    for name in ('users.csv', 'hotels.csv', 'visa.csv'):
+        with open(os.path.join(DATASET_DIR, name), 'rb') as src, open(os.path.join(directory, name), 'wb') as dst:
+            dst.write(src.read())
+    with open(os.path.join(directory, 'reviews.csv'), 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=REVIEW_COLUMNS)
+        writer.writeheader()
+        writer.writerows(synthetic_review_rows(reviews_per_traveller, seed))
+    return directory
+
+
+def make_semantic_search(embedder, conn, index: str) -> Callable[..., List[Dict[str, Any]]]:
+    """Same contract as nlp.embeddings.semantic_search_* but with the given embedder and connection."""
+    def semantic_search(query: str, top_k: int = 5, threshold: float = 0.65) -> List[Dict[str, Any]]:
+        embedding = embedder.encode([query], convert_to_numpy=True)[0]
+        embedding = embedding.tolist() if hasattr(embedding, 'tolist') else embedding
+        results = conn.execute_query(
+            f"CALL db.index.vector.queryNodes('{index}', $top_k, $query_embedding) YIELD node, score RETURN node, score",
+            {'query_embedding': embedding, 'top_k': top_k})
+        return [r for r in results if r['score'] >= threshold]
+    return semantic_search
@@ -0,0 +1,167 @@
+"""Import-Time and Cold-Start Profiling with Budgets
+
+Reports per-module import cost (via `python -X importtime`) for the modules the
+app and API load at start-up, then measures in a fresh process:
+
+- startup_ms: process spawn until the start-up modules are imported
+- first_request_ms: the first query with RAG off (stub LLM and StandInGraph
+  with zero latency, so only our own cold-path work is measured)
+
+It exits 1 when either exceeds its budget or when a heavy dependency (torch,
+transformers, sentence_transformers, and openai in stub mode) was imported
+without being needed.
+
+Usage (from "Milestone 3"):
+    python -m benchmarks.startup_profile
+    python -m benchmarks.startup_profile --top 30 --startup-budget-ms 800
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from hotel_assistant.config import STARTUP_BUDGET_MS, FIRST_REQUEST_BUDGET_MS
+
+MILESTONE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What app.py and the API server import before the first query
+STARTUP_MODULES = [
+    "hotel_assistant.config",
+    "hotel_assistant.conversation",
+    "hotel_assistant.database.neo4j_connection",
+    "hotel_assistant.nlp.intent_classifier",
+    "hotel_assistant.pipeline.query_pipeline",
+    "hotel_assistant.monitoring.metrics_server",
+]
+HEAVY_MODULES = ["torch", "transformers", "sentence_transformers"]
+FIRST_QUERY = "Show me hotels in Paris"
+
+
+def _child_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({"LLM_CLIENT_MODE": "stub", "STUB_LLM_TTFT_MS": "0", "STUB_LLM_TOKENS_PER_SECOND": "0",
+                "TRACING_ENABLED": "0"})
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (MILESTONE_DIR, env.get("PYTHONPATH")) if p)
+    return env
+
+
+def import_profile(modules: List[str] = STARTUP_MODULES) -> List[Dict[str, Any]]:
+    """Per-module import cost in a fresh interpreter, sorted by cumulative time."""
+    code = "; ".join(f"import {m}" for m in modules)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], env=_child_env(),
+                          cwd=MILESTONE_DIR, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Import failed:\n{proc.stderr[-2000:]}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append({'module': name.strip(), 'depth': (len(name) - len(name.lstrip())) // 2,
+                     'self_ms': int(self_us) / 1000, 'cumulative_ms': int(cumulative_us) / 1000})
+    return sorted(rows, key=lambda r: r['cumulative_ms'], reverse=True)
+
+
+def _child():
+    """Runs in the measured process: import start-up modules, then answer one query."""
+    import importlib
+    for module in STARTUP_MODULES:
+        importlib.import_module(module)
+    imported_at = time.time()
+
+    from hotel_assistant.nlp.intent_classifier import IntentClassifier
+    from hotel_assistant.pipeline.query_pipeline import QueryPipeline
+    from benchmarks.standins import StandInGraph
+    # The stand-in replaces the Neo4j driver connect, which is not part of our cold path
+    conn = StandInGraph(latency_ms=0)
+    ready_at = time.time()
+
+    result = QueryPipeline(conn, IntentClassifier()).process(FIRST_QUERY, use_rag=False)
+    answered_at = time.time()
+    print(json.dumps({
+        'imported_at': imported_at,
+        'first_request_ms': (answered_at - ready_at) * 1000,
+        'success': bool(result.get('success') and result['llm_response'].get('success')),
+        'loaded_heavy_modules': [m for m in HEAVY_MODULES + ["openai"] if m in sys.modules]
+    }))
+
+
+def cold_start() -> Dict[str, Any]:
+    """Spawn a fresh process and measure start-up and first-request (RAG off) time."""
+    spawned_at = time.time()
+    proc = subprocess.run([sys.executable, "-m", "benchmarks.startup_profile", "--child"], env=_child_env(),
+                          cwd=MILESTONE_DIR, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Cold-start run failed:\n{proc.stderr[-2000:]}")
+    report = json.loads(proc.stdout.strip().splitlines()[-1])
+    report['startup_ms'] = (report.pop('imported_at') - spawned_at) * 1000
+    return report
+
+
+def interpreter_baseline_ms() -> float:
+    """Bare `python -c pass` wall time, for reference."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Import-time and cold-start profile with budgets")
+    parser.add_argument("--top", type=int, default=20, help="Slowest modules to list")
+    parser.add_argument("--startup-budget-ms", type=float, default=STARTUP_BUDGET_MS)
+    parser.add_argument("--first-request-budget-ms", type=float, default=FIRST_REQUEST_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=3, help="Cold starts to run (the median is gated)")
+    parser.add_argument("--json", help="Write the report here")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        _child()
+        return 0
+
+    profile = import_profile()
+    print(f"Slowest imports (cumulative) for: {', '.join(STARTUP_MODULES)}")
+    print("-" * 80)
+    for row in profile[:args.top]:
+        print(f"{row['cumulative_ms']:9.1f} ms  {row['self_ms']:8.1f} ms self  {'  ' * row['depth']}{row['module']}")
+
+    runs = [cold_start() for _ in range(max(1, args.runs))]
+    startup_ms = sorted(r['startup_ms'] for r in runs)[len(runs) // 2]
+    first_request_ms = sorted(r['first_request_ms'] for r in runs)[len(runs) // 2]
+    loaded = sorted({m for r in runs for m in r['loaded_heavy_modules']})
+    baseline_ms = interpreter_baseline_ms()
+
+    print(f"\nInterpreter alone:        {baseline_ms:8.1f} ms")
+    print(f"Start-up (spawn+imports): {startup_ms:8.1f} ms  (budget {args.startup_budget_ms:.0f} ms)")
+    print(f"First request, RAG off:   {first_request_ms:8.1f} ms  (budget {args.first_request_budget_ms:.0f} ms)")
+    print(f"Heavy modules loaded:     {', '.join(loaded) or 'none'}")
+
+    failures = []
+    if startup_ms > args.startup_budget_ms:
+        failures.append(f"start-up {startup_ms:.0f} ms > {args.startup_budget_ms:.0f} ms")
+    if first_request_ms > args.first_request_budget_ms:
+        failures.append(f"first request {first_request_ms:.0f} ms > {args.first_request_budget_ms:.0f} ms")
+    if loaded:
+        failures.append(f"heavy modules imported without RAG: {', '.join(loaded)}")
+    if not all(r['success'] for r in runs):
+        failures.append("first request did not succeed")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'imports': profile[:args.top], 'runs': runs, 'startup_ms': startup_ms,
+                       'first_request_ms': first_request_ms, 'interpreter_ms': baseline_ms,
+                       'failures': failures}, f, indent=2)
+
+    if failures:
+        print("\nFAIL: " + "; ".join(failures))
+        return 1
+    print("\nOK: within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""Country-Group Classifier Training (the Milestone 1 Models, Persisted)
+
+Predicts a review's hotel country group (COUNTRY_TO_GROUP) from the
+traveller's demographics, the review's aspect scores and the hotel's baseline
+scores, as in the Milestone 1 notebook. The whole pipeline is fitted and saved
+together - one-hot encoding, the deviation features (score - baseline) and the
+classifier - so serving passes raw columns and cannot drift from training.
+
+Models are the notebook's: a random forest with the grid search's best
+parameters (the default) or a balanced logistic regression.
+
+Usage:
+    python -m hotel_assistant.analytics.country_group_model train --dataset-dir path/to/Dataset
+    python -m hotel_assistant.analytics.country_group_model train --model logistic_regression
+    python -m hotel_assistant.analytics.country_group_model serve-bench --dataset-dir path/to/Dataset
+"""
+import argparse
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import joblib
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import FunctionTransformer, OneHotEncoder
+
+from ..config import COUNTRY_GROUP_MODEL, COUNTRY_GROUP_MODEL_PATH, FEATURE_CACHE_DIR, KG_DATASET_DIR
+# deviations lives in features so the pickled pipeline never refers to __main__ (this module's CLI)
+from .features import BASE_COLUMNS, CATEGORICAL_FEATURES, SCORE_COLUMNS, TARGET, deviations, load_features
+
+INPUT_COLUMNS = CATEGORICAL_FEATURES + SCORE_COLUMNS + BASE_COLUMNS
+MODELS = ("random_forest", "logistic_regression")
+
+
+def build_pipeline(model: str = COUNTRY_GROUP_MODEL, seed: int = 42) -> Pipeline:
+    features = ColumnTransformer([
+        ('categorical', OneHotEncoder(handle_unknown='ignore'), CATEGORICAL_FEATURES),
+        ('scores', 'passthrough', SCORE_COLUMNS),
+        ('deviations', FunctionTransformer(deviations), SCORE_COLUMNS + BASE_COLUMNS),
+    ])
+    if model == "random_forest":
+        # Best parameters of the notebook's GridSearchCV (section 6.2)
+        classifier = RandomForestClassifier(n_estimators=200, max_depth=None, min_samples_split=5,
+                                            min_samples_leaf=1, class_weight='balanced', random_state=seed,
+                                            n_jobs=-1)
+    elif model == "logistic_regression":
+        classifier = LogisticRegression(max_iter=1000, class_weight='balanced', random_state=seed)
+    else:
+        raise ValueError(f"Unknown model {model!r}; expected one of {MODELS}")
+    return Pipeline([('features', features), ('classifier', classifier)])
+
+
+def train(features: pd.DataFrame, model: str = COUNTRY_GROUP_MODEL, test_size: float = 0.2,
+          seed: int = 42) -> Dict[str, Any]:
+    """Fit on a stratified split (as the notebook) and return {'pipeline', 'report'}."""
+    features = features.dropna(subset=[TARGET])
+    X, y = features[INPUT_COLUMNS], features[TARGET].astype(str)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, stratify=y, random_state=seed)
+
+    pipeline = build_pipeline(model, seed)
+    start = time.perf_counter()
+    pipeline.fit(X_train, y_train)
+    training_ms = (time.perf_counter() - start) * 1000
+    predicted = pipeline.predict(X_test)
+    report = {'model': model, 'train_rows': len(X_train), 'test_rows': len(X_test), 'training_ms': training_ms,
+              'accuracy': float(accuracy_score(y_test, predicted)),
+              'f1_weighted': float(f1_score(y_test, predicted, average='weighted', zero_division=0))}
+    return {'pipeline': pipeline, 'report': report}
+
+
+def save_model(pipeline: Pipeline, report: Dict[str, Any], path: str = COUNTRY_GROUP_MODEL_PATH):
+    """Write the fitted pipeline with its input columns, classes and training report (atomically)."""
+    import sklearn
+    artifact = {'pipeline': pipeline, 'input_columns': INPUT_COLUMNS,
+                'classes': [str(c) for c in pipeline.classes_], 'report': report,
+                'trained_at': time.time(), 'sklearn_version': sklearn.__version__}
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    joblib.dump(artifact, path + ".tmp")
+    os.replace(path + ".tmp", path)
+
+
+def serving_throughput(features: pd.DataFrame, path: str = COUNTRY_GROUP_MODEL_PATH,
+                       batch_sizes=(1, 16, 256, 4096), concurrency: int = 32,
+                       single_rows: int = 2000) -> Dict[str, Any]:
+    """
+    Rows/second of the saved model: batch predict at each batch size, and single-row requests
+    from `concurrency` threads, one predict call each vs through the micro-batcher.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from ..monitoring.stats import summarize
+    from .country_group_serving import CountryGroupPredictor, MicroBatcher
+
+    predictor = CountryGroupPredictor.load(path)
+    rows = features[INPUT_COLUMNS]
+    report: Dict[str, Any] = {'batch': {}}
+    for batch_size in batch_sizes:
+        batches = max(1, min(50, len(rows) // batch_size))
+        start = time.perf_counter()
+        for i in range(batches):
+            predictor.predict(rows.iloc[i * batch_size:(i + 1) * batch_size])
+        elapsed = time.perf_counter() - start
+        report['batch'][batch_size] = min(batch_size, len(rows)) * batches / elapsed
+
+    records = rows.iloc[:single_rows].to_dict('records')
+    batcher = MicroBatcher(predictor)
+    for name, predict_one in (('unbatched', predictor.predict_one), ('micro_batched', batcher.predict)):
+        latencies = []
+
+        def call(record):
+            call_start = time.perf_counter()
+            predict_one(record)
+            latencies.append((time.perf_counter() - call_start) * 1000)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(call, records))
+        elapsed = time.perf_counter() - start
+        report[name] = {'rows_per_s': len(records) / elapsed, **summarize(latencies, percentiles=(50, 99))}
+    batcher.close()
+    return report
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Train or benchmark the country-group classifier")
+    parser.add_argument("command", choices=["train", "serve-bench"])
+    parser.add_argument("--dataset-dir", default=KG_DATASET_DIR, help="Directory with reviews/users/hotels.csv")
+    parser.add_argument("--cache-dir", default=FEATURE_CACHE_DIR)
+    parser.add_argument("--model", choices=MODELS, default=COUNTRY_GROUP_MODEL)
+    parser.add_argument("--output", default=COUNTRY_GROUP_MODEL_PATH)
+    parser.add_argument("--test-size", type=float, default=0.2)
+    parser.add_argument("--concurrency", type=int, default=32, help="serve-bench: concurrent single-row callers")
+    args = parser.parse_args(argv)
+
+    features = load_features(args.dataset_dir, args.cache_dir)
+    if args.command == "serve-bench":
+        report = serving_throughput(features, args.output, concurrency=args.concurrency)
+        for batch_size, rate in report['batch'].items():
+            print(f"batch predict, {batch_size:>5} rows per call: {rate:>10.0f} rows/s")
+        for name in ('unbatched', 'micro_batched'):
+            stats = report[name]
+            print(f"single rows, {args.concurrency} callers, {name:<13} {stats['rows_per_s']:>10.0f} rows/s "
+                  f"(p50 {stats['p50']:.1f} ms, p99 {stats['p99']:.1f} ms)")
+        return
+
+    result = train(features, args.model, args.test_size)
+    save_model(result['pipeline'], result['report'], args.output)
+    report = result['report']
+    print(f"{report['model']}: trained on {report['train_rows']} reviews in {report['training_ms']:.0f} ms; "
+          f"test accuracy {report['accuracy']:.4f}, weighted F1 {report['f1_weighted']:.4f} -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
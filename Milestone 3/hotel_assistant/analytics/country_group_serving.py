@@ -0,0 +1,161 @@
+"""Serving the Country-Group Classifier
+
+CountryGroupPredictor wraps the pipeline saved by country_group_model:
+predict() and predict_proba() take a whole batch at once (a DataFrame with
+the input columns, a 2-d array in INPUT_COLUMNS order, or a list of row
+dicts), so encoding and the model run once per batch, not once per row.
+
+Request-time callers ask for one row at a time. MicroBatcher collects the
+rows submitted within COUNTRY_GROUP_BATCH_WAIT_MS (up to
+COUNTRY_GROUP_BATCH_SIZE) from all threads and answers them with a single
+predict_proba call.
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Sequence
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from ..config import COUNTRY_GROUP_BATCH_SIZE, COUNTRY_GROUP_BATCH_WAIT_MS, COUNTRY_GROUP_MODEL_PATH
+
+logger = logging.getLogger(__name__)
+
+
+class CountryGroupPredictor:
+    """A fitted pipeline and the columns it expects."""
+
+    def __init__(self, pipeline, input_columns: List[str], classes: List[str],
+                 report: Optional[Dict[str, Any]] = None):
+        self.pipeline = pipeline
+        self.input_columns = list(input_columns)
+        self.classes = np.asarray(classes)
+        self.report = report or {}
+
+    @classmethod
+    def load(cls, path: str = COUNTRY_GROUP_MODEL_PATH) -> "CountryGroupPredictor":
+        artifact = joblib.load(path)
+        pipeline = artifact['pipeline']
+        # Batches are small at request time: a thread pool per predict call costs more than it saves
+        if 'n_jobs' in pipeline.named_steps['classifier'].get_params():
+            pipeline.set_params(classifier__n_jobs=1)
+        return cls(pipeline, artifact['input_columns'], artifact['classes'], artifact.get('report'))
+
+    def _frame(self, rows) -> pd.DataFrame:
+        if isinstance(rows, pd.DataFrame):
+            missing = [c for c in self.input_columns if c not in rows.columns]
+            if missing:
+                raise ValueError(f"Missing input columns: {missing}")
+            return rows[self.input_columns]
+        if isinstance(rows, np.ndarray):
+            if rows.ndim != 2 or rows.shape[1] != len(self.input_columns):
+                raise ValueError(f"Expected an array of shape (n, {len(self.input_columns)}), got {rows.shape}")
+            return pd.DataFrame(rows, columns=self.input_columns)
+        return pd.DataFrame.from_records(list(rows), columns=self.input_columns)
+
+    def predict_proba(self, rows) -> np.ndarray:
+        """(n, len(classes)) probabilities, columns in `classes` order."""
+        return self.pipeline.predict_proba(self._frame(rows))
+
+    def predict(self, rows) -> np.ndarray:
+        return self.classes[self.predict_proba(rows).argmax(axis=1)]
+
+    def results(self, probabilities: np.ndarray) -> List[Dict[str, Any]]:
+        best = probabilities.argmax(axis=1)
+        return [{'country_group': str(self.classes[i]), 'probability': float(p[i])}
+                for i, p in zip(best, probabilities)]
+
+    def predict_one(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """{'country_group', 'probability'} for one row, predicted on its own."""
+        return self.results(self.predict_proba([row]))[0]
+
+
+class MicroBatcher:
+    """Coalesces concurrent single-row predictions into batch predict_proba calls."""
+
+    def __init__(self, predictor: CountryGroupPredictor, max_batch: int = COUNTRY_GROUP_BATCH_SIZE,
+                 max_wait_ms: float = COUNTRY_GROUP_BATCH_WAIT_MS):
+        self.predictor = predictor
+        self.max_batch = max_batch
+        self.max_wait_s = max_wait_ms / 1000
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.rows = 0
+
+    def submit(self, row: Dict[str, Any]) -> Future:
+        future: Future = Future()
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="country-group-batcher", daemon=True)
+                self._thread.start()
+        self._queue.put((row, future))
+        return future
+
+    def predict(self, row: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """{'country_group', 'probability'} for one row, predicted together with concurrent callers' rows."""
+        return self.submit(row).result(timeout)
+
+    def _collect(self, first) -> List[Any]:
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait_s
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # stop after this batch
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = self._collect(first)
+            rows: Sequence[Dict[str, Any]] = [row for row, _ in batch]
+            try:
+                results = self.predictor.results(self.predictor.predict_proba(rows))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.rows += len(batch)
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+    def close(self):
+        """Answer the queued rows, then stop the batching thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+
+_batcher: Optional[MicroBatcher] = None
+_batcher_lock = threading.Lock()
+
+
+def get_country_group_batcher(path: str = COUNTRY_GROUP_MODEL_PATH) -> Optional[MicroBatcher]:
+    """Shared batcher over the saved model, loaded on first use; None until a model has been trained."""
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                if not os.path.exists(path):
+                    logger.info("No country-group model at %s (train it with analytics.country_group_model)", path)
+                    return None
+                _batcher = MicroBatcher(CountryGroupPredictor.load(path))
+    return _batcher
@@ -0,0 +1,153 @@
+"""Review Feature Matrix (the Milestone 1 Preprocessing, Columnar)
+
+The Milestone 1 notebook builds its modelling table interactively:
+reviews x users x hotels merged, columns prefixed (review_, user_, hotel_),
+text/date columns dropped, one deviation feature per aspect
+(review score - hotel baseline) and the country_group target from
+COUNTRY_TO_GROUP. This module builds the same table as a reusable step:
+
+- reviews.csv is read in chunks of FEATURE_CHUNK_ROWS, only the columns used,
+  with compact dtypes (int32 ids, float32 scores, categorical strings)
+- each chunk is merged against the (small) user and hotel tables and all
+  deviations are one array subtraction
+- the result is cached in FEATURE_CACHE_DIR, keyed by the CSVs' size and mtime
+
+Usage:
+    python -m hotel_assistant.analytics.features --dataset-dir KnowledgeGraph/Dataset
+    python -m hotel_assistant.analytics.features --refresh
+"""
+import argparse
+import hashlib
+import os
+import time
+from typing import Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from ..config import ASPECT_TYPES, FEATURE_CACHE_DIR, FEATURE_CHUNK_ROWS, KG_DATASET_DIR
+
+FEATURE_VERSION = 1  # bump when the columns or their computation change
+
+# The notebook's 25 countries in 11 regions (the classification target)
+COUNTRY_TO_GROUP = {
+    'United States': 'North_America', 'Canada': 'North_America',
+    'Germany': 'Western_Europe', 'France': 'Western_Europe', 'United Kingdom': 'Western_Europe',
+    'Netherlands': 'Western_Europe', 'Spain': 'Western_Europe', 'Italy': 'Western_Europe',
+    'Russia': 'Eastern_Europe',
+    'China': 'East_Asia', 'Japan': 'East_Asia', 'South Korea': 'East_Asia',
+    'Thailand': 'Southeast_Asia', 'Singapore': 'Southeast_Asia',
+    'United Arab Emirates': 'Middle_East', 'Turkey': 'Middle_East',
+    'Egypt': 'Africa', 'Nigeria': 'Africa', 'South Africa': 'Africa',
+    'Australia': 'Oceania', 'New Zealand': 'Oceania',
+    'Brazil': 'South_America', 'Argentina': 'South_America',
+    'India': 'South_Asia',
+    'Mexico': 'North_America_Mexico'
+}
+COUNTRY_GROUPS = sorted(set(COUNTRY_TO_GROUP.values()))
+
+SCORE_COLUMNS = [f'review_score_{aspect}' for aspect in ASPECT_TYPES]
+BASE_COLUMNS = [f'hotel_{aspect}_base' for aspect in ASPECT_TYPES]
+DEVIATION_COLUMNS = [f'deviation_{aspect}' for aspect in ASPECT_TYPES]
+CATEGORICAL_FEATURES = ['user_gender', 'user_age_group', 'user_traveller_type']
+MODEL_FEATURES = CATEGORICAL_FEATURES + SCORE_COLUMNS + DEVIATION_COLUMNS  # notebook section 5.1
+TARGET = 'country_group'
+
+REVIEW_DTYPES = {'review_id': 'int32', 'user_id': 'int32', 'hotel_id': 'int32', 'score_overall': 'float32',
+                 **{f'score_{aspect}': 'float32' for aspect in ASPECT_TYPES}}
+USER_DTYPES = {'user_id': 'int32', 'user_gender': 'category', 'country': 'category', 'age_group': 'category',
+               'traveller_type': 'category'}
+HOTEL_DTYPES = {'hotel_id': 'int32', 'city': 'category', 'country': 'category', 'star_rating': 'float32',
+                **{f'{aspect}_base': 'float32' for aspect in ASPECT_TYPES}}
+
+
+def _prefix(frame: pd.DataFrame, prefix: str, keep: List[str]) -> pd.DataFrame:
+    """The notebook's renaming: every column but `keep` gets `prefix`."""
+    return frame.rename(columns={c: c if c in keep else prefix + c for c in frame.columns})
+
+
+def load_users(dataset_dir: str = KG_DATASET_DIR) -> pd.DataFrame:
+    users = pd.read_csv(os.path.join(dataset_dir, 'users.csv'), usecols=list(USER_DTYPES), dtype=USER_DTYPES)
+    return _prefix(users, 'user_', ['user_id', 'user_gender'])
+
+
+def load_hotels(dataset_dir: str = KG_DATASET_DIR) -> pd.DataFrame:
+    hotels = pd.read_csv(os.path.join(dataset_dir, 'hotels.csv'), usecols=list(HOTEL_DTYPES), dtype=HOTEL_DTYPES)
+    return _prefix(hotels, 'hotel_', ['hotel_id'])
+
+
+def iter_review_chunks(path: str, chunk_rows: int = FEATURE_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """reviews.csv without the text and date columns, `chunk_rows` at a time."""
+    with pd.read_csv(path, usecols=list(REVIEW_DTYPES), dtype=REVIEW_DTYPES, chunksize=chunk_rows) as reader:
+        for chunk in reader:
+            yield _prefix(chunk, 'review_', ['review_id', 'user_id', 'hotel_id'])
+
+
+def deviations(scores_and_bases) -> np.ndarray:
+    """Review scores minus hotel baselines, from SCORE_COLUMNS + BASE_COLUMNS side by side."""
+    values = np.asarray(scores_and_bases, dtype=np.float32)
+    half = values.shape[1] // 2
+    return values[:, :half] - values[:, half:]
+
+
+def chunk_features(reviews: pd.DataFrame, users: pd.DataFrame, hotels: pd.DataFrame) -> pd.DataFrame:
+    """Merged rows of one reviews chunk with its deviation features and country_group."""
+    merged = reviews.merge(users, on='user_id', how='left').merge(hotels, on='hotel_id', how='left')
+    merged[DEVIATION_COLUMNS] = pd.DataFrame(deviations(merged[SCORE_COLUMNS + BASE_COLUMNS]),
+                                             columns=DEVIATION_COLUMNS, index=merged.index)
+    # Mapped once per category, not per row
+    merged[TARGET] = pd.Categorical(merged['hotel_country'].map(COUNTRY_TO_GROUP), categories=COUNTRY_GROUPS)
+    return merged
+
+
+def build_features(dataset_dir: str = KG_DATASET_DIR, chunk_rows: int = FEATURE_CHUNK_ROWS) -> pd.DataFrame:
+    users, hotels = load_users(dataset_dir), load_hotels(dataset_dir)
+    chunks = [chunk_features(chunk, users, hotels)
+              for chunk in iter_review_chunks(os.path.join(dataset_dir, 'reviews.csv'), chunk_rows)]
+    return pd.concat(chunks, ignore_index=True)
+
+
+def cache_path(dataset_dir: str = KG_DATASET_DIR, cache_dir: str = FEATURE_CACHE_DIR) -> str:
+    """Cache file for the dataset's current CSVs."""
+    key = hashlib.sha1(str(FEATURE_VERSION).encode('ascii'))
+    for name in ('reviews.csv', 'users.csv', 'hotels.csv'):
+        stat = os.stat(os.path.join(dataset_dir, name))
+        key.update(f"{os.path.abspath(os.path.join(dataset_dir, name))}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return os.path.join(cache_dir, f"features-{key.hexdigest()[:16]}.pkl")
+
+
+def load_features(dataset_dir: str = KG_DATASET_DIR, cache_dir: str = FEATURE_CACHE_DIR,
+                  chunk_rows: int = FEATURE_CHUNK_ROWS, refresh: bool = False) -> pd.DataFrame:
+    """The feature matrix, from the cache when the CSVs have not changed since it was built."""
+    path = cache_path(dataset_dir, cache_dir)
+    if not refresh and os.path.exists(path):
+        return pd.read_pickle(path)
+    features = build_features(dataset_dir, chunk_rows)
+    os.makedirs(cache_dir, exist_ok=True)
+    features.to_pickle(path + ".tmp")
+    os.replace(path + ".tmp", path)
+    return features
+
+
+def memory_mb(frame: pd.DataFrame) -> float:
+    return frame.memory_usage(deep=True).sum() / 2 ** 20
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Build (or load the cached) review feature matrix")
+    parser.add_argument("--dataset-dir", default=KG_DATASET_DIR, help="Directory with reviews/users/hotels.csv")
+    parser.add_argument("--cache-dir", default=FEATURE_CACHE_DIR)
+    parser.add_argument("--chunk-rows", type=int, default=FEATURE_CHUNK_ROWS)
+    parser.add_argument("--refresh", action="store_true", help="Rebuild even if the cache is current")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    features = load_features(args.dataset_dir, args.cache_dir, args.chunk_rows, args.refresh)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    print(f"{len(features)} rows x {features.shape[1]} columns, {memory_mb(features):.1f} MB, "
+          f"{elapsed_ms:.0f} ms -> {cache_path(args.dataset_dir, args.cache_dir)}")
+    print(features[TARGET].value_counts().sort_index().to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Vectorized Graph Algorithms over a GraphProjection
+
+In-process replacements for Cypher traversals of Traveller -> Review -> Hotel.
+All work on the CSR arrays with NumPy/SciPy sparse products; the Cypher each
+one replaces is noted in its docstring (benchmarks/graph_projection.py times
+both).
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from scipy import sparse
+
+from .projection import GraphProjection
+
+
+def adjacency(projection: GraphProjection, weighted: bool = False) -> sparse.csr_matrix:
+    """travellers x hotels matrix sharing the projection's arrays (1 per edge, or review counts)."""
+    data = projection.weights if weighted else np.ones(projection.n_edges, dtype=np.float32)
+    return sparse.csr_matrix((data, projection.indices, projection.indptr),
+                             shape=(projection.n_travellers, projection.n_hotels))
+
+
+def traveller_degree(projection: GraphProjection) -> np.ndarray:
+    """Distinct hotels reviewed per traveller."""
+    return np.diff(projection.indptr)
+
+
+def hotel_degree(projection: GraphProjection, weighted: bool = False) -> np.ndarray:
+    """
+    Distinct travellers (or reviews, weighted=True) per hotel.
+
+    Cypher: MATCH (t:Traveller)-[:WROTE]->(:Review)-[:REVIEWED]->(h:Hotel) RETURN h, count(DISTINCT t)
+    """
+    return np.bincount(projection.indices, weights=projection.weights if weighted else None,
+                       minlength=projection.n_hotels)
+
+
+def co_occurrence_matrix(projection: GraphProjection) -> np.ndarray:
+    """
+    hotels x hotels count of travellers who reviewed both (diagonal: the hotel's degree).
+
+    Cypher: MATCH (h1:Hotel)<-[:REVIEWED]-(:Review)<-[:WROTE]-(t:Traveller)-[:WROTE]->(:Review)-[:REVIEWED]->(h2:Hotel)
+            RETURN h1, h2, count(DISTINCT t)
+    """
+    a = adjacency(projection)
+    return (a.T @ a).toarray()
+
+
+def co_visited(projection: GraphProjection, hotel: int, top_k: int = 5) -> List[Dict[str, Any]]:
+    """Hotels most often reviewed by the travellers of `hotel` (dense id)."""
+    travellers = projection.travellers_of(hotel)
+    counts = np.bincount(projection.indices[_edge_slices(projection.indptr, travellers)],
+                         minlength=projection.n_hotels)
+    counts[hotel] = 0
+    return top_hotels(projection, counts, top_k, 'shared_travellers')
+
+
+def traveller_similarity(projection: GraphProjection, traveller: int, top_k: int = 5) -> List[Dict[str, Any]]:
+    """Travellers with the most similar hotel sets (cosine over the binary adjacency)."""
+    a = adjacency(projection)
+    overlap = np.asarray((a @ a[traveller].T).todense()).ravel()
+    norms = np.sqrt(traveller_degree(projection).astype(np.float64))
+    similarity = np.divide(overlap, norms * norms[traveller], out=np.zeros_like(overlap, dtype=np.float64),
+                           where=norms > 0)
+    similarity[traveller] = 0.0
+    top = _top_k(similarity, top_k)
+    return [{'user_id': projection.traveller_ids[i].item(), 'similarity': float(similarity[i])}
+            for i in top if similarity[i] > 0]
+
+
+def segment_popularity(projection: GraphProjection, segments: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """
+    Distinct travellers per hotel within each segment (traveller type by default).
+
+    Cypher: MATCH (t:Traveller)-[:WROTE]->(:Review)-[:REVIEWED]->(h:Hotel) RETURN t.type, h, count(DISTINCT t)
+    """
+    segments = projection.traveller_type if segments is None else segments
+    labels, codes = np.unique(segments, return_inverse=True)
+    one_hot = sparse.csr_matrix((np.ones(len(codes), dtype=np.float32), (codes, np.arange(len(codes)))),
+                                shape=(len(labels), len(codes)))
+    counts = (one_hot @ adjacency(projection)).toarray()
+    return {str(label): counts[i] for i, label in enumerate(labels)}
+
+
+def personalized_pagerank(projection: GraphProjection, seeds: Sequence[int], alpha: float = 0.85,
+                          max_iter: int = 100, tol: float = 1e-8) -> np.ndarray:
+    """
+    Personalized PageRank over the undirected bipartite graph, restarting at the seed hotels.
+
+    Returns one score per hotel, normalized to sum to 1 over the hotels; power iteration
+    alternates hotel -> traveller -> hotel steps with the review counts as edge weights.
+    """
+    a = adjacency(projection, weighted=True).astype(np.float64)
+    traveller_out = np.asarray(a.sum(axis=1)).ravel()
+    hotel_out = np.asarray(a.sum(axis=0)).ravel()
+    to_travellers = sparse.diags(_safe_inverse(hotel_out)) @ a.T.tocsr()  # hotel -> traveller, row-stochastic
+    to_hotels = sparse.diags(_safe_inverse(traveller_out)) @ a  # traveller -> hotel
+
+    n_t, n_h = projection.n_travellers, projection.n_hotels
+    restart = np.zeros(n_t + n_h)
+    restart[n_t + np.asarray(seeds, dtype=np.int64)] = 1.0 / len(seeds)
+    rank = restart.copy()
+    for _ in range(max_iter):
+        travellers, hotels = rank[:n_t], rank[n_t:]
+        walked = np.concatenate([to_travellers.T @ hotels, to_hotels.T @ travellers])
+        # Mass on nodes without edges goes back to the seeds
+        dangling = rank.sum() - walked.sum()
+        updated = alpha * walked + (1 - alpha + alpha * dangling) * restart
+        if np.abs(updated - rank).sum() < tol:
+            rank = updated
+            break
+        rank = updated
+    hotels = rank[n_t:]
+    return hotels / hotels.sum()
+
+
+def _safe_inverse(values: np.ndarray) -> np.ndarray:
+    return np.divide(1.0, values, out=np.zeros_like(values, dtype=np.float64), where=values > 0)
+
+
+def _edge_slices(indptr: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """Edge positions of several CSR rows at once (concatenated)."""
+    starts, lengths = indptr[rows], indptr[rows + 1] - indptr[rows]
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return np.repeat(starts, lengths) + offsets
+
+
+def _top_k(values: np.ndarray, k: int) -> np.ndarray:
+    k = min(k, len(values))
+    top = np.argpartition(-values, k - 1)[:k] if k else np.array([], dtype=np.int64)
+    return top[np.argsort(-values[top], kind='stable')]
+
+
+def top_hotels(projection: GraphProjection, values: np.ndarray, top_k: int = 5,
+               field: str = 'score') -> List[Dict[str, Any]]:
+    """Hotel rows for the highest positive `values` (one per hotel), e.g. a PageRank or segment_popularity vector."""
+    return [{'hotel_id': projection.hotel_ids[i].item(), 'hotel_name': str(projection.hotel_name[i]),
+             field: values[i].item()} for i in _top_k(values, top_k) if values[i] > 0]
@@ -0,0 +1,146 @@
+"""Scheduled Analytics Refresh
+
+refresh() runs registered analytics against the graph and materializes the rows
+with their timing; AnalyticsScheduler repeats that on an interval in a
+background thread; get_result() serves from the store only.
+
+Usage:
+    python -m hotel_assistant.analytics.jobs refresh
+    python -m hotel_assistant.analytics.jobs refresh --only top_hotels_by_traveller_type \\
+        --param traveller_type=Family --param limit=5
+    python -m hotel_assistant.analytics.jobs schedule --interval 3600
+    python -m hotel_assistant.analytics.jobs show
+"""
+import argparse
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from ..config import ANALYTICS_REFRESH_INTERVAL_S
+from ..monitoring.metrics import ANALYTICS_REFRESH_SECONDS
+from .queries import ANALYTICS
+from .store import get_results_store
+
+logger = logging.getLogger(__name__)
+
+
+def refresh(conn, store, names: Optional[List[str]] = None,
+            params: Optional[Dict[str, Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    """
+    Run analytics and store their results.
+
+    Args:
+        names: Analytics to run (default: all registered)
+        params: Per-analytic parameter overrides, merged over the defaults
+
+    Returns:
+        One status dict per analytic: name, params, rows, duration_ms and error (if it failed)
+    """
+    statuses = []
+    for name in names or list(ANALYTICS):
+        spec = ANALYTICS[name]
+        job_params = dict(spec['defaults'], **(params or {}).get(name, {}))
+        start = time.perf_counter()
+        try:
+            rows = spec['fn'](conn, **job_params)
+        except Exception as e:
+            logger.warning("Analytics job %s failed: %s", name, e)
+            statuses.append({'name': name, 'params': job_params, 'error': str(e)})
+            continue
+        duration_ms = (time.perf_counter() - start) * 1000
+        ANALYTICS_REFRESH_SECONDS.observe(duration_ms / 1000, analytic=name)
+        store.save(name, job_params, rows, duration_ms)
+        statuses.append({'name': name, 'params': job_params, 'rows': len(rows), 'duration_ms': duration_ms})
+    return statuses
+
+
+def get_result(store, name: str, **params) -> Optional[Dict[str, Any]]:
+    """Materialized result for an analytic (defaults merged with params), or None if never refreshed."""
+    return store.get(name, dict(ANALYTICS[name]['defaults'], **params))
+
+
+class AnalyticsScheduler:
+    """Refreshes analytics (all by default) every `interval_s` seconds in a daemon thread."""
+
+    def __init__(self, conn, store, interval_s: float = ANALYTICS_REFRESH_INTERVAL_S,
+                 names: Optional[List[str]] = None, params: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.conn = conn
+        self.store = store
+        self.interval_s = interval_s
+        self.names = names
+        self.params = params
+        self.last_run: List[Dict[str, Any]] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="analytics-refresh", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.last_run = refresh(self.conn, self.store, self.names, self.params)
+            self._stop.wait(self.interval_s)
+
+
+def _parse_params(values: List[str]) -> Dict[str, Any]:
+    params = {}
+    for item in values:
+        key, value = item.split("=", 1)
+        try:
+            params[key] = json.loads(value)
+        except json.JSONDecodeError:
+            params[key] = value
+    return params
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Materialize the graph analytics")
+    parser.add_argument("command", choices=["refresh", "schedule", "show"])
+    parser.add_argument("--only", action="append", choices=sorted(ANALYTICS), help="Analytics to run")
+    parser.add_argument("--param", action="append", default=[], help="key=value override (with a single --only)")
+    parser.add_argument("--interval", type=float, default=ANALYTICS_REFRESH_INTERVAL_S, help="Seconds between runs")
+    args = parser.parse_args(argv)
+
+    from ..database.neo4j_connection import Neo4jConnection
+    conn = Neo4jConnection()
+    store = get_results_store(conn)
+
+    if args.command == "show":
+        for record in store.all():
+            age_min = (time.time() - record['computed_at']) / 60
+            print(f"{record['name']} {record['params']} - {len(record['rows'])} rows, "
+                  f"{record['duration_ms']:.0f} ms, {age_min:.0f} min old")
+        return
+
+    params = None
+    if args.param:
+        if not args.only or len(args.only) != 1:
+            parser.error("--param needs exactly one --only")
+        params = {args.only[0]: _parse_params(args.param)}
+
+    if args.command == "refresh":
+        for status in refresh(conn, store, args.only, params):
+            outcome = f"ERROR {status['error']}" if 'error' in status else \
+                f"{status['rows']} rows in {status['duration_ms']:.0f} ms"
+            print(f"{status['name']:30} {outcome}")
+        return
+
+    scheduler = AnalyticsScheduler(conn, store, args.interval, args.only, params)
+    scheduler.start()
+    print(f"Refreshing {len(args.only or ANALYTICS)} analytics every {args.interval:.0f}s (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        scheduler.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""CSR Projection of the Traveller -> Hotel Graph
+
+Exports (Traveller)-[:WROTE]->(Review)-[:REVIEWED]->(Hotel) as a bipartite
+adjacency in compressed sparse row form, so graph algorithms run in process on
+NumPy arrays instead of as Cypher traversals (see graph_algorithms.py).
+
+Travellers and hotels get dense integer ids 0..n-1. A traveller's hotels are
+indices[indptr[t]:indptr[t + 1]] (sorted), with the number of reviews and their
+average score_overall per edge. Everything is saved as one .npy file per array
+under GRAPH_PROJECTION_DIR:
+
+    traveller_ids.npy  hotel_ids.npy          original user_id / hotel_id per dense id
+    indptr.npy  indices.npy  weights.npy  scores.npy
+    traveller_type.npy  traveller_country.npy  hotel_name.npy  hotel_city.npy  hotel_country.npy
+
+Usage:
+    python -m hotel_assistant.analytics.projection export --source graph
+    python -m hotel_assistant.analytics.projection export --source csv --dataset-dir KnowledgeGraph/Dataset
+"""
+import argparse
+import csv
+import json
+import os
+import time
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+import numpy as np
+
+from ..config import GRAPH_PROJECTION_DIR, KG_DATASET_DIR
+
+EDGES_QUERY = """MATCH (t:Traveller)-[:WROTE]->(r:Review)-[:REVIEWED]->(h:Hotel)
+RETURN t.user_id AS user_id, h.hotel_id AS hotel_id, count(r) AS reviews, avg(r.score_overall) AS score"""
+
+TRAVELLERS_QUERY = """MATCH (t:Traveller)
+OPTIONAL MATCH (t)-[:FROM_COUNTRY]->(c:Country)
+RETURN t.user_id AS user_id, t.type AS traveller_type, c.name AS country"""
+
+HOTELS_QUERY = """MATCH (h:Hotel)
+OPTIONAL MATCH (h)-[:LOCATED_IN]->(c:City)-[:LOCATED_IN]->(k:Country)
+RETURN h.hotel_id AS hotel_id, h.name AS hotel_name, c.name AS city, k.name AS country"""
+
+ARRAYS = ('traveller_ids', 'hotel_ids', 'indptr', 'indices', 'weights', 'scores',
+          'traveller_type', 'traveller_country', 'hotel_name', 'hotel_city', 'hotel_country')
+
+
+def _id_array(values: Iterable[Any]) -> np.ndarray:
+    """int64 ids when every id is numeric (user_id is stored as a string in the KG), else unicode."""
+    values = list(values)
+    try:
+        return np.asarray(values, dtype=np.int64)
+    except (TypeError, ValueError):
+        return np.asarray([str(v) for v in values])
+
+
+def _text_array(values: Iterable[Any]) -> np.ndarray:
+    return np.asarray(['' if v is None else str(v) for v in values])
+
+
+class HotelCSR(NamedTuple):
+    """The same edges with hotels as rows: a hotel's travellers are indices[indptr[h]:indptr[h + 1]]."""
+    indptr: np.ndarray
+    indices: np.ndarray
+    weights: np.ndarray
+    scores: np.ndarray
+
+
+class GraphProjection:
+    """Bipartite traveller -> hotel adjacency in CSR form with dense id maps and node attributes."""
+
+    def __init__(self, traveller_ids: np.ndarray, hotel_ids: np.ndarray, indptr: np.ndarray,
+                 indices: np.ndarray, weights: np.ndarray, scores: np.ndarray,
+                 traveller_type: np.ndarray, traveller_country: np.ndarray,
+                 hotel_name: np.ndarray, hotel_city: np.ndarray, hotel_country: np.ndarray):
+        self.traveller_ids = traveller_ids
+        self.hotel_ids = hotel_ids
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self.scores = scores
+        self.traveller_type = traveller_type
+        self.traveller_country = traveller_country
+        self.hotel_name = hotel_name
+        self.hotel_city = hotel_city
+        self.hotel_country = hotel_country
+        self._hotel_csr: Optional[HotelCSR] = None
+
+    @property
+    def n_travellers(self) -> int:
+        return len(self.traveller_ids)
+
+    @property
+    def n_hotels(self) -> int:
+        return len(self.hotel_ids)
+
+    @property
+    def n_edges(self) -> int:
+        return len(self.indices)
+
+    @classmethod
+    def from_edges(cls, travellers: List[Dict[str, Any]], hotels: List[Dict[str, Any]],
+                   edges: List[Dict[str, Any]]) -> 'GraphProjection':
+        """
+        Build from plain rows.
+
+        Args:
+            travellers: {user_id, traveller_type, country}
+            hotels: {hotel_id, hotel_name, city, country}
+            edges: {user_id, hotel_id, reviews, score}; repeated pairs are merged
+                   (reviews summed, scores averaged by review count)
+        """
+        traveller_ids = _id_array(t['user_id'] for t in travellers)
+        hotel_ids = _id_array(h['hotel_id'] for h in hotels)
+        order_t, order_h = np.argsort(traveller_ids, kind='stable'), np.argsort(hotel_ids, kind='stable')
+        traveller_ids, hotel_ids = traveller_ids[order_t], hotel_ids[order_h]
+        travellers = [travellers[i] for i in order_t]
+        hotels = [hotels[i] for i in order_h]
+
+        edge_users = _id_array(e['user_id'] for e in edges).astype(traveller_ids.dtype)
+        edge_hotels = _id_array(e['hotel_id'] for e in edges).astype(hotel_ids.dtype)
+        reviews = np.asarray([e.get('reviews', 1) for e in edges], dtype=np.float64)
+        score_sums = np.asarray([e.get('score') or 0.0 for e in edges], dtype=np.float64) * reviews
+
+        rows = np.searchsorted(traveller_ids, edge_users)
+        cols = np.searchsorted(hotel_ids, edge_hotels)
+        known = (rows < len(traveller_ids)) & (cols < len(hotel_ids))
+        known[known] = (traveller_ids[rows[known]] == edge_users[known]) & (hotel_ids[cols[known]] == edge_hotels[known])
+
+        # Merge duplicate pairs; np.unique on the flat key also sorts by (row, col)
+        keys = rows[known].astype(np.int64) * len(hotel_ids) + cols[known]
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        weights = np.bincount(inverse, weights=reviews[known], minlength=len(unique_keys))
+        totals = np.bincount(inverse, weights=score_sums[known], minlength=len(unique_keys))
+        edge_rows = unique_keys // max(len(hotel_ids), 1)
+
+        indptr = np.zeros(len(traveller_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(edge_rows, minlength=len(traveller_ids)), out=indptr[1:])
+        return cls(traveller_ids, hotel_ids, indptr,
+                   (unique_keys % max(len(hotel_ids), 1)).astype(np.int32),
+                   weights.astype(np.float32), (totals / np.maximum(weights, 1)).astype(np.float32),
+                   _text_array(t.get('traveller_type') for t in travellers),
+                   _text_array(t.get('country') for t in travellers),
+                   _text_array(h.get('hotel_name') for h in hotels),
+                   _text_array(h.get('city') for h in hotels),
+                   _text_array(h.get('country') for h in hotels))
+
+    @classmethod
+    def from_graph(cls, conn) -> 'GraphProjection':
+        """Project the live KG (three aggregate queries)."""
+        return cls.from_edges(conn.execute_query(TRAVELLERS_QUERY), conn.execute_query(HOTELS_QUERY),
+                              conn.execute_query(EDGES_QUERY))
+
+    @classmethod
+    def from_csv(cls, dataset_dir: str = KG_DATASET_DIR) -> 'GraphProjection':
+        """Project the source CSVs Create_kg.py loads (users.csv, hotels.csv, reviews.csv)."""
+        def rows(name):
+            with open(os.path.join(dataset_dir, name), newline='', encoding='utf-8') as f:
+                yield from csv.DictReader(f)
+
+        travellers = [{'user_id': r['user_id'], 'traveller_type': r['traveller_type'], 'country': r['country']}
+                      for r in rows('users.csv')]
+        hotels = [{'hotel_id': r['hotel_id'], 'hotel_name': r['hotel_name'], 'city': r['city'],
+                   'country': r['country']} for r in rows('hotels.csv')]
+        edges = [{'user_id': r['user_id'], 'hotel_id': r['hotel_id'], 'score': float(r['score_overall'])}
+                 for r in rows('reviews.csv')]
+        return cls.from_edges(travellers, hotels, edges)
+
+    def save(self, directory: str = GRAPH_PROJECTION_DIR):
+        os.makedirs(directory, exist_ok=True)
+        for name in ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name), allow_pickle=False)
+
+    @classmethod
+    def load(cls, directory: str = GRAPH_PROJECTION_DIR, mmap: bool = False) -> 'GraphProjection':
+        """Load a saved projection; mmap=True maps the arrays instead of reading them."""
+        mode = 'r' if mmap else None
+        return cls(**{name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mode, allow_pickle=False)
+                      for name in ARRAYS})
+
+    def traveller_index(self, user_id: Any) -> int:
+        """Dense id of a user_id (KeyError if unknown)."""
+        return self._index(self.traveller_ids, user_id)
+
+    def hotel_index(self, hotel_id: Any) -> int:
+        """Dense id of a hotel_id (KeyError if unknown)."""
+        return self._index(self.hotel_ids, hotel_id)
+
+    def hotel_index_by_name(self, name: str) -> int:
+        matches = np.flatnonzero(np.char.lower(self.hotel_name) == name.lower())
+        if not len(matches):
+            raise KeyError(name)
+        return int(matches[0])
+
+    @staticmethod
+    def _index(ids: np.ndarray, value: Any) -> int:
+        value = _id_array([value]).astype(ids.dtype)[0]
+        position = int(np.searchsorted(ids, value))
+        if position >= len(ids) or ids[position] != value:
+            raise KeyError(value)
+        return position
+
+    def hotels_of(self, traveller: int) -> np.ndarray:
+        return self.indices[self.indptr[traveller]:self.indptr[traveller + 1]]
+
+    def edge_rows(self) -> np.ndarray:
+        """Traveller (row) of every edge, i.e. the COO row array."""
+        return np.repeat(np.arange(self.n_travellers, dtype=np.int32), np.diff(self.indptr))
+
+    def hotel_csr(self) -> HotelCSR:
+        """Hotel -> traveller CSR over the same edges (built once)."""
+        if self._hotel_csr is None:
+            rows = self.edge_rows()
+            order = np.lexsort((rows, self.indices))
+            indptr = np.zeros(self.n_hotels + 1, dtype=np.int64)
+            np.cumsum(np.bincount(self.indices, minlength=self.n_hotels), out=indptr[1:])
+            self._hotel_csr = HotelCSR(indptr, rows[order], self.weights[order], self.scores[order])
+        return self._hotel_csr
+
+    def travellers_of(self, hotel: int) -> np.ndarray:
+        csr = self.hotel_csr()
+        return csr.indices[csr.indptr[hotel]:csr.indptr[hotel + 1]]
+
+    def summary(self) -> Dict[str, Any]:
+        return {'travellers': self.n_travellers, 'hotels': self.n_hotels, 'edges': self.n_edges,
+                'reviews': int(self.weights.sum())}
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Export the traveller -> hotel graph as CSR .npy arrays")
+    parser.add_argument("command", choices=["export", "show"])
+    parser.add_argument("--source", choices=["graph", "csv"], default="graph")
+    parser.add_argument("--dataset-dir", default=KG_DATASET_DIR, help="CSV directory for --source csv")
+    parser.add_argument("--output", default=GRAPH_PROJECTION_DIR)
+    args = parser.parse_args(argv)
+
+    if args.command == "show":
+        print(json.dumps(GraphProjection.load(args.output, mmap=True).summary()))
+        return
+
+    start = time.perf_counter()
+    if args.source == "csv":
+        projection = GraphProjection.from_csv(args.dataset_dir)
+    else:
+        from ..database.neo4j_connection import Neo4jConnection
+        conn = Neo4jConnection()
+        try:
+            projection = GraphProjection.from_graph(conn)
+        finally:
+            conn.close()
+    projection.save(args.output)
+    print(f"Exported {json.dumps(projection.summary())} to {args.output}/ in "
+          f"{(time.perf_counter() - start) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Graph Analytics Queries (Milestone 2 queries.txt and rule.txt, parameterized)
+
+Milestone 2 linked travellers to hotels with STAYED_AT; the Milestone 3 graph
+only has (Traveller)-[:WROTE]->(Review)-[:REVIEWED]->(Hotel), so a stay is a
+review here. Each query is registered in ANALYTICS with its default parameters
+so jobs.refresh() can materialize them all.
+"""
+from typing import Any, Callable, Dict, List
+
+from ..monitoring.tracing import traced
+
+ASPECT_SCORES = {'cleanliness': 'score_cleanliness', 'comfort': 'score_comfort', 'facilities': 'score_facilities',
+                 'location': 'score_location', 'staff': 'score_staff', 'value_for_money': 'score_value_for_money'}
+
+# name -> (function(conn, **params), default params, description)
+ANALYTICS: Dict[str, Dict[str, Any]] = {}
+
+
+def analytic(name: str, description: str, **defaults):
+    """Register an analytics query under `name` with its default parameters."""
+    def decorator(fn: Callable[..., List[Dict[str, Any]]]):
+        traced_fn = traced("analytics.query", analytic=name)(fn)
+        ANALYTICS[name] = {'fn': traced_fn, 'defaults': defaults, 'description': description}
+        return traced_fn
+    return decorator
+
+
+def _aspect_field(aspect: str) -> str:
+    if aspect not in ASPECT_SCORES:
+        raise ValueError(f"Unknown aspect '{aspect}', expected one of {list(ASPECT_SCORES)}")
+    return ASPECT_SCORES[aspect]
+
+
+@analytic("visa_free_travellers", "Travellers who stayed in a country they need no visa for (incl. domestic)")
+def visa_free_traveller_count(conn) -> List[Dict[str, Any]]:
+    query = """MATCH (t:Traveller)-[:FROM_COUNTRY]->(from_country:Country)
+    MATCH (t)-[:WROTE]->(:Review)-[:REVIEWED]->(h:Hotel)-[:LOCATED_IN]->(:City)-[:LOCATED_IN]->(to_country:Country)
+    WHERE from_country = to_country OR NOT (from_country)-[:NEEDS_VISA]->(to_country)
+    RETURN count(DISTINCT t) AS count"""
+    return conn.execute_query(query)
+
+
+@analytic("top_hotels_by_traveller_type", "Hotels with the highest average overall score from one traveller type",
+          traveller_type="Business", limit=3)
+def top_hotels_for_traveller_type(conn, traveller_type: str = "Business", limit: int = 3) -> List[Dict[str, Any]]:
+    query = """MATCH (t:Traveller {type: $traveller_type})-[:WROTE]->(r:Review)-[:REVIEWED]->(h:Hotel)
+    WITH h, avg(r.score_overall) AS avg_rating
+    RETURN h.name AS hotel_name, avg_rating
+    ORDER BY avg_rating DESC LIMIT $limit"""
+    return conn.execute_query(query, {'traveller_type': traveller_type, 'limit': limit})
+
+
+@analytic("travellers_per_hotel", "Distinct travellers of one type per hotel, including hotels with none",
+          traveller_type="Couple")
+def traveller_count_per_hotel(conn, traveller_type: str = "Couple") -> List[Dict[str, Any]]:
+    query = """MATCH (h:Hotel)
+    OPTIONAL MATCH (t:Traveller {type: $traveller_type})-[:WROTE]->(:Review)-[:REVIEWED]->(h)
+    RETURN h.name AS hotel_name, count(DISTINCT t) AS traveller_count
+    ORDER BY h.name"""
+    return conn.execute_query(query, {'traveller_type': traveller_type})
+
+
+@analytic("hotels_below_aspect", "Lowest-scoring hotels whose average aspect score is below a threshold",
+          aspect="cleanliness", threshold=8.8, limit=3)
+def hotels_below_aspect_average(conn, aspect: str = "cleanliness", threshold: float = 8.8,
+                                limit: int = 3) -> List[Dict[str, Any]]:
+    query = f"""MATCH (h:Hotel)<-[:REVIEWED]-(r:Review)
+    WITH h, avg(r.{_aspect_field(aspect)}) AS avg_score
+    WHERE avg_score < $threshold
+    RETURN h.name AS hotel_name, avg_score
+    ORDER BY avg_score ASC LIMIT $limit"""
+    return conn.execute_query(query, {'threshold': threshold, 'limit': limit})
+
+
+@analytic("best_hotels_for_gender", "Hotels with the top average aspect score from one gender (all ties)",
+          aspect="location", gender="Female")
+def best_hotels_for_aspect_by_gender(conn, aspect: str = "location", gender: str = "Female") -> List[Dict[str, Any]]:
+    field = _aspect_field(aspect)
+    query = f"""MATCH (t:Traveller {{gender: $gender}})-[:WROTE]->(r:Review)-[:REVIEWED]->(h:Hotel)
+    WITH h, avg(r.{field}) AS avg_score
+    WITH collect({{hotel: h, score: avg_score}}) AS scored, max(avg_score) AS max_score
+    UNWIND scored AS s
+    WITH s, max_score WHERE s.score = max_score
+    RETURN s.hotel.name AS hotel_name, s.score AS avg_score
+    ORDER BY hotel_name"""
+    return conn.execute_query(query, {'gender': gender})
+
+
+@analytic("exceeds_expectations_by_age", "Exceeds-expectations rule per age group (base vs review scores)",
+          traveller_type="Solo", gender="Female")
+def exceeds_expectations_by_age_group(conn, traveller_type: str = "Solo",
+                                      gender: str = "Female") -> List[Dict[str, Any]]:
+    """
+    A hotel exceeds expectations for an age group when cleanliness_base + comfort_base +
+    facilities_base >= the group's average of the same three review scores.
+    """
+    query = """MATCH (t:Traveller {type: $traveller_type, gender: $gender})-[:WROTE]->(r:Review)-[:REVIEWED]->(h:Hotel)
+    WITH t.age AS age_group, h,
+         h.cleanliness_base + h.comfort_base + h.facilities_base AS base_sum,
+         avg(r.score_cleanliness + r.score_comfort + r.score_facilities) AS review_avg
+    WHERE base_sum >= review_avg
+    WITH age_group, round(((base_sum - review_avg) / review_avg) * 100, 2) AS improvement_percentage
+    RETURN age_group,
+           round(min(improvement_percentage), 1) AS min_improve,
+           round(max(improvement_percentage), 1) AS max_improve,
+           round(avg(improvement_percentage), 2) AS avg_improve,
+           count(*) AS hotels
+    ORDER BY age_group"""
+    return conn.execute_query(query, {'traveller_type': traveller_type, 'gender': gender})
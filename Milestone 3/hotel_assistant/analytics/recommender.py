@@ -0,0 +1,235 @@
+"""Offline Collaborative-Filtering Recommender
+
+Factorizes the traveller x hotel rating matrix (average score_overall per
+reviewed pair, from the CSR projection) with alternating least squares:
+
+    rating ~ global mean + hotel bias + traveller factors . hotel factors
+
+Each ALS half-step solves every row's regularized least squares at once (one
+batched k x k solve per side). A traveller type's taste is the mean of its
+travellers' factors; hotels are ranked by their predicted rating for it within
+each city, and the top-N lists are written to RECOMMENDER_PATH for
+database.cf_recommendations to serve.
+
+Usage:
+    python -m hotel_assistant.analytics.recommender train --source graph
+    python -m hotel_assistant.analytics.recommender train --source projection --factors 16 --holdout 0.1
+    python -m hotel_assistant.analytics.recommender serve-bench
+"""
+import argparse
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from scipy import sparse
+
+from ..config import (KG_DATASET_DIR, RECOMMENDER_FACTORS, RECOMMENDER_ITERATIONS, RECOMMENDER_PATH,
+                      RECOMMENDER_REGULARIZATION, RECOMMENDER_TOP_N)
+from ..database.cf_recommendations import ANY, TopNRecommendations, list_key
+from ..monitoring.stats import summarize
+from .projection import GraphProjection
+
+
+class FactorModel:
+    """Fitted biases and factors; predict() scores (traveller, hotel) pairs."""
+
+    def __init__(self, mean: float, hotel_bias: np.ndarray, traveller_factors: np.ndarray,
+                 hotel_factors: np.ndarray):
+        self.mean = mean
+        self.hotel_bias = hotel_bias
+        self.traveller_factors = traveller_factors
+        self.hotel_factors = hotel_factors
+
+    def predict(self, travellers: np.ndarray, hotels: np.ndarray) -> np.ndarray:
+        return self.mean + self.hotel_bias[hotels] + np.einsum(
+            'ij,ij->i', self.traveller_factors[travellers], self.hotel_factors[hotels])
+
+    def predict_for(self, taste: np.ndarray) -> np.ndarray:
+        """Predicted rating of every hotel for one factor vector (e.g. a traveller type's mean)."""
+        return self.mean + self.hotel_bias + self.hotel_factors @ taste
+
+
+def _row_sums(rows: np.ndarray, values: np.ndarray, n_rows: int) -> np.ndarray:
+    """Sum of `values` (edges x d) per row, as one sparse product."""
+    grouping = sparse.csr_matrix((np.ones(len(rows)), (rows, np.arange(len(rows)))), shape=(n_rows, len(rows)))
+    return np.asarray(grouping @ values)
+
+
+def _solve_side(rows: np.ndarray, cols: np.ndarray, residuals: np.ndarray, fixed: np.ndarray,
+                n_rows: int, regularization: float) -> np.ndarray:
+    """Least-squares factors for every row given the other side's factors (ALS-WR regularization)."""
+    k = fixed.shape[1]
+    other = fixed[cols]
+    gram = _row_sums(rows, (other[:, :, None] * other[:, None, :]).reshape(len(rows), k * k), n_rows)
+    counts = np.bincount(rows, minlength=n_rows)
+    gram = gram.reshape(n_rows, k, k) + (regularization * np.maximum(counts, 1))[:, None, None] * np.eye(k)
+    rhs = _row_sums(rows, other * residuals[:, None], n_rows)
+    return np.linalg.solve(gram, rhs[:, :, None])[:, :, 0]
+
+
+def train(rows: np.ndarray, cols: np.ndarray, ratings: np.ndarray, n_travellers: int, n_hotels: int,
+          factors: int = RECOMMENDER_FACTORS, iterations: int = RECOMMENDER_ITERATIONS,
+          regularization: float = RECOMMENDER_REGULARIZATION, seed: int = 0) -> FactorModel:
+    """
+    Fit on observed (traveller, hotel, rating) triples.
+
+    Hotel biases are shrunk towards 0 by `regularization` x 10 pseudo-ratings, then the
+    residuals are factorized.
+    """
+    mean = float(ratings.mean()) if len(ratings) else 0.0
+    hotel_counts = np.bincount(cols, minlength=n_hotels)
+    hotel_bias = np.bincount(cols, weights=ratings - mean, minlength=n_hotels) / (
+        hotel_counts + regularization * 10)
+    residuals = ratings - mean - hotel_bias[cols]
+
+    rng = np.random.default_rng(seed)
+    hotel_factors = rng.normal(0, 0.1, (n_hotels, factors))
+    traveller_factors = np.zeros((n_travellers, factors))
+    for _ in range(iterations):
+        traveller_factors = _solve_side(rows, cols, residuals, hotel_factors, n_travellers, regularization)
+        hotel_factors = _solve_side(cols, rows, residuals, traveller_factors, n_hotels, regularization)
+    return FactorModel(mean, hotel_bias, traveller_factors, hotel_factors)
+
+
+def rmse(model: FactorModel, rows: np.ndarray, cols: np.ndarray, ratings: np.ndarray) -> float:
+    return float(np.sqrt(np.mean((model.predict(rows, cols) - ratings) ** 2))) if len(ratings) else 0.0
+
+
+def top_n_lists(projection: GraphProjection, model: FactorModel,
+                top_n: int = RECOMMENDER_TOP_N) -> Dict[str, List[Dict[str, Any]]]:
+    """Top-N rows per list_key(traveller type, city), including "*" for either."""
+    active = np.diff(projection.indptr) > 0
+    tastes = {ANY: model.traveller_factors[active].mean(axis=0)}
+    for traveller_type in np.unique(projection.traveller_type[active]):
+        members = active & (projection.traveller_type == traveller_type)
+        tastes[str(traveller_type)] = model.traveller_factors[members].mean(axis=0)
+
+    hotel_degree = np.bincount(projection.indices, weights=projection.weights, minlength=projection.n_hotels)
+    score_sums = np.bincount(projection.indices, weights=projection.scores * projection.weights,
+                             minlength=projection.n_hotels)
+    average = np.divide(score_sums, hotel_degree, out=np.zeros(projection.n_hotels), where=hotel_degree > 0)
+    reviewed = hotel_degree > 0
+    cities = {ANY: reviewed}
+    for city in np.unique(projection.hotel_city[reviewed]):
+        cities[str(city)] = reviewed & (projection.hotel_city == city)
+
+    lists = {}
+    for traveller_type, taste in tastes.items():
+        predicted = model.predict_for(taste)
+        for city, in_city in cities.items():
+            candidates = np.flatnonzero(in_city)
+            ranked = candidates[np.argsort(-predicted[candidates], kind='stable')][:top_n]
+            lists[list_key(traveller_type, city)] = [{
+                'hotel_name': str(projection.hotel_name[h]), 'city_name': str(projection.hotel_city[h]),
+                'country_name': str(projection.hotel_country[h]),
+                'overall_review_score': round(float(average[h]), 2),
+                'predicted_score': round(float(np.clip(predicted[h], 0, 10)), 2),
+                'review_count': int(hotel_degree[h]), 'recommendation_source': 'collaborative_filtering'
+            } for h in ranked]
+    return lists
+
+
+def _holdout_split(n_edges: int, fraction: float, seed: int) -> np.ndarray:
+    return np.random.default_rng(seed).random(n_edges) < fraction
+
+
+def train_and_save(projection: GraphProjection, path: str = RECOMMENDER_PATH, factors: int = RECOMMENDER_FACTORS,
+                   iterations: int = RECOMMENDER_ITERATIONS, regularization: float = RECOMMENDER_REGULARIZATION,
+                   top_n: int = RECOMMENDER_TOP_N, holdout: float = 0.0, seed: int = 0) -> Dict[str, Any]:
+    """
+    Train, write the top-N lists to `path` and return the report (timings, RMSE).
+
+    With holdout > 0 that share of edges is left out of a first fit to report held-out RMSE;
+    the saved lists always come from a fit on every edge.
+    """
+    rows, cols, ratings = projection.edge_rows(), projection.indices, projection.scores.astype(np.float64)
+    params = {'factors': factors, 'iterations': iterations, 'regularization': regularization, 'top_n': top_n}
+    report: Dict[str, Any] = {'params': params, 'data': projection.summary()}
+
+    if holdout > 0:
+        test = _holdout_split(len(ratings), holdout, seed)
+        model = train(rows[~test], cols[~test], ratings[~test], projection.n_travellers, projection.n_hotels,
+                      factors, iterations, regularization, seed)
+        bias_only = FactorModel(model.mean, model.hotel_bias, np.zeros_like(model.traveller_factors),
+                                np.zeros_like(model.hotel_factors))
+        report['holdout'] = {'edges': int(test.sum()), 'rmse': rmse(model, rows[test], cols[test], ratings[test]),
+                             'bias_only_rmse': rmse(bias_only, rows[test], cols[test], ratings[test])}
+
+    start = time.perf_counter()
+    model = train(rows, cols, ratings, projection.n_travellers, projection.n_hotels,
+                  factors, iterations, regularization, seed)
+    report['training_ms'] = (time.perf_counter() - start) * 1000
+    report['train_rmse'] = rmse(model, rows, cols, ratings)
+
+    start = time.perf_counter()
+    lists = top_n_lists(projection, model, top_n)
+    report['precompute_ms'] = (time.perf_counter() - start) * 1000
+    report['lists'] = len(lists)
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump({'trained_at': time.time(), **report, 'lists': lists}, f)
+    os.replace(path + ".tmp", path)
+    return report
+
+
+def serving_latency(path: str = RECOMMENDER_PATH, repeat: int = 1000) -> Dict[str, Any]:
+    """Lookup latency (microseconds) over every stored (traveller type, city) key."""
+    recommendations = TopNRecommendations.load(path)
+    keys = [key.split("|") for key in recommendations.lists]
+    samples = []
+    for i in range(repeat):
+        traveller_type, city = keys[i % len(keys)]
+        start = time.perf_counter()
+        recommendations.lookup(city, traveller_type)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return summarize(samples, percentiles=(50, 95, 99))
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Train the collaborative-filtering recommender")
+    parser.add_argument("command", choices=["train", "serve-bench"])
+    parser.add_argument("--source", choices=["graph", "csv", "projection"], default="graph",
+                        help="Ratings from the KG, the dataset CSVs or a saved GRAPH_PROJECTION_DIR export")
+    parser.add_argument("--dataset-dir", default=KG_DATASET_DIR)
+    parser.add_argument("--output", default=RECOMMENDER_PATH)
+    parser.add_argument("--factors", type=int, default=RECOMMENDER_FACTORS)
+    parser.add_argument("--iterations", type=int, default=RECOMMENDER_ITERATIONS)
+    parser.add_argument("--regularization", type=float, default=RECOMMENDER_REGULARIZATION)
+    parser.add_argument("--top-n", type=int, default=RECOMMENDER_TOP_N)
+    parser.add_argument("--holdout", type=float, default=0.0, help="Share of ratings held out to report RMSE")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve-bench":
+        stats = serving_latency(args.output)
+        print(f"lookup: p50 {stats['p50']:.1f} us, p95 {stats['p95']:.1f} us, p99 {stats['p99']:.1f} us "
+              f"over {stats['count']} lookups")
+        return
+
+    if args.source == "projection":
+        projection = GraphProjection.load()
+    elif args.source == "csv":
+        projection = GraphProjection.from_csv(args.dataset_dir)
+    else:
+        from ..database.neo4j_connection import Neo4jConnection
+        conn = Neo4jConnection()
+        try:
+            projection = GraphProjection.from_graph(conn)
+        finally:
+            conn.close()
+
+    report = train_and_save(projection, args.output, args.factors, args.iterations, args.regularization,
+                            args.top_n, args.holdout)
+    print(f"Trained on {report['data']['edges']} ratings in {report['training_ms']:.0f} ms "
+          f"(train RMSE {report['train_rmse']:.3f}); {report['lists']} top-{args.top_n} lists in "
+          f"{report['precompute_ms']:.0f} ms -> {args.output}")
+    if 'holdout' in report:
+        holdout = report['holdout']
+        print(f"Held-out RMSE {holdout['rmse']:.3f} vs {holdout['bias_only_rmse']:.3f} without factors "
+              f"({holdout['edges']} ratings)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Materialized Analytics Results
+
+Each (analytic, params) result is stored with when it was computed and how long
+the query took, so dashboards read rows from here instead of aggregating over
+the live graph. Two backends:
+
+- FileResultsStore: one JSON file per result under ANALYTICS_STORE_DIR
+- GraphResultsStore: (:AnalyticsResult) nodes in Neo4j, next to the data
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from ..config import ANALYTICS_STORE, ANALYTICS_STORE_DIR
+
+
+def result_key(name: str, params: Dict[str, Any]) -> str:
+    """Stable key for an analytic and its parameters."""
+    raw = json.dumps(params, sort_keys=True, default=str)
+    return f"{name}-{hashlib.sha1(raw.encode('utf-8')).hexdigest()[:10]}"
+
+
+def _record(name: str, params: Dict[str, Any], rows: List[Dict[str, Any]], duration_ms: float) -> Dict[str, Any]:
+    return {'name': name, 'params': params, 'rows': rows, 'computed_at': time.time(), 'duration_ms': duration_ms}
+
+
+class FileResultsStore:
+    """JSON files, written atomically so readers never see a partial result."""
+
+    def __init__(self, directory: str = ANALYTICS_STORE_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def save(self, name: str, params: Dict[str, Any], rows: List[Dict[str, Any]], duration_ms: float) -> Dict[str, Any]:
+        record = _record(name, params, rows, duration_ms)
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(result_key(name, params))
+        with self._lock:
+            with open(path + ".tmp", 'w', encoding='utf-8') as f:
+                json.dump(record, f, default=str)
+            os.replace(path + ".tmp", path)
+        return record
+
+    def get(self, name: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(result_key(name, params)), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def all(self) -> List[Dict[str, Any]]:
+        if not os.path.isdir(self.directory):
+            return []
+        records = []
+        for filename in sorted(os.listdir(self.directory)):
+            if filename.endswith(".json"):
+                with open(os.path.join(self.directory, filename), encoding='utf-8') as f:
+                    records.append(json.load(f))
+        return records
+
+
+class GraphResultsStore:
+    """(:AnalyticsResult {key, name, params, rows, computed_at, duration_ms}) nodes; rows as JSON."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.conn.execute_query(
+            "CREATE CONSTRAINT analytics_result_key IF NOT EXISTS FOR (a:AnalyticsResult) REQUIRE a.key IS UNIQUE")
+
+    def save(self, name: str, params: Dict[str, Any], rows: List[Dict[str, Any]], duration_ms: float) -> Dict[str, Any]:
+        record = _record(name, params, rows, duration_ms)
+        self.conn.execute_query(
+            """MERGE (a:AnalyticsResult {key: $key})
+            SET a.name = $name, a.params = $params, a.rows = $rows, a.computed_at = $computed_at,
+                a.duration_ms = $duration_ms""",
+            {'key': result_key(name, params), 'name': name, 'params': json.dumps(params, default=str),
+             'rows': json.dumps(rows, default=str), 'computed_at': record['computed_at'], 'duration_ms': duration_ms})
+        return record
+
+    @staticmethod
+    def _from_node(row: Dict[str, Any]) -> Dict[str, Any]:
+        return {'name': row['name'], 'params': json.loads(row['params']), 'rows': json.loads(row['rows']),
+                'computed_at': row['computed_at'], 'duration_ms': row['duration_ms']}
+
+    def get(self, name: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        rows = self.conn.execute_query(
+            """MATCH (a:AnalyticsResult {key: $key})
+            RETURN a.name AS name, a.params AS params, a.rows AS rows, a.computed_at AS computed_at,
+                   a.duration_ms AS duration_ms""", {'key': result_key(name, params)})
+        return self._from_node(rows[0]) if rows else None
+
+    def all(self) -> List[Dict[str, Any]]:
+        rows = self.conn.execute_query(
+            """MATCH (a:AnalyticsResult)
+            RETURN a.name AS name, a.params AS params, a.rows AS rows, a.computed_at AS computed_at,
+                   a.duration_ms AS duration_ms ORDER BY a.name""")
+        return [self._from_node(row) for row in rows]
+
+
+def get_results_store(conn=None, backend: str = ANALYTICS_STORE):
+    """Store for the configured backend ("file" or "graph"; graph needs a connection)."""
+    if backend == "graph":
+        if conn is None:
+            raise ValueError("The graph analytics store needs a Neo4j connection")
+        return GraphResultsStore(conn)
+    return FileResultsStore()
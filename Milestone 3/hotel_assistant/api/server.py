@@ -0,0 +1,267 @@
+"""Headless HTTP API for the Hotel Assistant
+
+An asyncio server (standard library only) that exposes the query pipeline as
+JSON so several frontends can share one warm backend: the Neo4j driver pool,
+the intent classifier and the embedding models are loaded once per process.
+
+Endpoints:
+    POST /query    {"query": str, "model": str, "use_rag": bool, "embedding_model": "mpnet" | "minilm"}
+    GET  /health   liveness plus in-flight/queued counts
+    GET  /metrics  Prometheus text format
+
+At most `max_concurrency` queries run at once; up to `max_queue` more wait for
+a slot and anything beyond that is rejected with 503 so clients can back off.
+A query that times out (504) keeps its slot until the pipeline call returns.
+
+Usage:
+    python -m hotel_assistant.api.server --port 8000 --max-concurrency 8 --max-queue 32
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+from ..config import (API_HOST, API_PORT, API_MAX_CONCURRENCY, API_MAX_QUEUE, API_REQUEST_TIMEOUT_S,
+                      AVAILABLE_MODELS, DEFAULT_LLM_MODEL)
+from ..monitoring.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_BYTES = 64 * 1024
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               413: "Payload Too Large", 503: "Service Unavailable", 504: "Gateway Timeout",
+               500: "Internal Server Error"}
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class AssistantAPI:
+    """Routes requests to a shared QueryPipeline with bounded concurrency and queueing."""
+
+    def __init__(self, pipeline, max_concurrency: int = API_MAX_CONCURRENCY, max_queue: int = API_MAX_QUEUE,
+                 request_timeout: float = API_REQUEST_TIMEOUT_S):
+        self.pipeline = pipeline
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.request_timeout = request_timeout
+        # Blocking pipeline calls run here, one thread per concurrent query
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="api-query")
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+        self.queued = 0
+        self.rejected = 0
+        self.started_at = time.time()
+
+    async def handle_query(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        query = payload.get("query")
+        if not isinstance(query, str) or not query.strip():
+            raise HttpError(400, "'query' must be a non-empty string")
+        model = payload.get("model", DEFAULT_LLM_MODEL)
+        if model not in AVAILABLE_MODELS:
+            raise HttpError(400, f"'model' must be one of {AVAILABLE_MODELS}")
+        embedding_model = payload.get("embedding_model", "mpnet")
+        if embedding_model not in ("mpnet", "minilm"):
+            raise HttpError(400, "'embedding_model' must be 'mpnet' or 'minilm'")
+        use_rag = payload.get("use_rag", True)
+        if not isinstance(use_rag, bool):
+            raise HttpError(400, "'use_rag' must be true or false")
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        if self._slots.locked() and self.queued >= self.max_queue:
+            self.rejected += 1
+            raise HttpError(503, "Server busy, retry later")
+
+        self.queued += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+        self.in_flight += 1
+        loop = asyncio.get_running_loop()
+        try:
+            future = self._executor.submit(self.pipeline.process, query, use_rag=use_rag, model=model,
+                                           embedding_model=embedding_model)
+        except BaseException:
+            self._finish()
+            raise
+        # The slot is held until the pipeline call returns, not until the client gets its 504:
+        # a timed-out query keeps its executor thread, so admission must keep counting it
+        future.add_done_callback(lambda _: self._call_soon(loop, self._finish))
+        try:
+            result = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)),
+                                            timeout=self.request_timeout)
+        except asyncio.TimeoutError:
+            raise HttpError(504, f"Query did not finish within {self.request_timeout:.0f}s")
+
+        # The UI-only trace waterfall is large; API clients get the stage timings instead
+        result.pop('trace', None)
+        return result
+
+    def _finish(self):
+        self.in_flight -= 1
+        self._slots.release()
+
+    @staticmethod
+    def _call_soon(loop: asyncio.AbstractEventLoop, callback):
+        try:
+            loop.call_soon_threadsafe(callback)
+        except RuntimeError:  # the loop has been closed (server shut down)
+            pass
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            'status': 'ok',
+            'uptime_s': round(time.time() - self.started_at, 1),
+            'in_flight': self.in_flight,
+            'queued': self.queued,
+            'rejected': self.rejected,
+            'max_concurrency': self.max_concurrency,
+            'max_queue': self.max_queue
+        }
+
+    async def route(self, method: str, path: str, body: bytes) -> Tuple[int, str, bytes]:
+        """Return (status, content type, body) for one request."""
+        path = path.split("?")[0].rstrip("/") or "/"
+        if path == "/health":
+            if method != "GET":
+                raise HttpError(405, "Use GET")
+            return 200, "application/json", _json(self.health())
+        if path == "/metrics":
+            if method != "GET":
+                raise HttpError(405, "Use GET")
+            return 200, "text/plain; version=0.0.4; charset=utf-8", REGISTRY.render_prometheus().encode("utf-8")
+        if path == "/query":
+            if method != "POST":
+                raise HttpError(405, "Use POST")
+            try:
+                payload = json.loads(body or b"{}")
+            except json.JSONDecodeError as e:
+                raise HttpError(400, f"Invalid JSON body: {e}")
+            if not isinstance(payload, dict):
+                raise HttpError(400, "Body must be a JSON object")
+            result = await self.handle_query(payload)
+            return 200, "application/json", _json(result)
+        raise HttpError(404, f"Unknown path {path}")
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve HTTP/1.1 requests on one connection until the client closes it."""
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                try:
+                    status, content_type, payload = await self.route(method, path, body)
+                except HttpError as e:
+                    status, content_type, payload = e.status, "application/json", _json({'error': str(e)})
+                except Exception as e:
+                    logger.exception("Unhandled error for %s %s", method, path)
+                    status, content_type, payload = 500, "application/json", _json({'error': str(e)})
+
+                keep_alive = headers.get("connection", "").lower() != "close"
+                extra = "Retry-After: 1\r\n" if status == 503 else ""
+                writer.write((f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                              f"Content-Type: {content_type}\r\n"
+                              f"Content-Length: {len(payload)}\r\n"
+                              f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                              f"{extra}\r\n").encode("latin-1") + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except HttpError as e:
+            body = _json({'error': str(e)})
+            writer.write(f"HTTP/1.1 {e.status} {STATUS_TEXT.get(e.status, '')}\r\nContent-Type: application/json\r\n"
+                         f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+
+async def _read_request(reader: asyncio.StreamReader):
+    """Parse one request; None when the connection closed cleanly."""
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, path, _version = request_line.decode("latin-1").split()
+    except ValueError:
+        raise HttpError(400, "Malformed request line")
+
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length", 0) or 0)
+    except ValueError:
+        raise HttpError(400, "Malformed Content-Length")
+    if length < 0:
+        raise HttpError(400, "Negative Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise HttpError(413, f"Body larger than {MAX_BODY_BYTES} bytes")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), path, headers, body
+
+
+def _json(payload: Any) -> bytes:
+    # Neo4j results can contain dates/points; fall back to their string form
+    return json.dumps(payload, default=str).encode("utf-8")
+
+
+async def serve(api: AssistantAPI, host: str = API_HOST, port: int = API_PORT):
+    server = await asyncio.start_server(api.handle_connection, host, port)
+    addresses = ", ".join(f"http://{s.getsockname()[0]}:{s.getsockname()[1]}" for s in server.sockets)
+    print(f"Hotel Assistant API listening on {addresses}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless HTTP API for the Hotel Assistant")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    parser.add_argument("--max-concurrency", type=int, default=API_MAX_CONCURRENCY)
+    parser.add_argument("--max-queue", type=int, default=API_MAX_QUEUE)
+    parser.add_argument("--request-timeout", type=float, default=API_REQUEST_TIMEOUT_S)
+    parser.add_argument("--warm", action="store_true", help="Load both embedding models before serving")
+    args = parser.parse_args()
+
+    from ..pipeline.query_pipeline import create_query_pipeline
+    pipeline = create_query_pipeline()
+    if args.warm:
+        from ..nlp.embeddings import get_embedder_minilm, get_embedder_mpnet
+        get_embedder_minilm()
+        get_embedder_mpnet()
+
+    api = AssistantAPI(pipeline, args.max_concurrency, args.max_queue, args.request_timeout)
+    try:
+        asyncio.run(serve(api, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        api.close()
+
+
+if __name__ == "__main__":
+    main()
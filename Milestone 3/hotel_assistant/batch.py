@@ -0,0 +1,193 @@
+"""Batch Query Runner
+
+Answers a file of queries offline through the full pipeline and streams one
+JSON line per query to the output file. Queries whose key is already in the
+output with a successful result are skipped, so an interrupted run can simply
+be restarted.
+
+Usage:
+    python -m hotel_assistant.batch Test_Cases --output results.jsonl --concurrency 4 --rate 2
+    python -m hotel_assistant.batch questions.txt --output results.jsonl --model gpt-4o --no-rag
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Set
+
+from .config import AVAILABLE_MODELS, DEFAULT_LLM_MODEL
+from .llm.gateway import TokenBucket
+from .monitoring.stats import summarize
+from .query_sets import load_queries
+
+
+def query_key(record: Dict[str, Any], model: str, use_rag: bool, embedding_model: str) -> str:
+    """
+    Stable key for resume: the record's 'id' (else a hash of the query) plus a hash of the settings,
+    so re-running the same input with another model or RAG setting into the same output is not skipped.
+    """
+    settings = hashlib.sha1(json.dumps([model, use_rag, embedding_model]).encode('utf-8')).hexdigest()[:8]
+    if record.get('id') is not None:
+        return f"{record['id']}@{settings}"
+    raw = json.dumps([record['query'], model, use_rag, embedding_model])
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+
+def completed_keys(output_path: str) -> Set[str]:
+    """Keys that already have a successful result in the output file."""
+    done: Set[str] = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                # A run killed mid-write can leave a truncated last line
+                continue
+            if row.get('success'):
+                done.add(row['key'])
+    return done
+
+
+def _result_row(key: str, record: Dict[str, Any], result: Dict[str, Any], latency_ms: float) -> Dict[str, Any]:
+    llm = result.get('llm_response') or {}
+    row = {
+        'key': key,
+        **{k: v for k, v in record.items() if k != 'key'},
+        'success': bool(result.get('success') and llm.get('success')),
+        'intent': result.get('intent'),
+        'entities': result.get('entities'),
+        'cypher_results': result.get('cypher_results'),
+        'embedding_results': result.get('embedding_results'),
+        'answer': llm.get('response'),
+        'llm_metadata': llm.get('metadata'),
+        'timings_ms': result.get('timings'),
+        'latency_ms': latency_ms
+    }
+    error = result.get('error') or (llm.get('error') if not llm.get('success') else None)
+    if error:
+        row['error'] = error
+    return row
+
+
+def run_batch(
+    records: List[Dict[str, Any]],
+    output_path: str,
+    pipeline=None,
+    concurrency: int = 4,
+    rate_per_second: float = 0.0,
+    model: str = DEFAULT_LLM_MODEL,
+    use_rag: bool = True,
+    embedding_model: str = "mpnet",
+    resume: bool = True,
+    progress: bool = True
+) -> Dict[str, Any]:
+    """
+    Run queries through the pipeline and append results to output_path as JSONL.
+
+    Args:
+        records: Dicts with a 'query' key (see query_sets.load_queries)
+        output_path: JSONL file results are appended to
+        pipeline: QueryPipeline (created with a new Neo4j connection if None)
+        concurrency: Queries in flight at once
+        rate_per_second: Max queries started per second (0 = unlimited)
+        resume: Skip queries already answered successfully in output_path
+
+    Returns:
+        Throughput report: totals, skipped, errors, wall time, queries/s and latency stats
+    """
+    if pipeline is None:
+        from .pipeline.query_pipeline import create_query_pipeline
+        pipeline = create_query_pipeline()
+
+    done = completed_keys(output_path) if resume else set()
+    todo = []
+    for record in records:
+        key = query_key(record, model, use_rag, embedding_model)
+        if key not in done:
+            todo.append((key, record))
+            done.add(key)  # also drops duplicates within the input
+    skipped = len(records) - len(todo)
+
+    bucket = TokenBucket(rate_per_second, max(1.0, rate_per_second)) if rate_per_second > 0 else None
+    latencies: List[float] = []
+    intents: Dict[str, int] = {}
+    errors = 0
+
+    def answer(key: str, record: Dict[str, Any]) -> Dict[str, Any]:
+        if bucket is not None:
+            bucket.acquire()
+        start = time.perf_counter()
+        try:
+            result = pipeline.process(record['query'], use_rag=use_rag, model=model, embedding_model=embedding_model)
+        except Exception as e:
+            result = {'success': False, 'error': str(e)}
+        return _result_row(key, record, result, (time.perf_counter() - start) * 1000)
+
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    start = time.perf_counter()
+    with open(output_path, 'a', encoding='utf-8') as out, \
+            ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="batch") as pool:
+        futures = [pool.submit(answer, key, record) for key, record in todo]
+        for finished, future in enumerate(as_completed(futures), 1):
+            row = future.result()
+            # Written as each query finishes, so a crash loses at most the in-flight queries
+            out.write(json.dumps(row, default=str) + "\n")
+            out.flush()
+            latencies.append(row['latency_ms'])
+            intents[row['intent'] or 'NONE'] = intents.get(row['intent'] or 'NONE', 0) + 1
+            errors += 0 if row['success'] else 1
+            if progress:
+                print(f"[{finished}/{len(todo)}] {row['intent'] or 'NONE':16} "
+                      f"{row['latency_ms']:7.0f} ms  {'ok' if row['success'] else 'ERROR'}  {row['query'][:60]}")
+    wall_time_s = time.perf_counter() - start
+
+    return {
+        'total': len(records),
+        'processed': len(todo),
+        'skipped': skipped,
+        'errors': errors,
+        'wall_time_s': wall_time_s,
+        'queries_per_second': len(todo) / wall_time_s if wall_time_s > 0 and todo else 0.0,
+        'latency_ms': summarize(latencies),
+        'intents': intents
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Answer a file of queries through the full pipeline")
+    parser.add_argument("input", help="Queries: .txt (one per line), .jsonl ({'query': ...}) or Test_Cases")
+    parser.add_argument("--output", "-o", default="batch_results.jsonl", help="JSONL file to append results to")
+    parser.add_argument("--concurrency", "-c", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=0.0, help="Max queries started per second (0 = unlimited)")
+    parser.add_argument("--model", default=DEFAULT_LLM_MODEL, choices=AVAILABLE_MODELS)
+    parser.add_argument("--embedding-model", default="mpnet", choices=["mpnet", "minilm"])
+    parser.add_argument("--no-rag", action="store_true", help="Skip semantic search")
+    parser.add_argument("--no-resume", action="store_true", help="Re-run queries already in the output")
+    parser.add_argument("--limit", type=int, default=None, help="Only the first N queries")
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args(argv)
+
+    records = load_queries(args.input)[:args.limit]
+    report = run_batch(records, args.output, concurrency=args.concurrency, rate_per_second=args.rate,
+                       model=args.model, use_rag=not args.no_rag, embedding_model=args.embedding_model,
+                       resume=not args.no_resume, progress=not args.quiet)
+
+    latency = report['latency_ms']
+    print("=" * 80)
+    print(f"Processed {report['processed']} / {report['total']} queries "
+          f"({report['skipped']} already done, {report['errors']} errors) in {report['wall_time_s']:.1f}s")
+    print(f"Throughput: {report['queries_per_second']:.2f} queries/s")
+    if latency['count']:
+        print(f"Latency: p50 {latency['p50']:.0f} ms | p95 {latency['p95']:.0f} ms | max {latency['max']:.0f} ms")
+    print(f"Results: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -15,7 +15,9 @@ REQUIRED_PACKAGES = {
     'transformers': 'transformers',
     'torch': 'torch',
     'pandas': 'pandas',
-    'numpy': 'numpy'
+    'numpy': 'numpy',
+    'scipy': 'scipy',
+    'sklearn': 'scikit-learn'
 }
 
 def check_package(package_name, install_name=None):
@@ -71,6 +73,7 @@ def verify_hotel_assistant_modules():
         ('hotel_assistant.llm.prompt_engine', 'PromptEngine'),
         ('hotel_assistant.llm.context_builder', 'ContextBuilder'),
         ('hotel_assistant.llm.result_merger', 'merge_and_rank_results'),
+        ('hotel_assistant.llm.llm_client', 'get_llm_client'),
         ('hotel_assistant.llm.llm_layer', 'llm_layer')
     ]
 
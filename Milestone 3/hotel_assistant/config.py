@@ -8,8 +8,53 @@ load_dotenv()
 # OpenAI API Configuration
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
+# LLM Client Settings
+# LLM_CLIENT_MODE: "live" (OpenAI), "stub" (in-process, no network),
+# "record" (live + save responses) or "replay" (serve saved responses)
+LLM_CLIENT_MODE = os.getenv("LLM_CLIENT_MODE", "live")
+LLM_BASE_URL = os.getenv("LLM_BASE_URL")  # e.g. http://127.0.0.1:8088/v1 for the local stub server
+LLM_CASSETTE_DIR = os.getenv("LLM_CASSETTE_DIR", "llm_cassettes")
+
+# Stub LLM latency model (stub mode and stub server)
+STUB_LLM_TTFT_MS = float(os.getenv("STUB_LLM_TTFT_MS", "300"))
+STUB_LLM_TTFT_SIGMA = float(os.getenv("STUB_LLM_TTFT_SIGMA", "0.3"))
+STUB_LLM_TOKENS_PER_SECOND = float(os.getenv("STUB_LLM_TOKENS_PER_SECOND", "80"))
+STUB_LLM_COMPLETION_TOKENS = int(os.getenv("STUB_LLM_COMPLETION_TOKENS", "150"))
+
+# LLM Gateway Settings
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "8"))  # concurrent requests per model
+LLM_MAX_IN_FLIGHT_PER_MODEL = {"gpt-4-turbo": 4}  # per-model overrides
+LLM_RATE_LIMIT_RPS = float(os.getenv("LLM_RATE_LIMIT_RPS", "10"))  # requests per second per model
+LLM_RATE_LIMIT_BURST = int(os.getenv("LLM_RATE_LIMIT_BURST", "20"))
+LLM_REQUEST_TIMEOUT_S = float(os.getenv("LLM_REQUEST_TIMEOUT_S", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_BACKOFF_BASE_S = 0.5
+LLM_BACKOFF_MAX_S = 8.0
+LLM_QUEUE_TIMEOUT_S = float(os.getenv("LLM_QUEUE_TIMEOUT_S", "60"))
+
 # Neo4j Configuration
 NEO4J_CONFIG_PATH = os.getenv("NEO4J_CONFIG_PATH", "KnowledgeGraph/config.txt")
+KG_DATASET_DIR = os.getenv("KG_DATASET_DIR", os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "KnowledgeGraph", "Dataset"))
+
+# Speculative fallback templates (R4 -> R3): "adaptive", "always" or "off"
+SPECULATIVE_FALLBACKS = os.getenv("SPECULATIVE_FALLBACKS", "adaptive")
+SPECULATIVE_FALLBACK_MIN_RATE = float(os.getenv("SPECULATIVE_FALLBACK_MIN_RATE", "0.2"))  # adaptive threshold
+SPECULATIVE_FALLBACK_WINDOW = 200  # recent calls per template the fallback rate is computed over
+SPECULATIVE_MAX_WORKERS = int(os.getenv("SPECULATIVE_MAX_WORKERS", "8"))
+
+# Visa Matrix (CHECK_VISA answered in process)
+VISA_MATRIX_SOURCE = os.getenv("VISA_MATRIX_SOURCE", "graph")  # "graph" (falls back to the CSVs) or "csv"
+VISA_MATRIX_MAX_AGE_S = float(os.getenv("VISA_MATRIX_MAX_AGE_S", "3600"))
+
+# Keyset pagination (list templates L1-L5, recommend templates R1/R5)
+LIST_PAGE_SIZE = int(os.getenv("LIST_PAGE_SIZE", "50"))
+RECOMMEND_PAGE_SIZE = int(os.getenv("RECOMMEND_PAGE_SIZE", "10"))
+
+# "Near X" searches (database.geo_index, templates L6/R6)
+GEO_DEFAULT_RADIUS_KM = 10.0  # LIST_HOTELS radius when the query gives none
+GEO_NEAREST_K = 5  # hotels RECOMMEND_HOTEL returns for a location
+GEO_NEAREST_MAX_KM = 100.0  # ...at most this far away unless the query gives a radius
 
 # Model Settings
 DEFAULT_LLM_MODEL = "gpt-4o-mini"
@@ -30,10 +75,107 @@ AVAILABLE_EMBEDDING_MODELS = {
 DEFAULT_TOP_K = 5
 DEFAULT_SIMILARITY_THRESHOLD = 0.65
 
+# Retrieval Planner: reviews fetched per intent when its KG template applies
+# (LIST_HOTELS and CHECK_VISA skip semantic search)
+RAG_TOP_K_BY_INTENT = {
+    "RECOMMEND_HOTEL": 5,
+    "DESCRIBE_HOTEL": 5,
+    "COMPARE_HOTELS": 6
+}
+RAG_TOP_K_WITHOUT_KG = 8  # reviews are the only evidence
+
 # LLM Settings
 DEFAULT_TEMPERATURE = 0.0
 DEFAULT_MAX_TOKENS = 1000
 
+# Context Token Budgets (per intent)
+CONTEXT_TOKEN_BUDGETS = {
+    "LIST_HOTELS": 600,
+    "RECOMMEND_HOTEL": 1200,
+    "DESCRIBE_HOTEL": 1000,
+    "COMPARE_HOTELS": 900,
+    "CHECK_VISA": 200
+}
+DEFAULT_CONTEXT_TOKEN_BUDGET = 800
+
+# Conversation History (Streamlit session)
+CONVERSATION_PAGE_SIZE = 10  # turns rendered per page, newest page first
+CONVERSATION_PAYLOAD_CACHE_SIZE = 20  # turns whose KG rows/RAG hits/trace are kept for the details view
+
+# Pipeline Settings
+PIPELINE_MAX_WORKERS = int(os.getenv("PIPELINE_MAX_WORKERS", "16"))
+PIPELINE_STAGE_TIMEOUTS_S = {
+    "classify": 20.0,
+    "extract": 20.0,
+    "cypher": 15.0,
+    "vector_search": 10.0,
+    "llm": 90.0
+}
+
+# Request Latency Budget (0 disables degradation)
+REQUEST_LATENCY_BUDGET_MS = float(os.getenv("REQUEST_LATENCY_BUDGET_MS", "20000"))
+LATENCY_BUDGET_SHARES = {  # stage timeout = share x budget; the LLM gets what is left
+    "cypher": 0.15,
+    "vector_search": 0.20
+}
+LLM_MIN_BUDGET_MS = {  # below this remaining budget the model is not tried
+    "gpt-4o-mini": 2000,
+    "gpt-4o": 4000,
+    "gpt-4-turbo": 6000
+}
+BUDGET_FALLBACK_MODEL = "gpt-4o-mini"
+KG_FALLBACK_CACHE_SIZE = 256  # last good Cypher rows kept per (intent, entities)
+
+# Graph Analytics (materialized Milestone 2 queries)
+ANALYTICS_STORE = os.getenv("ANALYTICS_STORE", "file")  # "file" or "graph" (AnalyticsResult nodes)
+ANALYTICS_STORE_DIR = os.getenv("ANALYTICS_STORE_DIR", "analytics_results")
+ANALYTICS_REFRESH_INTERVAL_S = float(os.getenv("ANALYTICS_REFRESH_INTERVAL_S", "3600"))
+GRAPH_PROJECTION_DIR = os.getenv("GRAPH_PROJECTION_DIR", "graph_projection")  # CSR .npy export (analytics.projection)
+
+# Collaborative-Filtering Recommender (analytics.recommender trains, database.cf_recommendations serves)
+RECOMMENDER_ENABLED = os.getenv("RECOMMENDER_ENABLED", "1") != "0"
+RECOMMENDER_PATH = os.getenv("RECOMMENDER_PATH", "recommendations/top_n.json")
+RECOMMENDER_FACTORS = 16
+RECOMMENDER_ITERATIONS = 15
+RECOMMENDER_REGULARIZATION = 0.1
+RECOMMENDER_TOP_N = 10
+
+# Review Feature Matrix (analytics.features, the Milestone 1 preprocessing)
+FEATURE_CACHE_DIR = os.getenv("FEATURE_CACHE_DIR", "feature_cache")
+FEATURE_CHUNK_ROWS = int(os.getenv("FEATURE_CHUNK_ROWS", "100000"))  # reviews.csv rows read at a time
+
+# Country-Group Classifier (analytics.country_group_model trains, analytics.country_group_serving serves)
+COUNTRY_GROUP_MODEL = os.getenv("COUNTRY_GROUP_MODEL", "random_forest")  # or "logistic_regression"
+COUNTRY_GROUP_MODEL_PATH = os.getenv("COUNTRY_GROUP_MODEL_PATH", "models/country_group.joblib")
+COUNTRY_GROUP_BATCH_SIZE = int(os.getenv("COUNTRY_GROUP_BATCH_SIZE", "64"))  # rows per micro-batch
+COUNTRY_GROUP_BATCH_WAIT_MS = float(os.getenv("COUNTRY_GROUP_BATCH_WAIT_MS", "2"))  # wait for more rows
+
+# Tracing (one JSON line per query; set TRACE_FILE= to disable export)
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "1") != "0"
+TRACE_FILE = os.getenv("TRACE_FILE", "traces/traces.jsonl")
+
+# Metrics endpoint (Prometheus text format, localhost only)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+
+# HTTP API Server
+API_HOST = os.getenv("API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("API_PORT", "8000"))
+API_MAX_CONCURRENCY = int(os.getenv("API_MAX_CONCURRENCY", "8"))  # queries processed at once
+API_MAX_QUEUE = int(os.getenv("API_MAX_QUEUE", "32"))  # waiting queries before 503
+API_REQUEST_TIMEOUT_S = float(os.getenv("API_REQUEST_TIMEOUT_S", "120"))
+
+# Benchmarks
+BENCHMARK_BASELINE_PATH = os.getenv("BENCHMARK_BASELINE_PATH", "benchmarks/baseline.json")
+BENCHMARK_REGRESSION_THRESHOLD = float(os.getenv("BENCHMARK_REGRESSION_THRESHOLD", "0.20"))  # +20% p50/p95
+PLAN_BASELINE_PATH = os.getenv("PLAN_BASELINE_PATH", "benchmarks/plan_baseline.json")
+PLAN_DB_HITS_THRESHOLD = float(os.getenv("PLAN_DB_HITS_THRESHOLD", "0.50"))  # +50% db hits per template
+
+# Start-up budgets (benchmarks.startup_profile)
+STARTUP_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "1000"))  # process spawn + start-up imports
+FIRST_REQUEST_BUDGET_MS = float(os.getenv("FIRST_REQUEST_BUDGET_MS", "500"))  # RAG off, stub LLM, stand-in graph
+
 # Available Models for Comparison
 AVAILABLE_MODELS = ["gpt-4o-mini", "gpt-4o", "gpt-4-turbo"]
 
@@ -0,0 +1,128 @@
+"""Compact Conversation State
+
+Each chat turn is kept as a small record (query, answer, intent, entities,
+counts and a few metadata numbers). The bulky parts of a result - KG rows, RAG
+hits and the trace - go into a bounded LRU side store and are only read when
+the user opens a turn's details, so session memory stays flat however long the
+conversation gets.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import CONVERSATION_PAYLOAD_CACHE_SIZE, CONVERSATION_PAGE_SIZE
+
+SUMMARY_METADATA_KEYS = ('tokens_used', 'cached_tokens', 'context_tokens', 'context_token_budget',
+                         'context_tokens_saved', 'latency_ms', 'degradations')
+
+
+class PayloadStore:
+    """Bounded LRU map from turn id to its detailed payload."""
+
+    def __init__(self, max_entries: int = CONVERSATION_PAYLOAD_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._items: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, turn_id: int, payload: Dict[str, Any]):
+        with self._lock:
+            self._items[turn_id] = payload
+            self._items.move_to_end(turn_id)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def get(self, turn_id: int) -> Optional[Dict[str, Any]]:
+        """Payload for a turn, or None once it has been evicted."""
+        with self._lock:
+            payload = self._items.get(turn_id)
+            if payload is not None:
+                self._items.move_to_end(turn_id)
+            return payload
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+def compact_turn(turn_id: int, query: str, result: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Split a pipeline result into (compact turn record, detailed payload).
+
+    The record has everything needed to render the chat bubble and the details
+    summary line; the payload holds KG rows, RAG hits and the trace.
+    """
+    llm = result.get('llm_response') or {}
+    metadata = llm.get('metadata') or {}
+    success = bool(result.get('success') and llm.get('success'))
+    turn = {
+        'id': turn_id,
+        'query': query,
+        'success': success,
+        'answer': llm.get('response') if success else None,
+        'error': None if success else (result.get('error') or llm.get('error') or 'Unknown'),
+        'intent': result.get('intent'),
+        'entities': result.get('entities'),
+        'kg_count': len(result.get('cypher_results') or []),
+        'rag_count': len(result.get('embedding_results') or []),
+        'metadata': {k: metadata.get(k) for k in SUMMARY_METADATA_KEYS if k in metadata},
+        'total_ms': (result.get('timings') or {}).get('total')
+    }
+    payload = {
+        'cypher_results': result.get('cypher_results') or [],
+        'next_cursor': result.get('next_cursor'),
+        'embedding_results': result.get('embedding_results') or [],
+        'trace': result.get('trace')
+    }
+    return turn, payload
+
+
+class ConversationHistory:
+    """Compact turns plus the payload side store, with newest-first paging."""
+
+    def __init__(self, page_size: int = CONVERSATION_PAGE_SIZE,
+                 payload_cache_size: int = CONVERSATION_PAYLOAD_CACHE_SIZE):
+        self.page_size = page_size
+        self.turns: List[Dict[str, Any]] = []
+        self.payloads = PayloadStore(payload_cache_size)
+        self._next_id = 0
+
+    def add(self, query: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        turn, payload = compact_turn(self._next_id, query, result)
+        self._next_id += 1
+        self.turns.append(turn)
+        if turn['success']:
+            self.payloads.put(turn['id'], payload)
+        return turn
+
+    def details(self, turn_id: int) -> Optional[Dict[str, Any]]:
+        return self.payloads.get(turn_id)
+
+    def extend_results(self, turn_id: int, rows: List[Dict[str, Any]], next_cursor: Optional[str]) -> bool:
+        """Append a further page of KG rows to a turn; False if its payload has been evicted."""
+        payload = self.payloads.get(turn_id)
+        if payload is None:
+            return False
+        payload['cypher_results'] = payload['cypher_results'] + list(rows)
+        payload['next_cursor'] = next_cursor
+        for turn in self.turns:
+            if turn['id'] == turn_id:
+                turn['kg_count'] = len(payload['cypher_results'])
+        return True
+
+    def page_count(self) -> int:
+        return max(1, -(-len(self.turns) // self.page_size))
+
+    def page(self, index: int = 0) -> List[Dict[str, Any]]:
+        """Turns of a page in chronological order; page 0 is the most recent."""
+        end = len(self.turns) - index * self.page_size
+        return self.turns[max(0, end - self.page_size):max(0, end)]
+
+    def clear(self):
+        self.turns = []
+        self.payloads.clear()
+
+    def __len__(self):
+        return len(self.turns)
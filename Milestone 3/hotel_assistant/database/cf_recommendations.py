@@ -0,0 +1,85 @@
+"""Precomputed Collaborative-Filtering Recommendations
+
+analytics/recommender.py trains offline and writes the top-N hotels per
+(traveller type, city) to RECOMMENDER_PATH; this module serves them with a
+dict lookup, so personalized RECOMMEND_HOTEL answers cost no graph query.
+"*" stands for any traveller type or any city.
+
+Rows have the keys of template R1 plus predicted_score, so the context builder
+and UI treat them like any other recommendation. The file is read on first use;
+call reload_recommendations() after retraining.
+"""
+import json
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from ..config import RECOMMENDER_ENABLED, RECOMMENDER_PATH
+from ..monitoring.metrics import CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+ANY = "*"
+
+
+def list_key(traveller_type: Optional[str], city: Optional[str]) -> str:
+    return f"{(traveller_type or ANY).casefold()}|{(city or ANY).casefold()}"
+
+
+class TopNRecommendations:
+    """Top-N lists keyed by list_key(traveller_type, city)."""
+
+    def __init__(self, lists: Dict[str, List[Dict[str, Any]]], meta: Optional[Dict[str, Any]] = None):
+        self.lists = lists
+        self.meta = meta or {}
+
+    @classmethod
+    def load(cls, path: str = RECOMMENDER_PATH) -> 'TopNRecommendations':
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        lists = data.pop('lists')
+        return cls(lists, data)
+
+    def lookup(self, city: Optional[str], traveller_type: Optional[str] = None,
+               limit: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+        """Copies of the precomputed rows, or None when nothing was precomputed for the pair."""
+        rows = self.lists.get(list_key(traveller_type, city))
+        if rows is None:
+            return None
+        return [dict(row) for row in rows[:limit]]
+
+
+_recommendations: Optional[TopNRecommendations] = None
+_loaded = False
+_lock = threading.Lock()
+
+
+def reload_recommendations(path: str = RECOMMENDER_PATH) -> Optional[TopNRecommendations]:
+    """(Re)read the lists; None when no training run has written them yet."""
+    global _recommendations, _loaded
+    try:
+        recommendations = TopNRecommendations.load(path)
+    except (OSError, ValueError, KeyError) as e:
+        logger.info("No collaborative-filtering recommendations at %s: %s", path, e)
+        recommendations = None
+    with _lock:
+        _recommendations, _loaded = recommendations, True
+    return recommendations
+
+
+def get_recommendations() -> Optional[TopNRecommendations]:
+    """Shared lists, read on first use (a concurrent first read just loads the file twice)."""
+    if not _loaded:
+        reload_recommendations()
+    return _recommendations
+
+
+def recommend(city: Optional[str], traveller_type: Optional[str],
+              limit: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+    """Personalized top-N for a traveller type in a city, or None to fall back to the KG templates."""
+    if not RECOMMENDER_ENABLED:
+        return None
+    recommendations = get_recommendations()
+    rows = recommendations.lookup(city, traveller_type, limit) if recommendations is not None else None
+    CACHE_LOOKUPS.inc(cache="cf_recommendations", result="hit" if rows else "miss")
+    return rows or None
@@ -0,0 +1,212 @@
+"""In-Process Geospatial Index of Hotel Coordinates
+
+"Hotels near X" is answered from a KD-tree over the hotels' coordinates as
+points on the unit sphere, so radius and k-nearest searches visit O(log n)
+nodes instead of computing a distance to every hotel. Chord length grows with
+great-circle distance, so the Euclidean tree answers both searches exactly.
+
+Hotels are loaded from the KG (Hotel.location points, see Create_kg.py),
+falling back to hotels.csv when the graph has no locations yet. Templates L6
+and R6 answer the same questions in Cypher with the point index.
+"""
+import csv
+import heapq
+import logging
+import math
+import os
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from ..config import KG_DATASET_DIR
+from ..monitoring.tracing import span
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+
+GEO_INDEX_QUERY = """MATCH (h:Hotel)-[:LOCATED_IN]->(city:City)-[:LOCATED_IN]->(country:Country)
+WHERE h.location IS NOT NULL
+RETURN h.hotel_id AS hotel_id, h.name AS hotel_name, city.name AS city_name, country.name AS country_name,
+       h.star_rating AS star_rating, h.location.latitude AS lat, h.location.longitude AS lon"""
+
+Point = Tuple[float, float, float]
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = math.sin((phi2 - phi1) / 2) ** 2 + \
+        math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def to_unit_vector(lat: float, lon: float) -> Point:
+    phi, lam = math.radians(lat), math.radians(lon)
+    return (math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi))
+
+
+def chord_for_km(distance_km: float) -> float:
+    return 2 * math.sin(min(distance_km / EARTH_RADIUS_KM, math.pi) / 2)
+
+
+def km_for_chord(chord: float) -> float:
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+class KDTree:
+    """Static 3-d tree; nodes are (point index, split axis, left, right)."""
+
+    def __init__(self, points: Sequence[Point]):
+        self.points = list(points)
+        self.root = self._build(list(range(len(self.points))), 0)
+
+    def _build(self, indices: List[int], depth: int):
+        if not indices:
+            return None
+        axis = depth % 3
+        indices.sort(key=lambda i: self.points[i][axis])
+        middle = len(indices) // 2
+        return (indices[middle], axis,
+                self._build(indices[:middle], depth + 1), self._build(indices[middle + 1:], depth + 1))
+
+    def within(self, center: Point, radius: float) -> List[Tuple[float, int]]:
+        """(distance, index) of every point within `radius` of `center`, unordered."""
+        found, stack, radius_sq = [], [self.root], radius * radius
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            index, axis, left, right = node
+            point = self.points[index]
+            dist_sq = sum((a - b) ** 2 for a, b in zip(center, point))
+            if dist_sq <= radius_sq:
+                found.append((math.sqrt(dist_sq), index))
+            delta = center[axis] - point[axis]
+            if delta <= radius:
+                stack.append(left)
+            if delta >= -radius:
+                stack.append(right)
+        return found
+
+    def nearest(self, center: Point, k: int) -> List[Tuple[float, int]]:
+        """(distance, index) of the k points closest to `center`, nearest first."""
+        best: List[Tuple[float, int]] = []  # max-heap of (-dist_sq, index)
+
+        def visit(node):
+            if node is None:
+                return
+            index, axis, left, right = node
+            point = self.points[index]
+            dist_sq = sum((a - b) ** 2 for a, b in zip(center, point))
+            if len(best) < k:
+                heapq.heappush(best, (-dist_sq, index))
+            elif dist_sq < -best[0][0]:
+                heapq.heapreplace(best, (-dist_sq, index))
+            delta = center[axis] - point[axis]
+            near, far = (left, right) if delta <= 0 else (right, left)
+            visit(near)
+            if len(best) < k or delta * delta < -best[0][0]:
+                visit(far)
+
+        if k > 0:
+            visit(self.root)
+        return sorted((math.sqrt(-d), i) for d, i in best)
+
+
+class HotelGeoIndex:
+    """Hotels with coordinates; rows come back shaped like templates L6/R6 (plus distance_km)."""
+
+    def __init__(self, hotels: List[Dict[str, Any]], source: str = ""):
+        self.hotels = [h for h in hotels if h.get('lat') is not None and h.get('lon') is not None]
+        self.tree = KDTree([to_unit_vector(float(h['lat']), float(h['lon'])) for h in self.hotels])
+        self._by_name = {h['hotel_name'].casefold(): h for h in self.hotels}
+        self.source = source
+
+    @classmethod
+    def from_graph(cls, conn) -> "HotelGeoIndex":
+        return cls(conn.execute_query(GEO_INDEX_QUERY), source="graph")
+
+    @classmethod
+    def from_csv(cls, dataset_dir: str = KG_DATASET_DIR) -> "HotelGeoIndex":
+        with open(os.path.join(dataset_dir, 'hotels.csv'), newline='', encoding='utf-8') as f:
+            hotels = [{'hotel_id': row['hotel_id'], 'hotel_name': row['hotel_name'], 'city_name': row['city'],
+                       'country_name': row['country'], 'star_rating': float(row['star_rating']),
+                       'lat': float(row['lat']), 'lon': float(row['lon'])} for row in csv.DictReader(f)]
+        return cls(hotels, source="csv")
+
+    def _rows(self, matches: List[Tuple[float, int]], star_rating: Optional[int] = None) -> List[Dict[str, Any]]:
+        rows = []
+        for chord, i in sorted(matches):
+            hotel = self.hotels[i]
+            if star_rating and int(float(hotel['star_rating'])) != int(star_rating):
+                continue
+            rows.append({'hotel_name': hotel['hotel_name'], 'city_name': hotel['city_name'],
+                         'country_name': hotel['country_name'], 'star_rating': hotel['star_rating'],
+                         'distance_km': round(km_for_chord(chord), 1)})
+        return rows
+
+    def within(self, lat: float, lon: float, radius_km: float, star_rating: Optional[int] = None,
+               limit: int = 50) -> List[Dict[str, Any]]:
+        """Hotels within radius_km of (lat, lon), nearest first."""
+        with span("geo.within", radius_km=radius_km) as s:
+            rows = self._rows(self.tree.within(to_unit_vector(lat, lon), chord_for_km(radius_km)), star_rating)
+            s.set_attribute('rows', len(rows))
+        return rows[:limit]
+
+    def nearest(self, lat: float, lon: float, k: int) -> List[Dict[str, Any]]:
+        with span("geo.nearest", k=k):
+            return self._rows(self.tree.nearest(to_unit_vector(lat, lon), k))
+
+    def hotel(self, name: str) -> Optional[Dict[str, Any]]:
+        return self._by_name.get(name.strip().casefold())
+
+    def city_centre(self, city: str) -> Optional[Tuple[float, float]]:
+        """Mean position of a city's hotels (good enough for "near <city>")."""
+        points = [(float(h['lat']), float(h['lon'])) for h in self.hotels
+                  if h['city_name'].casefold() == city.strip().casefold()]
+        if not points:
+            return None
+        return sum(p[0] for p in points) / len(points), sum(p[1] for p in points) / len(points)
+
+    def __len__(self):
+        return len(self.hotels)
+
+
+def load_geo_index(conn=None) -> Optional[HotelGeoIndex]:
+    """From the KG when it has hotel locations, else from hotels.csv."""
+    if conn is not None:
+        try:
+            index = HotelGeoIndex.from_graph(conn)
+            if len(index):
+                return index
+            logger.info("No Hotel.location points in the KG (re-run Create_kg.py), using hotels.csv")
+        except Exception as e:
+            logger.warning("Loading hotel locations from the KG failed, using hotels.csv: %s", e)
+    try:
+        return HotelGeoIndex.from_csv()
+    except (OSError, KeyError, ValueError) as e:
+        logger.warning("Geo index unavailable: %s", e)
+        return None
+
+
+_index: Optional[HotelGeoIndex] = None
+_lock = threading.Lock()
+
+
+def get_geo_index(conn=None) -> Optional[HotelGeoIndex]:
+    """Shared index, loaded on first use; None when no coordinates can be read (callers use L6/R6)."""
+    global _index
+    if _index is None:
+        with _lock:
+            if _index is None:
+                _index = load_geo_index(conn)
+    return _index
+
+
+def reload_geo_index(conn=None) -> Optional[HotelGeoIndex]:
+    """Rebuild the shared index, e.g. after Create_kg.py has reloaded the hotels."""
+    global _index
+    index = load_geo_index(conn)
+    if index is not None:
+        with _lock:
+            _index = index
+    return index
@@ -1,6 +1,5 @@
 """Neo4j Database Connection"""
 import os
-from neo4j import GraphDatabase
 
 class Neo4jConnection:
     def __init__(self, config_path=None):
@@ -22,6 +21,7 @@ class Neo4jConnection:
                     key, value = line.strip().split('=', 1)
                     config[key] = value
         
+        from neo4j import GraphDatabase
         self.driver = GraphDatabase.driver(config['URI'], auth=(config['USERNAME'], config['PASSWORD']))
     
     def execute_query(self, query, parameters=None):
@@ -29,7 +29,20 @@ class Neo4jConnection:
             result = session.run(query, parameters or {})
             return [dict(record) for record in result]
     
+    def stream_query(self, query, parameters=None, columns=None):
+        """Yield records one at a time (only `columns`, if given); the session closes when the generator does."""
+        with self.driver.session() as session:
+            result = session.run(query, parameters or {})
+            for record in result:
+                yield {c: record[c] for c in columns} if columns else dict(record)
+    
+    def profile_query(self, query, parameters=None, explain=False):
+        """(rows, plan) for PROFILE (executed, with db hits) or EXPLAIN (planned only, no rows) of `query`."""
+        with self.driver.session() as session:
+            result = session.run(f"{'EXPLAIN' if explain else 'PROFILE'} {query}", parameters or {})
+            rows = [dict(record) for record in result]
+            summary = result.consume()
+            return rows, summary.plan if explain else summary.profile
+    
     def close(self):
         self.driver.close()
-
-print("Neo4jConnection class defined")
\ No newline at end of file
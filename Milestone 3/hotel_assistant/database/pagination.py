@@ -0,0 +1,71 @@
+"""Keyset Pagination for the List and Recommend Templates
+
+Pageable templates order by a sort value (star rating or review score,
+descending) and then hotel_id. The cursor of a page holds the last row's
+(sort value, hotel_id); the next page's WHERE clause starts strictly after
+it. Pages therefore cost the same at any depth, unlike SKIP, and never repeat
+or drop rows.
+
+Records are consumed with Neo4jConnection.stream_query and only page_size + 1
+are read: the extra row tells whether there is a next page.
+"""
+import base64
+import json
+from contextlib import closing
+from itertools import islice
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class Page(list):
+    """A page of rows (a plain list to existing callers) plus the cursor of the next page, if any."""
+
+    def __init__(self, rows: List[Dict[str, Any]] = (), next_cursor: Optional[str] = None):
+        super().__init__(rows)
+        self.next_cursor = next_cursor
+
+
+def encode_cursor(sort_value: Any, hotel_id: Any) -> str:
+    raw = json.dumps([sort_value, hotel_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, Any]:
+    """(sort value, hotel_id) of a cursor; ValueError if it was not made by encode_cursor()."""
+    try:
+        sort_value, hotel_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid page cursor: {cursor!r}") from e
+    return sort_value, hotel_id
+
+
+def keyset_clause(sort_expr: str, cursor: Optional[str], id_expr: str = "h.hotel_id") -> Tuple[str, Dict[str, Any]]:
+    """
+    " AND ..." condition for rows after the cursor (empty on the first page) and its parameters.
+
+    Matches ORDER BY <sort_expr> DESC, <id_expr>.
+    """
+    if not cursor:
+        return "", {}
+    sort_value, hotel_id = decode_cursor(cursor)
+    clause = (f" AND ({sort_expr} < $after_sort OR "
+              f"({sort_expr} = $after_sort AND {id_expr} > $after_id))")
+    return clause, {'after_sort': sort_value, 'after_id': hotel_id}
+
+
+def fetch_page(conn, query: str, params: Dict[str, Any], page_size: int, sort_field: str,
+               columns: Optional[List[str]] = None) -> Page:
+    """
+    Run a pageable query (it must end in LIMIT $limit and return hotel_id and sort_field).
+
+    Only page_size + 1 records are pulled from the stream; the session closes right after.
+    `columns` keeps just those keys of each row (the cursor fields are always kept).
+    """
+    params = dict(params, limit=page_size + 1)
+    if columns is not None:
+        columns = list(dict.fromkeys([*columns, sort_field, 'hotel_id']))
+    with closing(conn.stream_query(query, params, columns)) as records:
+        rows = list(islice(records, page_size + 1))
+    if len(rows) <= page_size:
+        return Page(rows)
+    rows = rows[:page_size]
+    return Page(rows, encode_cursor(rows[-1][sort_field], rows[-1]['hotel_id']))
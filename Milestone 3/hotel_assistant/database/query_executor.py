@@ -1,21 +1,42 @@
 """Query Execution Logic"""
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 from .neo4j_connection import Neo4jConnection
 from .query_library import QueryLibrary
+from .cf_recommendations import recommend
+from .geo_index import get_geo_index
+from .visa_matrix import get_visa_matrix
+from ..config import GEO_DEFAULT_RADIUS_KM, GEO_NEAREST_K, GEO_NEAREST_MAX_KM
+from ..nlp.geocoder import resolve_location
 
-def select_and_execute_query(conn: Neo4jConnection, intent: str, entities: Dict[str, Any]):
+def _near_point(conn: Neo4jConnection, entities: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+    """Coordinates of the `near` entity (landmark, hotel, city or "lat, lon"), if it resolves."""
+    if not entities.get('near'):
+        return None
+    location = resolve_location(entities['near'], get_geo_index(conn))
+    return location[:2] if location else None
+
+def select_and_execute_query(conn: Neo4jConnection, intent: str, entities: Dict[str, Any],
+                             cursor: Optional[str] = None):
+    """Run the template for (intent, entities); `cursor` asks the pageable ones (L1-L5, R1, R5) for a later page."""
     if intent == "LIST_HOTELS":
         city, country, star_rating = entities.get('city'), entities.get('country'), entities.get('star_rating')
+        point = _near_point(conn, entities)
+        if point:
+            radius_km = float(entities.get('radius_km') or GEO_DEFAULT_RADIUS_KM)
+            index = get_geo_index(conn)
+            if index is not None:
+                return index.within(point[0], point[1], radius_km, star_rating)
+            return QueryLibrary.template_L6_list_near_point(conn, point[0], point[1], radius_km, star_rating)
         if city and star_rating:
-            return QueryLibrary.template_L4_list_by_city_and_rating(conn, city, star_rating)
+            return QueryLibrary.template_L4_list_by_city_and_rating(conn, city, star_rating, cursor=cursor)
         elif country and star_rating:
-            return QueryLibrary.template_L5_list_by_country_and_rating(conn, country, star_rating)
+            return QueryLibrary.template_L5_list_by_country_and_rating(conn, country, star_rating, cursor=cursor)
         elif city:
-            return QueryLibrary.template_L1_list_by_city(conn, city)
+            return QueryLibrary.template_L1_list_by_city(conn, city, cursor=cursor)
         elif country:
-            return QueryLibrary.template_L2_list_by_country(conn, country)
+            return QueryLibrary.template_L2_list_by_country(conn, country, cursor=cursor)
         elif star_rating:
-            return QueryLibrary.template_L3_list_by_rating(conn, star_rating)
+            return QueryLibrary.template_L3_list_by_rating(conn, star_rating, cursor=cursor)
     
     elif intent == "RECOMMEND_HOTEL":
         city = entities.get('city')
@@ -24,7 +45,11 @@ def select_and_execute_query(conn: Neo4jConnection, intent: str, entities: Dict[
         star_rating = entities.get('star_rating')
         age_group = entities.get('age_group')
         user_gender = entities.get('user_gender')
+        point = _near_point(conn, entities)
         
+        if point:
+            return QueryLibrary.template_R6_recommend_nearest(
+                conn, point[0], point[1], GEO_NEAREST_K, float(entities.get('radius_km') or GEO_NEAREST_MAX_KM))
         if city:
             if traveller_type and aspects:
                 return QueryLibrary.template_R4_recommend_by_traveller_and_aspects(
@@ -33,13 +58,17 @@ def select_and_execute_query(conn: Neo4jConnection, intent: str, entities: Dict[
                 return QueryLibrary.template_R3_recommend_by_aspects(
                     conn, city, aspects, age_group, user_gender, star_rating)
             elif star_rating and traveller_type:
-                return QueryLibrary.template_R1_recommend_by_location(conn, city, star_rating)
+                return QueryLibrary.template_R1_recommend_by_location(conn, city, star_rating, cursor=cursor)
             elif star_rating:
-                return QueryLibrary.template_R5_recommend_with_rating_filter(conn, city, star_rating)
+                return QueryLibrary.template_R5_recommend_with_rating_filter(conn, city, star_rating, cursor=cursor)
             elif traveller_type:
-                return QueryLibrary.template_R1_recommend_by_location(conn, city)
+                return recommend(city, traveller_type) or \
+                    QueryLibrary.template_R1_recommend_by_location(conn, city, cursor=cursor)
             else:
-                return QueryLibrary.template_R1_recommend_by_location(conn, city)
+                return QueryLibrary.template_R1_recommend_by_location(conn, city, cursor=cursor)
+        elif traveller_type:
+            # No city: only the precomputed any-city list ("*") can answer
+            return recommend(None, traveller_type) or []
     
     elif intent == "DESCRIBE_HOTEL":
         hotel_name, aspects = entities.get('hotel_name'), entities.get('aspects')
@@ -53,7 +82,12 @@ def select_and_execute_query(conn: Neo4jConnection, intent: str, entities: Dict[
     
     elif intent == "CHECK_VISA":
         from_country, to_country = entities.get('from_country'), entities.get('to_country')
-        if from_country and to_country:
-            return QueryLibrary.template_V1_check_visa_requirement(conn, from_country, to_country)
+        destinations = entities.get('destinations') or ([to_country] if to_country else [])
+        if from_country and destinations:
+            matrix = get_visa_matrix(conn)
+            if matrix is not None:
+                return matrix.lookup_many(from_country, destinations)
+            return [row for destination in destinations
+                    for row in QueryLibrary.template_V1_check_visa_requirement(conn, from_country, destination)]
 
     return []
\ No newline at end of file
@@ -1,61 +1,109 @@
 """Cypher Query Templates"""
+import functools
 from typing import List, Dict, Any, Optional
 from .neo4j_connection import Neo4jConnection
+from .pagination import fetch_page, keyset_clause
+from .speculative import first_non_empty
+from ..config import LIST_PAGE_SIZE, RECOMMEND_PAGE_SIZE
+from ..monitoring.metrics import NEO4J_QUERY_SECONDS
+from ..monitoring.tracing import traced
+
+
+def _template(template_id: str):
+    """Trace a template call and record its latency under its id (L1, R3, ...)."""
+    def decorator(fn):
+        traced_fn = traced("cypher.template", template=template_id)(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with NEO4J_QUERY_SECONDS.time(template=template_id):
+                return traced_fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
 
 class QueryLibrary:
     
     @staticmethod
-    def template_L1_list_by_city(conn: Neo4jConnection, city: str):
-        query = """MATCH (h:Hotel)-[:LOCATED_IN]->(city:City)-[:LOCATED_IN]->(country:Country)
-        WHERE city.name = $city RETURN h.name AS hotel_name, city.name AS city_name, country.name AS country_name, h.star_rating AS star_rating
-        ORDER BY h.star_rating DESC LIMIT 50"""
-        return conn.execute_query(query, {'city': city})
+    def _list_page(conn: Neo4jConnection, where: str, params: Dict[str, Any], page_size: int, cursor: Optional[str]):
+        """Hotels matching `where`, best star rating first, one keyset page at a time."""
+        after, after_params = keyset_clause("h.star_rating", cursor)
+        query = f"""MATCH (h:Hotel)-[:LOCATED_IN]->(city:City)-[:LOCATED_IN]->(country:Country)
+        WHERE {where}{after}
+        RETURN h.name AS hotel_name, city.name AS city_name, country.name AS country_name, h.star_rating AS star_rating,
+        h.hotel_id AS hotel_id ORDER BY h.star_rating DESC, h.hotel_id LIMIT $limit"""
+        return fetch_page(conn, query, {**params, **after_params}, page_size, 'star_rating')
     
     @staticmethod
-    def template_L2_list_by_country(conn: Neo4jConnection, country: str):
-        query = """MATCH (h:Hotel)-[:LOCATED_IN]->(city:City)-[:LOCATED_IN]->(country:Country)
-        WHERE country.name = $country RETURN h.name AS hotel_name, city.name AS city_name, country.name AS country_name, h.star_rating AS star_rating
-        ORDER BY h.star_rating DESC LIMIT 50"""
-        return conn.execute_query(query, {'country': country})
+    @_template("L1")
+    def template_L1_list_by_city(conn: Neo4jConnection, city: str, page_size: int = LIST_PAGE_SIZE,
+                                 cursor: Optional[str] = None):
+        return QueryLibrary._list_page(conn, "city.name = $city", {'city': city}, page_size, cursor)
     
     @staticmethod
-    def template_L3_list_by_rating(conn: Neo4jConnection, star_rating: int):
-        query = """MATCH (h:Hotel)-[:LOCATED_IN]->(city:City)-[:LOCATED_IN]->(country:Country)
-        WHERE h.star_rating = $star_rating RETURN h.name AS hotel_name, city.name AS city_name, country.name AS country_name, h.star_rating AS star_rating
-        ORDER BY h.name LIMIT 50"""
-        return conn.execute_query(query, {'star_rating': star_rating})
+    @_template("L2")
+    def template_L2_list_by_country(conn: Neo4jConnection, country: str, page_size: int = LIST_PAGE_SIZE,
+                                    cursor: Optional[str] = None):
+        return QueryLibrary._list_page(conn, "country.name = $country", {'country': country}, page_size, cursor)
     
     @staticmethod
-    def template_L4_list_by_city_and_rating(conn: Neo4jConnection, city: str, star_rating: int):
-        query = """MATCH (h:Hotel)-[:LOCATED_IN]->(city:City)-[:LOCATED_IN]->(country:Country)
-        WHERE city.name = $city AND h.star_rating = $star_rating 
-        RETURN h.name AS hotel_name, city.name AS city_name, country.name AS country_name, h.star_rating AS star_rating LIMIT 50"""
-        return conn.execute_query(query, {'city': city, 'star_rating': star_rating})
+    @_template("L3")
+    def template_L3_list_by_rating(conn: Neo4jConnection, star_rating: int, page_size: int = LIST_PAGE_SIZE,
+                                   cursor: Optional[str] = None):
+        return QueryLibrary._list_page(conn, "h.star_rating = $star_rating", {'star_rating': star_rating},
+                                       page_size, cursor)
     
     @staticmethod
-    def template_L5_list_by_country_and_rating(conn: Neo4jConnection, country: str, star_rating: int):
-        query = """MATCH (h:Hotel)-[:LOCATED_IN]->(city:City)-[:LOCATED_IN]->(country:Country)
-        WHERE country.name = $country AND h.star_rating = $star_rating
-        RETURN h.name AS hotel_name, city.name AS city_name, country.name AS country_name, h.star_rating AS star_rating LIMIT 50"""
-        return conn.execute_query(query, {'country': country, 'star_rating': star_rating})
+    @_template("L4")
+    def template_L4_list_by_city_and_rating(conn: Neo4jConnection, city: str, star_rating: int,
+                                            page_size: int = LIST_PAGE_SIZE, cursor: Optional[str] = None):
+        return QueryLibrary._list_page(conn, "city.name = $city AND h.star_rating = $star_rating",
+                                       {'city': city, 'star_rating': star_rating}, page_size, cursor)
     
     @staticmethod
-    def template_R1_recommend_by_location(conn: Neo4jConnection, city: str, star_rating: int = None):
-        where_parts = ["city.name = $city"]
-        params = {'city': city}
+    @_template("L5")
+    def template_L5_list_by_country_and_rating(conn: Neo4jConnection, country: str, star_rating: int,
+                                               page_size: int = LIST_PAGE_SIZE, cursor: Optional[str] = None):
+        return QueryLibrary._list_page(conn, "country.name = $country AND h.star_rating = $star_rating",
+                                       {'country': country, 'star_rating': star_rating}, page_size, cursor)
+    
+    @staticmethod
+    @_template("L6")
+    def template_L6_list_near_point(conn: Neo4jConnection, lat: float, lon: float, radius_km: float,
+                                    star_rating: int = None):
+        rating_filter = " AND h.star_rating = $star_rating" if star_rating else ""
+        query = f"""MATCH (h:Hotel)-[:LOCATED_IN]->(city:City)-[:LOCATED_IN]->(country:Country)
+        WHERE point.distance(h.location, point({{latitude: $lat, longitude: $lon}})) <= $radius_m{rating_filter}
+        WITH h, city, country, point.distance(h.location, point({{latitude: $lat, longitude: $lon}})) AS distance
+        RETURN h.name AS hotel_name, city.name AS city_name, country.name AS country_name, h.star_rating AS star_rating,
+        round(distance / 1000.0, 1) AS distance_km ORDER BY distance LIMIT 50"""
+        return conn.execute_query(query, {'lat': lat, 'lon': lon, 'radius_m': radius_km * 1000,
+                                          'star_rating': star_rating})
+    
+    @staticmethod
+    def _recommend_page(conn: Neo4jConnection, where: str, params: Dict[str, Any], page_size: int,
+                        cursor: Optional[str]):
+        """Reviewed hotels matching `where`, best average review score first, one keyset page at a time."""
+        after, after_params = keyset_clause("overall_review_score", cursor)
+        query = f"""MATCH (h:Hotel)-[:LOCATED_IN]->(city:City)-[:LOCATED_IN]->(country:Country)
+        WHERE {where} MATCH (h)<-[:REVIEWED]-(r:Review)
+        WITH h, city, country, avg(r.score_overall) AS overall_review_score WHERE true{after}
+        RETURN h.name AS hotel_name, city.name AS city_name, country.name AS country_name, overall_review_score,
+        h.hotel_id AS hotel_id ORDER BY overall_review_score DESC, h.hotel_id LIMIT $limit"""
+        return fetch_page(conn, query, {**params, **after_params}, page_size, 'overall_review_score')
+    
+    @staticmethod
+    @_template("R1")
+    def template_R1_recommend_by_location(conn: Neo4jConnection, city: str, star_rating: int = None,
+                                          page_size: int = RECOMMEND_PAGE_SIZE, cursor: Optional[str] = None):
+        where, params = "city.name = $city", {'city': city}
         if star_rating:
-            where_parts.append("h.star_rating = $star_rating")
+            where += " AND h.star_rating = $star_rating"
             params['star_rating'] = star_rating
-        where_clause = " AND ".join(where_parts)
-        
-        query = f"""MATCH (h:Hotel)-[:LOCATED_IN]->(city:City)-[:LOCATED_IN]->(country:Country)
-        WHERE {where_clause} OPTIONAL MATCH (h)<-[:REVIEWED]-(r:Review)
-        WITH h, city, country, collect(r) AS reviews WHERE size(reviews) > 0 UNWIND reviews AS r
-        RETURN h.name AS hotel_name, city.name AS city_name, country.name AS country_name, avg(r.score_overall) AS overall_review_score
-        ORDER BY overall_review_score DESC LIMIT 10"""
-        return conn.execute_query(query, params)
+        return QueryLibrary._recommend_page(conn, where, params, page_size, cursor)
     
     @staticmethod
+    @_template("R3")
     def template_R3_recommend_by_aspects(conn: Neo4jConnection, city: str, aspects: List[str], 
                                         age_group=None, user_gender=None, star_rating: int = None):
         aspect_mapping = {'cleanliness': 'score_cleanliness', 'comfort': 'score_comfort', 'facilities': 'score_facilities',
@@ -96,6 +144,7 @@ class QueryLibrary:
         return conn.execute_query(query, params)
     
     @staticmethod
+    @_template("R4")
     def template_R4_recommend_by_traveller_and_aspects(conn: Neo4jConnection, city: str, traveller_type: str, 
                                                        aspects: List[str], age_group=None, user_gender=None, star_rating: int = None):
         aspect_mapping = {'cleanliness': 'score_cleanliness', 'comfort': 'score_comfort', 'facilities': 'score_facilities',
@@ -133,21 +182,35 @@ class QueryLibrary:
         ({aspect_avg}) / {len(valid_aspects)} AS composite_aspect_score, count(r) AS review_count
         ORDER BY composite_aspect_score DESC LIMIT 10"""
         
-        results = conn.execute_query(query, params)
-        if not results:
-            results = QueryLibrary.template_R3_recommend_by_aspects(conn, city, aspects, age_group, user_gender, star_rating)
-        return results
+        return first_non_empty(
+            "R4", lambda: conn.execute_query(query, params),
+            lambda: QueryLibrary.template_R3_recommend_by_aspects(conn, city, aspects, age_group, user_gender, star_rating))
     
     @staticmethod
-    def template_R5_recommend_with_rating_filter(conn: Neo4jConnection, city: str, star_rating: int):
-        query = """MATCH (h:Hotel)-[:LOCATED_IN]->(city:City)-[:LOCATED_IN]->(country:Country)
-        WHERE city.name = $city AND h.star_rating = $star_rating OPTIONAL MATCH (h)<-[:REVIEWED]-(r:Review)
-        WITH h, city, country, collect(r) AS reviews WHERE size(reviews) > 0 UNWIND reviews AS r
-        RETURN h.name AS hotel_name, city.name AS city_name, country.name AS country_name, avg(r.score_overall) AS overall_review_score
-        ORDER BY overall_review_score DESC LIMIT 10"""
-        return conn.execute_query(query, {'city': city, 'star_rating': star_rating})
+    @_template("R5")
+    def template_R5_recommend_with_rating_filter(conn: Neo4jConnection, city: str, star_rating: int,
+                                                 page_size: int = RECOMMEND_PAGE_SIZE, cursor: Optional[str] = None):
+        return QueryLibrary._recommend_page(conn, "city.name = $city AND h.star_rating = $star_rating",
+                                            {'city': city, 'star_rating': star_rating}, page_size, cursor)
+    
+    @staticmethod
+    @_template("R6")
+    def template_R6_recommend_nearest(conn: Neo4jConnection, lat: float, lon: float, k: int = 5,
+                                      radius_km: float = None):
+        radius_filter = " AND point.distance(h.location, point({latitude: $lat, longitude: $lon})) <= $radius_m" \
+            if radius_km else ""
+        query = f"""MATCH (h:Hotel)-[:LOCATED_IN]->(city:City)-[:LOCATED_IN]->(country:Country)
+        WHERE h.location IS NOT NULL{radius_filter}
+        WITH h, city, country, point.distance(h.location, point({{latitude: $lat, longitude: $lon}})) AS distance
+        ORDER BY distance LIMIT $k OPTIONAL MATCH (h)<-[:REVIEWED]-(r:Review)
+        RETURN h.name AS hotel_name, city.name AS city_name, country.name AS country_name,
+        round(distance / 1000.0, 1) AS distance_km, avg(r.score_overall) AS overall_review_score, count(r) AS review_count
+        ORDER BY distance_km"""
+        return conn.execute_query(query, {'lat': lat, 'lon': lon, 'k': k,
+                                          'radius_m': radius_km * 1000 if radius_km else None})
     
     @staticmethod
+    @_template("D1")
     def template_D1_describe_all_aspects(conn: Neo4jConnection, hotel_name: str):
         query = """MATCH (h:Hotel)-[:LOCATED_IN]->(city:City)-[:LOCATED_IN]->(country:Country)
         WHERE toLower(h.name) = toLower($hotel_name) OPTIONAL MATCH (h)<-[:REVIEWED]-(r:Review)
@@ -161,6 +224,7 @@ class QueryLibrary:
         return conn.execute_query(query, {'hotel_name': hotel_name})
     
     @staticmethod
+    @_template("D2")
     def template_D2_describe_specific_aspects(conn: Neo4jConnection, hotel_name: str, aspects: List[str]):
         aspect_mapping = {'cleanliness': ('cleanliness_base', 'score_cleanliness'), 'comfort': ('comfort_base', 'score_comfort'),
                          'facilities': ('facilities_base', 'score_facilities'), 'location': ('location_base', 'score_location'),
@@ -183,6 +247,7 @@ class QueryLibrary:
         return conn.execute_query(query, {'hotel_name': hotel_name})
     
     @staticmethod
+    @_template("C1")
     def template_C1_compare_all_aspects(conn: Neo4jConnection, hotel1: str, hotel2: str, aspects: List[str] = None):
         aspect_mapping = {'cleanliness': 'cleanliness_base', 'comfort': 'comfort_base', 'facilities': 'facilities_base',
                          'location': 'location_base', 'staff': 'staff_base', 'value_for_money': 'value_for_money_base'}
@@ -211,6 +276,7 @@ class QueryLibrary:
         return conn.execute_query(query, {'hotel1': hotel1, 'hotel2': hotel2})
     
     @staticmethod
+    @_template("C2")
     def template_C2_compare_with_traveller_type(conn: Neo4jConnection, hotel1: str, hotel2: str, 
                                                traveller_type: str, aspects: List[str] = None):
         aspect_mapping = {'cleanliness': 'cleanliness_base', 'comfort': 'comfort_base', 'facilities': 'facilities_base',
@@ -238,17 +304,15 @@ class QueryLibrary:
         h2.name AS hotel2_name, city2.name AS hotel2_city, country2.name AS hotel2_country,
         {aspect_select} LIMIT 1"""
         
-        results = conn.execute_query(query, {'hotel1': hotel1, 'hotel2': hotel2, 'traveller_type': traveller_type})
-        if not results:
-            results = QueryLibrary.template_C1_compare_all_aspects(conn, hotel1, hotel2, aspects)
-        return results
+        # Same query as C1 (base scores do not depend on the traveller type), so an
+        # empty result would be empty for C1 too: no fallback round trip
+        return conn.execute_query(query, {'hotel1': hotel1, 'hotel2': hotel2, 'traveller_type': traveller_type})
     
     @staticmethod
+    @_template("V1")
     def template_V1_check_visa_requirement(conn: Neo4jConnection, from_country: str, to_country: str):
         query = """MATCH (from:Country {name: $from_country}), (to:Country {name: $to_country})
         OPTIONAL MATCH (from)-[v:NEEDS_VISA]->(to)
         RETURN from.name AS from_country, to.name AS to_country, v.visa_type AS visa_type, 
         CASE WHEN v IS NOT NULL THEN true ELSE false END AS visa_required LIMIT 1"""
         return conn.execute_query(query, {'from_country': from_country, 'to_country': to_country})
-
-print("QueryLibrary defined (14 templates)")
\ No newline at end of file
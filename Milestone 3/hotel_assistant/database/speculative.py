@@ -0,0 +1,83 @@
+"""Speculative Fallback Queries
+
+Some templates retry with a looser template when their result is empty (R4 ->
+R3). Run sequentially, that is two round trips whenever the narrow filter
+matches nothing. Here the fallback can be started alongside the primary query
+and the first non-empty result wins:
+
+- "always":   start both together
+- "adaptive": start both only while the template's recent fallback rate is at
+              least SPECULATIVE_FALLBACK_MIN_RATE (no wasted queries otherwise)
+- "off":      sequential, as before
+
+Every call records which branch answered, so the fallback rate per template is
+visible in the metrics and drives the adaptive mode.
+"""
+import contextvars
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Deque, Dict, List, Optional
+
+from ..config import (SPECULATIVE_FALLBACKS, SPECULATIVE_FALLBACK_MIN_RATE, SPECULATIVE_FALLBACK_WINDOW,
+                      SPECULATIVE_MAX_WORKERS)
+from ..monitoring.metrics import TEMPLATE_FALLBACKS
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Own pool: fallbacks are started from pipeline workers, which must not wait on their own pool."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=SPECULATIVE_MAX_WORKERS, thread_name_prefix="fallback")
+        return _executor
+
+
+class FallbackTracker:
+    """Recent primary/fallback outcomes per template."""
+
+    def __init__(self, window: int = SPECULATIVE_FALLBACK_WINDOW):
+        self.window = window
+        self._outcomes: Dict[str, Deque[bool]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, template: str, used_fallback: bool):
+        with self._lock:
+            self._outcomes.setdefault(template, deque(maxlen=self.window)).append(used_fallback)
+
+    def rate(self, template: str) -> float:
+        """Share of recent calls answered by the fallback (0.0 with no history)."""
+        with self._lock:
+            outcomes = self._outcomes.get(template)
+            return sum(outcomes) / len(outcomes) if outcomes else 0.0
+
+    def rates(self) -> Dict[str, float]:
+        with self._lock:
+            return {t: sum(o) / len(o) for t, o in self._outcomes.items() if o}
+
+
+TRACKER = FallbackTracker()
+
+
+def first_non_empty(template: str, primary: Callable[[], List[Dict]], fallback: Callable[[], List[Dict]],
+                    mode: str = SPECULATIVE_FALLBACKS) -> List[Dict]:
+    """Primary rows if there are any, else the fallback's; see the module docstring for `mode`."""
+    speculate = mode == "always" or (mode == "adaptive" and TRACKER.rate(template) >= SPECULATIVE_FALLBACK_MIN_RATE)
+    pending = None
+    if speculate:
+        # Run in a copy of the caller's context so the fallback's spans join the current trace
+        pending = _get_executor().submit(contextvars.copy_context().run, fallback)
+
+    rows = primary()
+    used_fallback = not rows
+    TRACKER.record(template, used_fallback)
+    TEMPLATE_FALLBACKS.inc(template=template, outcome="fallback" if used_fallback else "primary",
+                           speculative="yes" if speculate else "no")
+    if not used_fallback:
+        if pending is not None:
+            pending.cancel()
+        return rows
+    return pending.result() if pending is not None else fallback()
@@ -0,0 +1,186 @@
+"""In-Memory Visa Matrix
+
+visa.csv is a small, static country x country table, so CHECK_VISA is answered
+from a dense in-process matrix instead of two Country lookups and an OPTIONAL
+MATCH per request. Countries get integer indices and each (from, to) cell holds
+a one-byte code into the list of visa types (0 = no visa needed), giving O(1)
+lookups and a batch lookup for multi-destination itineraries.
+
+The matrix is loaded from the KG (falling back to the CSVs the KG is built
+from), reloaded in the background after VISA_MATRIX_MAX_AGE_S and on
+reload_visa_matrix(), e.g. after Create_kg.py has rebuilt the graph. An empty
+matrix is never served: CHECK_VISA then falls back to template V1.
+"""
+import csv
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ..config import KG_DATASET_DIR, VISA_MATRIX_MAX_AGE_S, VISA_MATRIX_SOURCE
+from ..monitoring.metrics import CACHE_LOOKUPS
+from ..monitoring.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Every Country with its NEEDS_VISA edges (one row per edge, or one null row for none)
+VISA_MATRIX_QUERY = """MATCH (from:Country) OPTIONAL MATCH (from)-[v:NEEDS_VISA]->(to:Country)
+RETURN from.name AS from_country, to.name AS to_country, v.visa_type AS visa_type"""
+
+
+class VisaMatrix:
+    """Dense country x country visa-type table."""
+
+    def __init__(self, countries: Iterable[str], requirements: Iterable[Tuple[str, str, str]], source: str = ""):
+        """
+        Args:
+            countries: All known country names
+            requirements: (from_country, to_country, visa_type) for pairs that need a visa
+            source: Where the data came from ("graph" or "csv"), for reporting
+        """
+        requirements = list(requirements)
+        names = set(countries)
+        for from_country, to_country, _ in requirements:
+            names.update((from_country, to_country))
+        self.countries: List[str] = sorted(names)
+        self._index = {name.casefold(): i for i, name in enumerate(self.countries)}
+        self.visa_types: List[Optional[str]] = [None] + sorted({t or "Visa" for _, _, t in requirements})
+        if len(self.visa_types) > 256:
+            raise ValueError("More than 255 visa types do not fit the one-byte cell codes")
+        type_codes = {t: code for code, t in enumerate(self.visa_types)}
+
+        n = len(self.countries)
+        self._cells = bytearray(n * n)
+        for from_country, to_country, visa_type in requirements:
+            self._cells[self._index[from_country.casefold()] * n + self._index[to_country.casefold()]] = \
+                type_codes[visa_type or "Visa"]
+        self.source = source
+        self.loaded_at = time.time()
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]], source: str = "graph") -> "VisaMatrix":
+        """Build from VISA_MATRIX_QUERY rows."""
+        countries, requirements = set(), []
+        for row in rows:
+            countries.add(row['from_country'])
+            if row.get('to_country'):
+                requirements.append((row['from_country'], row['to_country'], row.get('visa_type')))
+        return cls(countries, requirements, source)
+
+    @classmethod
+    def from_graph(cls, conn) -> "VisaMatrix":
+        return cls.from_rows(conn.execute_query(VISA_MATRIX_QUERY), source="graph")
+
+    @classmethod
+    def from_csv(cls, dataset_dir: str = KG_DATASET_DIR) -> "VisaMatrix":
+        """Same countries and NEEDS_VISA edges Create_kg.py builds from the dataset."""
+        def rows(name):
+            with open(os.path.join(dataset_dir, name), newline='', encoding='utf-8') as f:
+                return list(csv.DictReader(f))
+
+        countries = {row['country'] for row in rows('hotels.csv')} | {row['country'] for row in rows('users.csv')}
+        requirements = [(row['from'], row['to'], row['visa_type']) for row in rows('visa.csv')
+                        if row['requires_visa'].strip().lower() == 'yes']
+        return cls(countries, requirements, source="csv")
+
+    def index_of(self, country: Optional[str]) -> Optional[int]:
+        return self._index.get(country.strip().casefold()) if country else None
+
+    def lookup(self, from_country: str, to_country: str) -> Optional[Dict[str, Any]]:
+        """A row shaped like template_V1's, or None when either country is unknown (V1 returns no row)."""
+        i, j = self.index_of(from_country), self.index_of(to_country)
+        CACHE_LOOKUPS.inc(cache="visa_matrix", result="miss" if i is None or j is None else "hit")
+        if i is None or j is None:
+            return None
+        visa_type = self.visa_types[self._cells[i * len(self.countries) + j]]
+        return {'from_country': self.countries[i], 'to_country': self.countries[j],
+                'visa_type': visa_type, 'visa_required': visa_type is not None}
+
+    def lookup_many(self, from_country: str, destinations: Iterable[str]) -> List[Dict[str, Any]]:
+        """Rows for each known destination of an itinerary, in travel order."""
+        rows = []
+        with span("visa.matrix", from_country=from_country) as s:
+            for destination in destinations:
+                row = self.lookup(from_country, destination)
+                if row is not None:
+                    rows.append(row)
+            s.set_attribute('rows', len(rows))
+        return rows
+
+    def __len__(self):
+        return len(self.countries)
+
+
+_matrix: Optional[VisaMatrix] = None
+_lock = threading.Lock()
+_refreshing = threading.Lock()  # held by the one background refresh in progress
+_failed_at = 0.0
+RETRY_AFTER_FAILURE_S = 60.0
+
+
+def load_visa_matrix(conn=None, source: str = VISA_MATRIX_SOURCE) -> Optional[VisaMatrix]:
+    """
+    Load from the KG (when source is "graph" and a connection is given), else from the CSVs.
+
+    An empty matrix counts as unavailable: a KG that has no countries yet falls back to the CSVs,
+    and None (callers use template V1) when those are empty or missing too.
+    """
+    if source == "graph" and conn is not None:
+        try:
+            matrix = VisaMatrix.from_graph(conn)
+            if len(matrix):
+                return matrix
+            logger.warning("The KG has no countries for the visa matrix, using the CSVs")
+        except Exception as e:
+            logger.warning("Loading the visa matrix from the KG failed, using the CSVs: %s", e)
+    try:
+        matrix = VisaMatrix.from_csv()
+    except OSError as e:
+        logger.warning("Visa matrix unavailable: %s", e)
+        return None
+    return matrix if len(matrix) else None
+
+
+def reload_visa_matrix(conn=None) -> Optional[VisaMatrix]:
+    """Replace the shared matrix, e.g. after the KG has been rebuilt; keeps the old one if loading fails."""
+    global _matrix, _failed_at
+    matrix = load_visa_matrix(conn)
+    with _lock:
+        if matrix is not None:
+            _matrix = matrix
+        else:
+            _failed_at = time.time()
+    return matrix
+
+
+def _refresh_in_background(conn):
+    try:
+        reload_visa_matrix(conn)
+    finally:
+        _refreshing.release()
+
+
+def get_visa_matrix(conn=None) -> Optional[VisaMatrix]:
+    """
+    Shared matrix, loaded on first use and refreshed once older than VISA_MATRIX_MAX_AGE_S.
+
+    A stale matrix keeps being served while one background thread reloads it. None when neither
+    the KG nor the CSVs have any data (callers fall back to template V1); a failed first load is
+    retried after RETRY_AFTER_FAILURE_S.
+    """
+    matrix = _matrix
+    if matrix is None:
+        if time.time() - _failed_at < RETRY_AFTER_FAILURE_S:
+            return None
+        with _refreshing:
+            if _matrix is None and time.time() - _failed_at >= RETRY_AFTER_FAILURE_S:
+                reload_visa_matrix(conn)
+        return _matrix
+    if time.time() - matrix.loaded_at > VISA_MATRIX_MAX_AGE_S and _refreshing.acquire(blocking=False):
+        try:
+            threading.Thread(target=_refresh_in_background, args=(conn,), name="visa-matrix-refresh",
+                             daemon=True).start()
+        except RuntimeError:
+            _refreshing.release()
+    return matrix
@@ -0,0 +1,54 @@
+"""Templated Answers (no LLM call)
+
+Renders the knowledge graph rows as a readable answer using the same
+intent-specific context blocks the LLM sees. Used when the latency budget leaves
+no time for a model call or the call fails under the budget.
+"""
+from typing import Any, Dict, List, Optional
+
+from .context_builder import ContextBuilder
+from .result_merger import merge_and_rank_results
+
+TEMPLATE_MODEL = "template"
+
+
+def render_answer(intent: Optional[str], cypher_output: Optional[List[Dict]]) -> str:
+    """Answer text built from KG rows only."""
+    if intent == "CHECK_VISA" and cypher_output:
+        return " ".join(_visa_sentence(visa) for visa in cypher_output)
+
+    if not cypher_output:
+        return "I couldn't find matching information in the knowledge graph for this question."
+    merged = merge_and_rank_results(cypher_output, None, intent)
+    return "Here is what the knowledge graph has for your question:\n\n" + ContextBuilder.build(intent, merged)
+
+
+def _visa_sentence(visa: Dict[str, Any]) -> str:
+    origin, destination = visa.get('from_country', 'your country'), visa.get('to_country', 'the destination')
+    if visa.get('visa_required'):
+        kind = f" ({visa['visa_type']})" if visa.get('visa_type') else ""
+        return f"Travellers from {origin} need a visa{kind} to visit {destination}."
+    return f"Travellers from {origin} do not need a visa to visit {destination}."
+
+
+def templated_response(user_query: str, intent: Optional[str], cypher_output: Optional[List[Dict]],
+                       reason: str) -> Dict[str, Any]:
+    """An llm_layer-shaped result whose answer comes from render_answer()."""
+    return {
+        'success': True,
+        'model': TEMPLATE_MODEL,
+        'intent': intent,
+        'response': render_answer(intent, cypher_output),
+        'metadata': {
+            'query': user_query,
+            'cypher_results_count': len(cypher_output or []),
+            'embedding_results_count': 0,
+            'has_results': bool(cypher_output),
+            'tokens_used': 0,
+            'prompt_tokens': 0,
+            'cached_tokens': 0,
+            'completion_tokens': 0,
+            'latency_ms': 0.0,
+            'templated_reason': reason
+        }
+    }
@@ -1,15 +1,36 @@
 """Context Builder for LLM Prompts"""
-from typing import Dict, Any
-
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 import json
 
+from ..config import CONTEXT_TOKEN_BUDGETS, DEFAULT_CONTEXT_TOKEN_BUDGET
+from .token_counter import count_tokens, truncate_to_tokens
+
+# Smallest slice of a review worth keeping when it has to be truncated
+MIN_TRUNCATED_REVIEW_TOKENS = 25
+
+
 class ContextBuilder:
     """Builds optimized context for each intent type."""
 
     @staticmethod
-    def build(intent: str, merged_data: Dict[str, Any]) -> str:
+    def build(intent: str, merged_data: Dict[str, Any], token_budget: Optional[int] = None) -> str:
         """Route to intent-specific builder."""
+        context, _ = ContextBuilder.build_with_stats(intent, merged_data, token_budget)
+        return context
+
+    @staticmethod
+    def build_with_stats(intent: str, merged_data: Dict[str, Any],
+                         token_budget: Optional[int] = None) -> Tuple[str, Dict[str, int]]:
+        """
+        Build context that fits the intent's token budget.
+
+        The unbudgeted context is built first; only when it exceeds the budget
+        are low-relevance hotels and reviews dropped or truncated.
+
+        Returns:
+            (context, stats) where stats holds context_tokens, context_tokens_saved
+            and context_token_budget
+        """
         builders = {
             'LIST_HOTELS': ContextBuilder._build_list,
             'RECOMMEND_HOTEL': ContextBuilder._build_recommend,
@@ -18,8 +39,21 @@ class ContextBuilder:
             'CHECK_VISA': ContextBuilder._build_visa
         }
 
+        if token_budget is None:
+            token_budget = CONTEXT_TOKEN_BUDGETS.get(intent, DEFAULT_CONTEXT_TOKEN_BUDGET)
+
         builder = builders.get(intent, ContextBuilder._build_generic)
-        return builder(merged_data)
+        context = builder(merged_data)
+        full_tokens = count_tokens(context)
+        if full_tokens > token_budget:
+            context = builder(merged_data, token_budget)
+
+        context_tokens = count_tokens(context)
+        return context, {
+            'context_tokens': context_tokens,
+            'context_tokens_saved': max(full_tokens - context_tokens, 0),
+            'context_token_budget': token_budget
+        }
 
     @staticmethod
     def _get_reviews_for_hotel(data: Dict[str, Any], hotel_name: str):
@@ -46,17 +80,101 @@ class ContextBuilder:
         return []
 
     @staticmethod
-    def _build_list(data: Dict[str, Any]) -> str:
+    def _block(score: tuple, text: str, reviews: List[Dict[str, Any]] = None,
+               reviews_header: str = "", footer: str = "", required: bool = False,
+               label: str = "") -> Dict[str, Any]:
+        """
+        A unit of context: fixed text followed by optional ranked reviews.
+
+        `label` ("Hotel #{}") is numbered when rendering, counting only the kept blocks.
+        """
+        return {'score': score, 'text': text, 'reviews': reviews or [],
+                'reviews_header': reviews_header, 'footer': footer, 'required': required, 'label': label}
+
+    @staticmethod
+    def _review(similarity: Any, head: str, body: str, tail: str) -> Dict[str, Any]:
+        """A review line; only the body is truncated when space runs out."""
+        return {'score': float(similarity or 0.0), 'head': head, 'body': body, 'tail': tail}
+
+    @staticmethod
+    def _pack(header: str, blocks: List[Dict[str, Any]], budget: Optional[int] = None) -> str:
+        """
+        Render blocks in their original order, keeping what fits the budget.
+
+        Blocks are admitted by score (required ones always), then the remaining
+        budget is filled with reviews ranked by similarity. A review that does
+        not fit is truncated if a useful slice still fits. Labelled blocks are
+        numbered 1, 2, ... in the order they are rendered.
+        """
+        if budget is None:
+            kept_blocks = set(range(len(blocks)))
+            kept_reviews = {(b, r): ContextBuilder._render_review(review)
+                            for b, block in enumerate(blocks) for r, review in enumerate(block['reviews'])}
+        else:
+            remaining = budget - count_tokens(header)
+            kept_blocks = set()
+            # Required blocks first, so the optional ones only get what is left after them
+            for b in sorted(range(len(blocks)), key=lambda i: (blocks[i]['required'], blocks[i]['score']),
+                            reverse=True):
+                cost = (count_tokens(blocks[b]['label'].format(len(blocks))) + count_tokens(blocks[b]['text'])
+                        + count_tokens(blocks[b]['footer']))
+                if blocks[b]['required'] or cost <= remaining:
+                    kept_blocks.add(b)
+                    remaining -= cost
+
+            candidates = [(review['score'], -b, -r, b, r) for b in kept_blocks
+                          for r, review in enumerate(blocks[b]['reviews'])]
+            kept_reviews = {}
+            opened = set()
+            for _, _, _, b, r in sorted(candidates, reverse=True):
+                review = blocks[b]['reviews'][r]
+                header_cost = 0 if b in opened else count_tokens(blocks[b]['reviews_header'])
+                rendered = ContextBuilder._render_review(review)
+                cost = count_tokens(rendered)
+                if cost + header_cost > remaining:
+                    room = remaining - header_cost - count_tokens(review['head'] + review['tail']) - 1
+                    if room < MIN_TRUNCATED_REVIEW_TOKENS:
+                        continue
+                    rendered = review['head'] + truncate_to_tokens(review['body'], room) + "..." + review['tail']
+                    cost = count_tokens(rendered)
+                kept_reviews[(b, r)] = rendered
+                opened.add(b)
+                remaining -= cost + header_cost
+
+        context = header
+        number = 0
+        for b, block in enumerate(blocks):
+            if b not in kept_blocks:
+                continue
+            if block['label']:
+                number += 1
+                context += block['label'].format(number)
+            context += block['text']
+            lines = [kept_reviews[(b, r)] for r in range(len(block['reviews'])) if (b, r) in kept_reviews]
+            if lines:
+                context += block['reviews_header'] + "".join(lines)
+            context += block['footer']
+        return context
+
+    @staticmethod
+    def _render_review(review: Dict[str, Any]) -> str:
+        return review['head'] + review['body'] + review['tail']
+
+    @staticmethod
+    def _build_list(data: Dict[str, Any], budget: Optional[int] = None) -> str:
         if not data.get('metadata', {}).get('has_results'):
             return "No hotels found matching the criteria."
 
-        context = "=== AVAILABLE HOTELS ===\n\n"
+        blocks = []
         for idx, hotel in enumerate(data.get('primary_results', []), 1):
-            context += f"Hotel #{idx}\n"
-            context += f"  Name: {hotel.get('hotel_name', 'N/A')}\n"
-            context += f"  Location: {hotel.get('city_name', 'N/A')}, {hotel.get('country_name', 'N/A')}\n"
-            context += f"  Star Rating: {hotel.get('star_rating', 'N/A')}/5\n"
-            context += "\n"
+            text = f"  Name: {hotel.get('hotel_name', 'N/A')}\n"
+            text += f"  Location: {hotel.get('city_name', 'N/A')}, {hotel.get('country_name', 'N/A')}\n"
+            text += f"  Star Rating: {hotel.get('star_rating', 'N/A')}/5\n"
+            if hotel.get('distance_km') is not None:
+                text += f"  Distance: {float(hotel['distance_km']):.1f} km\n"
+            text += "\n"
+            # The query already ranked the hotels: keep its first rows
+            blocks.append(ContextBuilder._block((1, -idx), text, label="Hotel #{}\n"))
 
         # Additional options from reviews (works whether supporting_reviews is list or dict)
         sup = data.get("supporting_reviews")
@@ -70,54 +188,65 @@ class ContextBuilder:
                     extra.append(reviews[0] if isinstance(reviews, list) else {"hotel_name": hname})
 
         if extra:
-            context += "=== ADDITIONAL OPTIONS FROM REVIEWS ===\n"
-            for review in extra:
-                context += f"  • {review.get('hotel_name', 'N/A')} in {review.get('city', review.get('city_name', 'N/A'))}\n"
+            options = [ContextBuilder._review(
+                review.get('score'), "  • ",
+                f"{review.get('hotel_name', 'N/A')} in {review.get('city', review.get('city_name', 'N/A'))}", "\n")
+                for review in extra]
+            blocks.append(ContextBuilder._block((0,), "", options, "=== ADDITIONAL OPTIONS FROM REVIEWS ===\n"))
 
-        return context
+        return ContextBuilder._pack("=== AVAILABLE HOTELS ===\n\n", blocks, budget)
 
     @staticmethod
-    def _build_recommend(data: Dict[str, Any]) -> str:
+    def _build_recommend(data: Dict[str, Any], budget: Optional[int] = None) -> str:
         if not data.get('metadata', {}).get('has_results'):
             return "No recommendations available for this query."
 
-        context = "=== HOTEL RECOMMENDATIONS ===\n\n"
-
+        blocks = []
         for idx, hotel in enumerate(data.get('primary_results', [])[:5], 1):
             hotel_name = hotel.get('hotel_name', 'Unknown')
 
-            context += f"OPTION {idx}: {hotel_name}\n"
-            context += f"Location: {hotel.get('city_name', 'N/A')}, {hotel.get('country_name', 'N/A')}\n\n"
+            text = f"{hotel_name}\n"
+            text += f"Location: {hotel.get('city_name', 'N/A')}, {hotel.get('country_name', 'N/A')}\n"
+            if hotel.get('distance_km') is not None:
+                text += f"Distance: {float(hotel['distance_km']):.1f} km\n"
+            text += "\n"
 
-            context += "SCORES:\n"
+            text += "SCORES:\n"
             if hotel.get('overall_review_score') is not None:
-                context += f"  Overall: {float(hotel['overall_review_score']):.1f}/10\n"
+                text += f"  Overall: {float(hotel['overall_review_score']):.1f}/10\n"
 
             for aspect in ['cleanliness', 'comfort', 'facilities', 'location', 'staff', 'value_for_money']:
                 key = f'{aspect}_review'
                 if hotel.get(key) is not None:
-                    context += f"  {aspect.replace('_', ' ').title()}: {float(hotel[key]):.1f}/10\n"
+                    text += f"  {aspect.replace('_', ' ').title()}: {float(hotel[key]):.1f}/10\n"
 
             if hotel.get('composite_aspect_score') is not None:
-                context += f"  Composite Score: {float(hotel['composite_aspect_score']):.1f}/10\n"
+                text += f"  Composite Score: {float(hotel['composite_aspect_score']):.1f}/10\n"
+
+            if hotel.get('predicted_score') is not None:
+                text += f"  Predicted for similar travellers: {float(hotel['predicted_score']):.1f}/10\n"
 
             if hotel.get('review_count') is not None:
-                context += f"  Based on: {hotel['review_count']} reviews\n"
+                text += f"  Based on: {hotel['review_count']} reviews\n"
 
-            reviews = ContextBuilder._get_reviews_for_hotel(data, hotel_name)
-            if reviews:
-                context += "\nRECENT GUEST FEEDBACK:\n"
-                for review in reviews[:2]:
-                    traveller = review.get('traveller_type', 'Guest')
-                    text = (review.get('review_text', '') or '')[:200]
-                    context += f'  [{traveller}] "{text}..."\n'
+            reviews = [ContextBuilder._review(
+                review.get('score'), f"  [{review.get('traveller_type', 'Guest')}] \"",
+                (review.get('review_text', '') or '')[:200], "...\"\n")
+                for review in ContextBuilder._get_reviews_for_hotel(data, hotel_name)[:2]]
 
-            context += "\n" + "=" * 50 + "\n\n"
+            if hotel.get('distance_km') is not None:
+                # "Near X" results are ranked by distance: the nearest hotels are the most relevant
+                relevance = -float(hotel['distance_km'])
+            else:
+                relevance = float(hotel.get('composite_aspect_score', hotel.get('overall_review_score')) or 0)
+            blocks.append(ContextBuilder._block(
+                (1, relevance, -idx), text, reviews, "\nRECENT GUEST FEEDBACK:\n",
+                "\n" + "=" * 50 + "\n\n", required=(idx == 1), label="OPTION {}: "))
 
-        return context
+        return ContextBuilder._pack("=== HOTEL RECOMMENDATIONS ===\n\n", blocks, budget)
 
     @staticmethod
-    def _build_describe(data: Dict[str, Any]) -> str:
+    def _build_describe(data: Dict[str, Any], budget: Optional[int] = None) -> str:
         if not data.get('metadata', {}).get('has_results'):
             return "Hotel information not found."
 
@@ -142,18 +271,16 @@ class ContextBuilder:
         if hotel.get('review_count') is not None:
             context += f"\nTotal Reviews: {hotel['review_count']}\n"
 
-        reviews = ContextBuilder._get_reviews_for_hotel(data, hotel_name)
-        if reviews:
-            context += "\n=== GUEST EXPERIENCES ===\n\n"
-            for idx, review in enumerate(reviews[:5], 1):
-                traveller = review.get('traveller_type', 'Guest')
-                text = review.get('review_text', '') or ''
-                context += f"Review {idx} [{traveller}]:\n\"{text}\"\n\n"
+        reviews = [ContextBuilder._review(
+            review.get('score'), f"Review {idx} [{review.get('traveller_type', 'Guest')}]:\n\"",
+            review.get('review_text', '') or '', "\"\n\n")
+            for idx, review in enumerate(ContextBuilder._get_reviews_for_hotel(data, hotel_name)[:5], 1)]
 
-        return context
+        blocks = [ContextBuilder._block((1,), "", reviews, "\n=== GUEST EXPERIENCES ===\n\n", required=True)]
+        return ContextBuilder._pack(context, blocks, budget)
 
     @staticmethod
-    def _build_compare(data: Dict[str, Any]) -> str:
+    def _build_compare(data: Dict[str, Any], budget: Optional[int] = None) -> str:
         if not data.get('metadata', {}).get('has_results'):
             return "Comparison data not available."
 
@@ -185,44 +312,46 @@ class ContextBuilder:
                 context += f"{aspect_name:<20} | {h1_val:>15.1f} | {h2_val:>15.1f} | {diff_str:>10}\n"
 
         # Add reviews if available
-        sup = data.get("supporting_reviews")
-        if sup:
-            context += "\n=== GUEST REVIEWS ===\n\n"
-
-            r1 = ContextBuilder._get_reviews_for_hotel(data, h1_name)
-            if r1:
-                context += f"--- {h1_name} ---\n"
-                for review in r1[:2]:
-                    context += f"[{review.get('traveller_type', 'Guest')}] {(review.get('review_text','') or '')[:150]}...\n\n"
-
-            r2 = ContextBuilder._get_reviews_for_hotel(data, h2_name)
-            if r2:
-                context += f"--- {h2_name} ---\n"
-                for review in r2[:2]:
-                    context += f"[{review.get('traveller_type', 'Guest')}] {(review.get('review_text','') or '')[:150]}...\n\n"
-
-        return context
+        blocks = []
+        if data.get("supporting_reviews"):
+            blocks.append(ContextBuilder._block((1,), "\n=== GUEST REVIEWS ===\n\n"))
+            for idx, name in enumerate([h1_name, h2_name]):
+                reviews = [ContextBuilder._review(
+                    review.get('score'), f"[{review.get('traveller_type', 'Guest')}] ",
+                    (review.get('review_text', '') or '')[:150], "...\n\n")
+                    for review in ContextBuilder._get_reviews_for_hotel(data, name)[:2]]
+                blocks.append(ContextBuilder._block((0, -idx), "", reviews, f"--- {name} ---\n"))
+
+        return ContextBuilder._pack(context, blocks, budget)
 
     @staticmethod
-    def _build_visa(data: Dict[str, Any]) -> str:
+    def _build_visa(data: Dict[str, Any], budget: Optional[int] = None) -> str:
         if not data.get('metadata', {}).get('has_results'):
             return "Visa information not available."
 
-        visa = (data.get('primary_results') or [{}])[0]
+        visas = data.get('primary_results') or [{}]
 
-        context = "=== VISA REQUIREMENT ===\n\n"
-        context += f"From Country: {visa.get('from_country', 'Unknown')}\n"
-        context += f"To Country: {visa.get('to_country', 'Unknown')}\n"
-        context += f"Visa Required: {'YES' if visa.get('visa_required') else 'NO'}\n"
+        header = "=== VISA REQUIREMENT ===\n\n" if len(visas) == 1 else "=== VISA REQUIREMENTS (ITINERARY) ===\n\n"
+        blocks = []
+        for idx, visa in enumerate(visas):
+            text = f"From Country: {visa.get('from_country', 'Unknown')}\n"
+            text += f"To Country: {visa.get('to_country', 'Unknown')}\n"
+            text += f"Visa Required: {'YES' if visa.get('visa_required') else 'NO'}\n"
 
-        if visa.get('visa_type'):
-            context += f"Visa Type: {visa['visa_type']}\n"
+            if visa.get('visa_type'):
+                text += f"Visa Type: {visa['visa_type']}\n"
+            if len(visas) > 1:
+                text += "\n"
+            # Legs that need a visa are kept first, then the itinerary's order
+            blocks.append(ContextBuilder._block((bool(visa.get('visa_required')), -idx), text))
+        max(blocks, key=lambda block: block['score'])['required'] = True
 
-        return context
+        return ContextBuilder._pack(header, blocks, budget)
 
     @staticmethod
-    def _build_generic(data: Dict[str, Any]) -> str:
-        return json.dumps(data.get('primary_results', []), indent=2, ensure_ascii=False)
-
-
-print("ContextBuilder class defined")
+    def _build_generic(data: Dict[str, Any], budget: Optional[int] = None) -> str:
+        # One JSON object per line, so whole rows can be dropped from the end
+        blocks = [ContextBuilder._block((1, -idx), json.dumps(row, ensure_ascii=False, default=str) + "\n",
+                                        required=(idx == 0))
+                  for idx, row in enumerate(data.get('primary_results', []))]
+        return ContextBuilder._pack("", blocks, budget)
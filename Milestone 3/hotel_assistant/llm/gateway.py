@@ -0,0 +1,367 @@
+"""Shared LLM Gateway (concurrency limits, rate limiting, retries, per-call metrics)
+
+Every LLM call in the assistant goes through get_gateway().chat(caller, model, messages, ...)
+so that bursts queue up behind a per-model in-flight limit and a token bucket
+instead of failing, and transient API errors are retried with backoff.
+"""
+import logging
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..config import (LLM_MAX_IN_FLIGHT, LLM_MAX_IN_FLIGHT_PER_MODEL, LLM_RATE_LIMIT_RPS, LLM_RATE_LIMIT_BURST,
+                      LLM_REQUEST_TIMEOUT_S, LLM_MAX_RETRIES, LLM_BACKOFF_BASE_S, LLM_BACKOFF_MAX_S,
+                      LLM_QUEUE_TIMEOUT_S)
+from ..monitoring.metrics import CACHE_LOOKUPS, LLM_ERRORS, LLM_REQUEST_SECONDS, LLM_RETRIES, LLM_TOKENS
+from ..monitoring.stats import summarize
+from ..monitoring.tracing import start_span
+from .llm_client import get_llm_client
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+RETRYABLE_ERROR_NAMES = {"APITimeoutError", "APIConnectionError", "Timeout", "ReadTimeout", "ConnectTimeout"}
+
+
+class GatewayBusyError(RuntimeError):
+    """Raised when a request waited longer than the queue timeout for a slot."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, up to `capacity` stored."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """Block until `tokens` are available; False if that takes longer than timeout."""
+        if self.rate <= 0:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = (tokens - self._tokens) / self.rate
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class _CallStats:
+    """Counters for one (caller, model) pair."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_tokens = 0
+        self.queue_wait_ms = 0.0
+        self.latencies_ms = deque(maxlen=1000)
+
+
+def _is_retryable(error: Exception) -> bool:
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    return type(error).__name__ in RETRYABLE_ERROR_NAMES or isinstance(error, (TimeoutError, ConnectionError))
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds requested by a Retry-After header, if the error carries one."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        value = headers.get("retry-after")
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMGateway:
+    """Single entry point for chat completions shared by all callers."""
+
+    def __init__(self, client=None,
+                 max_in_flight: int = LLM_MAX_IN_FLIGHT,
+                 max_in_flight_per_model: Optional[Dict[str, int]] = None,
+                 rate_per_second: float = LLM_RATE_LIMIT_RPS,
+                 burst: int = LLM_RATE_LIMIT_BURST,
+                 request_timeout: float = LLM_REQUEST_TIMEOUT_S,
+                 max_retries: int = LLM_MAX_RETRIES,
+                 backoff_base: float = LLM_BACKOFF_BASE_S,
+                 backoff_max: float = LLM_BACKOFF_MAX_S,
+                 queue_timeout: float = LLM_QUEUE_TIMEOUT_S):
+        self._client = client
+        self.max_in_flight = max_in_flight
+        self.max_in_flight_per_model = dict(LLM_MAX_IN_FLIGHT_PER_MODEL if max_in_flight_per_model is None
+                                            else max_in_flight_per_model)
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.request_timeout = request_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.queue_timeout = queue_timeout
+
+        self._lock = threading.Lock()
+        self._slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._stats: Dict[Tuple[str, str], _CallStats] = defaultdict(_CallStats)
+
+    @property
+    def client(self):
+        return self._client if self._client is not None else get_llm_client()
+
+    def _limits_for(self, model: str) -> Tuple[threading.BoundedSemaphore, TokenBucket]:
+        with self._lock:
+            if model not in self._slots:
+                self._slots[model] = threading.BoundedSemaphore(self.max_in_flight_per_model.get(model, self.max_in_flight))
+                self._buckets[model] = TokenBucket(self.rate_per_second, self.burst)
+            return self._slots[model], self._buckets[model]
+
+    def chat(self, caller: str, model: str, messages: List[Dict[str, str]], stream: bool = False, **kwargs):
+        """
+        Run a chat completion through the gateway.
+
+        Args:
+            caller: Name used for metrics (e.g. "intent_classifier")
+            model: Model name
+            messages: Chat messages
+            stream: Return an iterator of chunks instead of a response
+            **kwargs: Passed to chat.completions.create (temperature, max_tokens, ...)
+
+        Raises:
+            GatewayBusyError: no slot or rate-limit token within the queue timeout
+            Exception: the last API error once retries are exhausted
+        """
+        slots, bucket = self._limits_for(model)
+        stats_key = (caller, model)
+        trace_span = start_span("llm.chat", caller=caller, model=model, stream=stream)
+        queued_at = time.perf_counter()
+        if not slots.acquire(timeout=self.queue_timeout):
+            self._record(stats_key, error=True)
+            error = GatewayBusyError(f"No free LLM slot for {model} within {self.queue_timeout}s")
+            _end_span(trace_span, error=error)
+            raise error
+        released = False
+        holding = {'slot': True}  # retries give the slot up while they back off
+        try:
+            if not bucket.acquire(timeout=self.queue_timeout):
+                self._record(stats_key, error=True)
+                raise GatewayBusyError(f"Rate limit for {model} not cleared within {self.queue_timeout}s")
+            queue_wait_ms = (time.perf_counter() - queued_at) * 1000
+
+            kwargs.setdefault("timeout", self.request_timeout)
+            start = time.perf_counter()
+            response, retries = self._create_with_retries(stats_key, model, messages, stream, kwargs,
+                                                          slots, bucket, holding)
+            if stream:
+                released = True
+                return _GatewayStream(self, response, slots, stats_key, start, retries, queue_wait_ms, trace_span)
+            self._record(stats_key, latency_ms=(time.perf_counter() - start) * 1000, usage=response.usage,
+                         retries=retries, queue_wait_ms=queue_wait_ms)
+            _end_span(trace_span, usage=response.usage, retries=retries, queue_wait_ms=queue_wait_ms)
+            return response
+        except Exception as e:
+            _end_span(trace_span, error=e)
+            raise
+        finally:
+            if not released and holding['slot']:
+                slots.release()
+
+    def _create_with_retries(self, stats_key, model, messages, stream, kwargs, slots, bucket, holding):
+        """
+        The API call with retries on transient errors, all within the request timeout.
+
+        Backoff (a Retry-After header included) is capped at backoff_max, fails fast when it would
+        outlast the timeout and is slept without the model's slot. Each retry re-acquires the slot
+        and takes a rate-limit token like the first attempt.
+        """
+        retries = 0
+        timeout = kwargs.get("timeout")
+        deadline = time.monotonic() + timeout if timeout else None
+        while True:
+            try:
+                create_kwargs = dict(kwargs, stream=True) if stream else dict(kwargs)
+                if deadline is not None and retries:
+                    create_kwargs["timeout"] = max(deadline - time.monotonic(), 0.001)
+                return self.client.chat.completions.create(model=model, messages=messages, **create_kwargs), retries
+            except Exception as e:
+                delay = _retry_after(e)
+                if delay is None:
+                    delay = self.backoff_base * (2 ** retries) * random.uniform(0.5, 1.0)
+                delay = min(delay, self.backoff_max)
+                out_of_time = deadline is not None and time.monotonic() + delay >= deadline
+                if retries >= self.max_retries or not _is_retryable(e) or out_of_time:
+                    self._record(stats_key, error=True, retries=retries)
+                    logger.warning("LLM call %s/%s failed after %d retries: %s", stats_key[0], model, retries, e)
+                    raise
+                retries += 1
+                logger.info("Retrying LLM call %s/%s in %.2fs (%s)", stats_key[0], model, delay, e)
+                slots.release()
+                holding['slot'] = False
+                time.sleep(delay)
+                if not slots.acquire(timeout=self.queue_timeout):
+                    self._record(stats_key, error=True, retries=retries)
+                    raise GatewayBusyError(f"No free LLM slot for {model} within {self.queue_timeout}s (retry)")
+                holding['slot'] = True
+                if not bucket.acquire(timeout=self.queue_timeout):
+                    self._record(stats_key, error=True, retries=retries)
+                    raise GatewayBusyError(f"Rate limit for {model} not cleared within {self.queue_timeout}s (retry)")
+
+    def _record(self, key: Tuple[str, str], latency_ms: Optional[float] = None, usage: Any = None,
+                retries: int = 0, queue_wait_ms: float = 0.0, error: bool = False):
+        _record_metrics(key, latency_ms, usage, retries, error)
+        with self._lock:
+            stats = self._stats[key]
+            stats.calls += 1
+            stats.errors += int(error)
+            stats.retries += retries
+            stats.queue_wait_ms += queue_wait_ms
+            if latency_ms is not None and not error:
+                stats.latencies_ms.append(latency_ms)
+            if usage is not None:
+                stats.prompt_tokens += getattr(usage, "prompt_tokens", 0) or 0
+                stats.completion_tokens += getattr(usage, "completion_tokens", 0) or 0
+                details = getattr(usage, "prompt_tokens_details", None)
+                stats.cached_tokens += (getattr(details, "cached_tokens", 0) or 0) if details is not None else 0
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Per "caller/model" counters and latency percentiles."""
+        with self._lock:
+            snapshot = {key: (s.calls, s.errors, s.retries, s.prompt_tokens, s.completion_tokens, s.cached_tokens,
+                              s.queue_wait_ms, list(s.latencies_ms)) for key, s in self._stats.items()}
+        return {
+            f"{caller}/{model}": {
+                'calls': calls,
+                'errors': errors,
+                'retries': retries,
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'cached_tokens': cached_tokens,
+                'avg_queue_wait_ms': queue_wait_ms / calls if calls else 0.0,
+                'latency_ms': summarize(latencies)
+            }
+            for (caller, model), (calls, errors, retries, prompt_tokens, completion_tokens, cached_tokens,
+                                  queue_wait_ms, latencies)
+            in snapshot.items()
+        }
+
+
+def _record_metrics(key: Tuple[str, str], latency_ms: Optional[float], usage: Any, retries: int, error: bool):
+    """Feed the process-wide metrics registry."""
+    caller, model = key
+    if retries:
+        LLM_RETRIES.inc(retries, model=model)
+    if error:
+        LLM_ERRORS.inc(model=model, caller=caller)
+    elif latency_ms is not None:
+        LLM_REQUEST_SECONDS.observe(latency_ms / 1000, model=model, caller=caller)
+    if usage is not None:
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = (getattr(details, "cached_tokens", 0) or 0) if details is not None else 0
+        LLM_TOKENS.inc(getattr(usage, "prompt_tokens", 0) or 0, model=model, kind="prompt")
+        LLM_TOKENS.inc(getattr(usage, "completion_tokens", 0) or 0, model=model, kind="completion")
+        LLM_TOKENS.inc(cached, model=model, kind="cached")
+        CACHE_LOOKUPS.inc(cache="llm_prompt_prefix", result="hit" if cached else "miss")
+
+
+def _end_span(trace_span, usage: Any = None, retries: int = 0, queue_wait_ms: float = 0.0,
+              error: Optional[BaseException] = None):
+    """Attach token counts and queueing info to the request's trace span, if tracing."""
+    if trace_span is None:
+        return
+    trace_span.set_attributes(retries=retries, queue_wait_ms=round(queue_wait_ms, 1))
+    if usage is not None:
+        details = getattr(usage, "prompt_tokens_details", None)
+        trace_span.set_attributes(
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+            cached_tokens=(getattr(details, "cached_tokens", 0) or 0) if details is not None else 0
+        )
+    trace_span.end(error)
+
+
+class _GatewayStream:
+    """Chunk iterator that holds the model slot until it is exhausted, closed or collected."""
+
+    def __init__(self, gateway: LLMGateway, stream, slots, stats_key, start, retries, queue_wait_ms, trace_span=None):
+        self._gateway = gateway
+        self._stream = iter(stream)
+        self._slots = slots
+        self._stats_key = stats_key
+        self._start = start
+        self._retries = retries
+        self._queue_wait_ms = queue_wait_ms
+        self._trace_span = trace_span
+        self._usage = None
+        self._done = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            chunk = next(self._stream)
+        except StopIteration:
+            self._finish(failed=False)
+            raise
+        except Exception:
+            self._finish(failed=True)
+            raise
+        if getattr(chunk, "usage", None) is not None:
+            self._usage = chunk.usage
+        return chunk
+
+    def close(self):
+        self._finish(failed=False)
+
+    def __del__(self):
+        self._finish(failed=False)
+
+    def _finish(self, failed: bool):
+        if self._done:
+            return
+        self._done = True
+        self._slots.release()
+        self._gateway._record(self._stats_key, latency_ms=(time.perf_counter() - self._start) * 1000,
+                              usage=self._usage, retries=self._retries, queue_wait_ms=self._queue_wait_ms,
+                              error=failed)
+        _end_span(self._trace_span, usage=self._usage, retries=self._retries, queue_wait_ms=self._queue_wait_ms,
+                  error=RuntimeError("stream failed") if failed else None)
+
+
+_gateway: Optional[LLMGateway] = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway() -> LLMGateway:
+    """Return the process-wide gateway."""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = LLMGateway()
+        return _gateway
+
+
+def set_gateway(gateway: LLMGateway) -> Optional[LLMGateway]:
+    """Replace the process-wide gateway (e.g. with a stub-backed one for benchmarks); returns the old one."""
+    global _gateway
+    with _gateway_lock:
+        previous, _gateway = _gateway, gateway
+        return previous
@@ -0,0 +1,382 @@
+"""Pluggable LLM Client (live OpenAI, in-process stub, record and replay)
+
+All modes expose the OpenAI client surface used by the assistant:
+client.chat.completions.create(model=..., messages=..., stream=..., ...)
+"""
+import ast
+import csv
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ..config import (OPENAI_API_KEY, LLM_CLIENT_MODE, LLM_BASE_URL, LLM_CASSETTE_DIR,
+                      STUB_LLM_TTFT_MS, STUB_LLM_TTFT_SIGMA, STUB_LLM_TOKENS_PER_SECOND,
+                      STUB_LLM_COMPLETION_TOKENS, INTENT_TYPES, ASPECT_TYPES)
+from .token_counter import count_tokens
+
+CLIENT_MODES = ("live", "stub", "record", "replay")
+
+# Provider prompt caching: prefixes of at least 1024 tokens, reused in 128-token blocks
+PREFIX_CACHE_MIN_TOKENS = 1024
+PREFIX_CACHE_BLOCK_TOKENS = 128
+
+_DATASET_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                            'KnowledgeGraph', 'Dataset')
+
+_clients: Dict[str, Any] = {}
+_clients_lock = threading.Lock()
+
+
+def get_llm_client(mode: Optional[str] = None):
+    """Return the shared client for a mode (defaults to LLM_CLIENT_MODE)."""
+    mode = mode or LLM_CLIENT_MODE
+    if mode not in CLIENT_MODES:
+        raise ValueError(f"Unknown LLM client mode '{mode}', expected one of {CLIENT_MODES}")
+    with _clients_lock:
+        if mode not in _clients:
+            if mode == "live":
+                _clients[mode] = _create_openai_client()
+            elif mode == "stub":
+                _clients[mode] = StubClient()
+            elif mode == "record":
+                _clients[mode] = RecordingClient(_create_openai_client(), LLM_CASSETTE_DIR)
+            else:
+                _clients[mode] = ReplayClient(LLM_CASSETTE_DIR)
+        return _clients[mode]
+
+
+def _create_openai_client():
+    from openai import OpenAI
+    # LLM_BASE_URL lets the live client talk to the local stub server, which needs no real key.
+    # Retries are handled by the LLM gateway, so the SDK's own retries are disabled.
+    return OpenAI(api_key=OPENAI_API_KEY or ("local" if LLM_BASE_URL else None), base_url=LLM_BASE_URL,
+                  max_retries=0)
+
+
+def _to_namespace(value: Any) -> Any:
+    """Turn response dicts into objects with attribute access like the OpenAI SDK."""
+    if isinstance(value, dict):
+        return SimpleNamespace(**{k: _to_namespace(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return [_to_namespace(v) for v in value]
+    return value
+
+
+def _to_dict(value: Any) -> Any:
+    """Serialize SDK response objects (pydantic) or namespaces back into dicts."""
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    if isinstance(value, SimpleNamespace):
+        return {k: _to_dict(v) for k, v in vars(value).items()}
+    if isinstance(value, list):
+        return [_to_dict(v) for v in value]
+    return value
+
+
+def request_key(request: Dict[str, Any]) -> str:
+    """Stable cassette key for a chat completion request."""
+    keyed = {k: request.get(k) for k in ("model", "messages", "temperature", "max_tokens", "stream")}
+    return hashlib.sha256(json.dumps(keyed, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class LatencyModel:
+    """Time-to-first-token (log-normal around a median) and a decode token rate."""
+
+    def __init__(self, ttft_ms: float = STUB_LLM_TTFT_MS, ttft_sigma: float = STUB_LLM_TTFT_SIGMA,
+                 tokens_per_second: float = STUB_LLM_TOKENS_PER_SECOND, seed: Optional[int] = None):
+        self.ttft_ms = ttft_ms
+        self.ttft_sigma = ttft_sigma
+        self.tokens_per_second = tokens_per_second
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample_ttft(self) -> float:
+        """Seconds until the first token."""
+        if self.ttft_ms <= 0:
+            return 0.0
+        with self._lock:
+            return self._random.lognormvariate(math.log(self.ttft_ms), self.ttft_sigma) / 1000
+
+    def decode_time(self, tokens: int) -> float:
+        """Seconds needed to emit `tokens` tokens."""
+        return tokens / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+
+class StubResponder:
+    """
+    Produces plausible completions without a model.
+
+    Intent-classification and entity-extraction prompts get keyword-based answers
+    so the Cypher stage still receives usable entities; everything else gets
+    filler text of a configurable length.
+    """
+
+    def __init__(self, completion_tokens: int = STUB_LLM_COMPLETION_TOKENS):
+        self.completion_tokens = completion_tokens
+        self._cities, self._countries = self._load_places()
+
+    @staticmethod
+    def _load_places() -> Tuple[List[str], List[str]]:
+        cities, countries = set(), set()
+        try:
+            with open(os.path.join(_DATASET_DIR, 'hotels.csv'), 'r', encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    cities.add(row['city'])
+                    countries.add(row['country'])
+        except OSError:
+            pass
+        # Longest names first so "United Arab Emirates" wins over shorter matches
+        return sorted(cities, key=len, reverse=True), sorted(countries, key=len, reverse=True)
+
+    def respond(self, messages: List[Dict[str, str]], max_tokens: Optional[int] = None) -> str:
+        prompt = messages[-1].get("content", "") if messages else ""
+        if "Classify this query" in prompt:
+            return self._classify(self._quoted_query(prompt))
+        if "Extract entities" in prompt:
+            return json.dumps(self._extract(self._quoted_query(prompt), prompt))
+        return self._filler(prompt, min(max_tokens or self.completion_tokens, self.completion_tokens))
+
+    @staticmethod
+    def _quoted_query(prompt: str) -> str:
+        match = re.search(r'Query:\s*"(.*?)"', prompt, re.S)
+        return match.group(1) if match else prompt
+
+    @staticmethod
+    def _classify(query: str) -> str:
+        q = query.lower()
+        rules = [
+            ("CHECK_VISA", ("visa", "entry requirement")),
+            ("COMPARE_HOTELS", ("compare", " vs ", "difference between", "which is better")),
+            ("RECOMMEND_HOTEL", ("recommend", "suggest", "best", "top ", " for families", " for couples")),
+            ("DESCRIBE_HOTEL", ("tell me about", "describe", "details about", "how is", "what's the")),
+            ("LIST_HOTELS", ("show", "list", "find", "hotels in", "what hotels")),
+        ]
+        for intent, keywords in rules:
+            if intent in INTENT_TYPES and any(k in q for k in keywords):
+                return intent
+        return "NONE"
+
+    def _extract(self, query: str, prompt: str) -> Dict[str, Any]:
+        keys_match = re.search(r'Required keys:\s*(\[.*?\])', prompt)
+        keys = ast.literal_eval(keys_match.group(1)) if keys_match else []
+        q = query.lower()
+        found: Dict[str, Any] = {}
+
+        star = re.search(r'([1-5])[- ]star', q)
+        if star:
+            found['star_rating'] = int(star.group(1))
+        for city in self._cities:
+            if city.lower() in q:
+                found['city'] = city
+                break
+        for country in self._countries:
+            if country.lower() in q:
+                found['country'] = country
+                break
+        for traveller_type in ("family", "solo", "couple", "business", "group"):
+            if traveller_type in q or (traveller_type == "family" and "families" in q):
+                found['traveller_type'] = traveller_type
+                break
+        for gender in ("female", "male"):
+            if gender in q:
+                found['user_gender'] = gender
+                break
+        near = re.search(r'\b(?:near|close to|around|(?:km|miles?) of)\s+(?:the\s+)?(.+?)(?:\s+within\b|[?.]?$)',
+                         query, re.I)
+        if near:
+            found['near'] = near.group(1).strip()
+        radius = re.search(r'within\s+(\d+(?:\.\d+)?)\s*(km|kilometers?|kilometres?|miles?)', q)
+        if radius:
+            found['radius_km'] = float(radius.group(1)) * (1.6 if radius.group(2).startswith('mile') else 1.0)
+        aspects = [a for a in ASPECT_TYPES if a.replace('_', ' ') in q or (a == "cleanliness" and "clean" in q)]
+        if aspects:
+            found['aspects'] = aspects
+
+        trip = [part.strip(" ?.") for part in re.split(r'\s*(?:→|->)\s*', query)]
+        visa = re.search(r'from (.+?) to (.+?)[?.]?$', query, re.I)
+        if len(trip) > 2:
+            found['from_country'] = re.sub(r'^.*\bfrom\s+', '', trip[0], flags=re.I)
+            found['to_country'], found['destinations'] = trip[1], trip[1:]
+        elif visa:
+            found['from_country'], found['to_country'] = visa.group(1).strip(), visa.group(2).strip()
+        else:
+            visa = re.search(r'for (.+?) from (.+?)[?.]?$', query, re.I)
+            if visa:
+                found['to_country'], found['from_country'] = visa.group(1).strip(), visa.group(2).strip()
+        if found.get('to_country') and 'destinations' not in found:
+            destinations = [d for d in re.split(r',\s*|\s+and\s+', found['to_country']) if d]
+            if len(destinations) > 1:
+                found['to_country'], found['destinations'] = destinations[0], destinations
+
+        hotels = re.search(r'compare (.+?) (?:and|vs\.?|with) (.+?)(?: for | on |\?|$)', query, re.I)
+        if hotels:
+            found['hotel1'], found['hotel2'] = hotels.group(1).strip(), hotels.group(2).strip()
+        hotel = re.search(r"\bat\s+(.+?)(?:'s|\?|$)", query, re.I) or \
+            re.search(r"(?:about|describe)\s+(.+?)(?:'s|\?|$)", query, re.I)
+        if hotel:
+            found['hotel_name'] = hotel.group(1).strip()
+
+        return {key: found.get(key) for key in keys}
+
+    @staticmethod
+    def _filler(prompt: str, tokens: int) -> str:
+        words = ["This", "is", "a", "stub", "answer", "generated", "for", "offline", "benchmarking."]
+        seed_words = re.findall(r'\w+', prompt[-200:])[:8]
+        out = seed_words + [words[i % len(words)] for i in range(max(tokens - len(seed_words), 1))]
+        return " ".join(out)
+
+
+def _usage_payload(prompt_tokens: int, completion_tokens: int, cached_tokens: int) -> Dict[str, Any]:
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached_tokens}}
+
+
+def _completion_payload(model: str, content: str, usage: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": f"chatcmpl-stub-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": usage
+    }
+
+
+def _chunk_payload(completion_id: str, model: str, content: Optional[str] = None,
+                   finish_reason: Optional[str] = None, usage: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    choices = [] if usage is not None else [
+        {"index": 0, "delta": {"content": content} if content is not None else {}, "finish_reason": finish_reason}]
+    return {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+            "model": model, "choices": choices, "usage": usage}
+
+
+class StubEngine:
+    """Builds OpenAI-shaped payloads with simulated timing; shared by StubClient and the stub server."""
+
+    def __init__(self, latency: Optional[LatencyModel] = None, responder: Optional[StubResponder] = None):
+        self.latency = latency or LatencyModel()
+        self.responder = responder or StubResponder()
+        self._recent_prompts = deque(maxlen=64)
+        self._lock = threading.Lock()
+
+    def _cached_tokens(self, prompt: str) -> int:
+        """Simulate provider prefix caching against recently seen prompts."""
+        with self._lock:
+            shared = max((len(os.path.commonprefix([prompt, seen])) for seen in self._recent_prompts), default=0)
+            self._recent_prompts.append(prompt)
+        tokens = count_tokens(prompt[:shared])
+        if tokens < PREFIX_CACHE_MIN_TOKENS:
+            return 0
+        return tokens // PREFIX_CACHE_BLOCK_TOKENS * PREFIX_CACHE_BLOCK_TOKENS
+
+    def _answer(self, request: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        messages = request.get("messages", [])
+        content = self.responder.respond(messages, request.get("max_tokens"))
+        prompt = "".join(f"{m.get('role')}\n{m.get('content', '')}\n" for m in messages)
+        return content, _usage_payload(count_tokens(prompt), count_tokens(content), self._cached_tokens(prompt))
+
+    def completion(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Non-streamed completion; sleeps for ttft plus decode time."""
+        content, usage = self._answer(request)
+        time.sleep(self.latency.sample_ttft() + self.latency.decode_time(usage["completion_tokens"]))
+        return _completion_payload(request.get("model", "stub"), content, usage)
+
+    def stream(self, request: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Streamed completion chunks, paced by the latency model."""
+        content, usage = self._answer(request)
+        model = request.get("model", "stub")
+        completion_id = f"chatcmpl-stub-{uuid.uuid4().hex[:12]}"
+        time.sleep(self.latency.sample_ttft())
+        words = content.split(" ")
+        for i, word in enumerate(words):
+            piece = word if i == 0 else " " + word
+            if i:
+                time.sleep(self.latency.decode_time(count_tokens(piece)))
+            yield _chunk_payload(completion_id, model, content=piece)
+        yield _chunk_payload(completion_id, model, finish_reason="stop")
+        if (request.get("stream_options") or {}).get("include_usage"):
+            yield _chunk_payload(completion_id, model, usage=usage)
+
+
+class _Completions:
+    def __init__(self, create):
+        self.create = create
+
+
+class _Chat:
+    def __init__(self, create):
+        self.completions = _Completions(create)
+
+
+class StubClient:
+    """In-process stand-in for the OpenAI client (no network, no API key)."""
+
+    def __init__(self, engine: Optional[StubEngine] = None):
+        self.engine = engine or StubEngine()
+        self.chat = _Chat(self._create)
+
+    def _create(self, **request):
+        if request.get("stream"):
+            return (_to_namespace(chunk) for chunk in self.engine.stream(request))
+        return _to_namespace(self.engine.completion(request))
+
+
+class RecordingClient:
+    """Wraps a real client and writes every request/response pair to the cassette directory."""
+
+    def __init__(self, inner, cassette_dir: str = LLM_CASSETTE_DIR):
+        self.inner = inner
+        self.cassette_dir = cassette_dir
+        os.makedirs(cassette_dir, exist_ok=True)
+        self.chat = _Chat(self._create)
+
+    def _save(self, request: Dict[str, Any], payload: Dict[str, Any]):
+        path = os.path.join(self.cassette_dir, f"{request_key(request)}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"request": {k: request.get(k) for k in ("model", "messages", "temperature", "max_tokens", "stream")},
+                       **payload}, f, ensure_ascii=False, indent=2)
+
+    def _create(self, **request):
+        response = self.inner.chat.completions.create(**request)
+        if not request.get("stream"):
+            self._save(request, {"response": _to_dict(response)})
+            return response
+
+        def recorded():
+            chunks = []
+            for chunk in response:
+                chunks.append(_to_dict(chunk))
+                yield chunk
+            self._save(request, {"chunks": chunks})
+        return recorded()
+
+
+class ReplayClient:
+    """Serves recorded responses; unknown requests raise unless a fallback client is given."""
+
+    def __init__(self, cassette_dir: str = LLM_CASSETTE_DIR, fallback=None):
+        self.cassette_dir = cassette_dir
+        self.fallback = fallback
+        self.chat = _Chat(self._create)
+
+    def _create(self, **request):
+        path = os.path.join(self.cassette_dir, f"{request_key(request)}.json")
+        if not os.path.exists(path):
+            if self.fallback is not None:
+                return self.fallback.chat.completions.create(**request)
+            raise LookupError(f"No recorded LLM response for request {request_key(request)[:12]} in {self.cassette_dir}")
+        with open(path, 'r', encoding='utf-8') as f:
+            cassette = json.load(f)
+        if request.get("stream"):
+            return (_to_namespace(chunk) for chunk in cassette.get("chunks", []))
+        return _to_namespace(cassette["response"])
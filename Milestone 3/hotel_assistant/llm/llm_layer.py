@@ -1,14 +1,51 @@
 """Main LLM Layer for Response Generation"""
-import os
+import time
 from typing import List, Dict, Any, Optional
-from openai import OpenAI
+from .gateway import get_gateway
 from .prompt_engine import PromptEngine
 from .context_builder import ContextBuilder
 from .result_merger import merge_and_rank_results
+from ..monitoring.tracing import span, traced
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
+def _stream_completion(messages: List[Dict], model: str, temperature: float, max_tokens: int, start: float,
+                       **kwargs):
+    """Consume a streamed completion; returns (answer, usage, finish_reason, ttft_ms)."""
+    stream = get_gateway().chat(
+        "llm_layer",
+        model=model,
+        messages=messages,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        stream=True,
+        stream_options={"include_usage": True},
+        **kwargs
+    )
+
+    parts, usage, finish_reason, ttft_ms = [], None, None, None
+    for chunk in stream:
+        if getattr(chunk, 'usage', None) is not None:
+            usage = chunk.usage
+        if not chunk.choices:
+            continue
+        choice = chunk.choices[0]
+        content = getattr(choice.delta, 'content', None)
+        if content:
+            if ttft_ms is None:
+                ttft_ms = (time.perf_counter() - start) * 1000
+            parts.append(content)
+        if choice.finish_reason:
+            finish_reason = choice.finish_reason
+    return "".join(parts), usage, finish_reason, ttft_ms
+
+
+def _cached_tokens(usage) -> int:
+    """Prompt tokens served from the provider's prefix cache (0 when not reported)."""
+    details = getattr(usage, 'prompt_tokens_details', None)
+    return (getattr(details, 'cached_tokens', 0) or 0) if details is not None else 0
+
+
+@traced("llm.generate")
 def llm_layer(
     user_query: str,
     intent: str,
@@ -16,7 +53,10 @@ def llm_layer(
     embedding_output: Optional[List[Dict]] = None,
     model: str = "gpt-4o-mini",
     temperature: float = 0.0,
-    max_tokens: int = 1000
+    max_tokens: int = 1000,
+    context_token_budget: Optional[int] = None,
+    stream: bool = False,
+    timeout: Optional[float] = None
 ) -> Dict[str, Any]:
     """
     Production-grade LLM layer with:
@@ -33,42 +73,61 @@ def llm_layer(
         model: GPT model (gpt-4o-mini, gpt-4o, gpt-4-turbo)
         temperature: 0.0 for deterministic, higher for creative
         max_tokens: Max response length
+        context_token_budget: Max context tokens (defaults to the intent's budget in config)
+        stream: Stream the completion to measure time-to-first-token
+        timeout: Per-request LLM timeout in seconds (defaults to the gateway's)
     
     Returns:
         Complete response with metadata and quality metrics
     """
     
-    # Step 1: Merge and deduplicate results
-    merged_data = merge_and_rank_results(cypher_output, embedding_output, intent)
-    
-    # Step 2: Build optimized context
-    context = ContextBuilder.build(intent, merged_data)
+    with span("llm.context", intent=intent) as context_span:
+        # Step 1: Merge and deduplicate results
+        merged_data = merge_and_rank_results(cypher_output, embedding_output, intent)
+        
+        # Step 2: Build optimized context within the token budget
+        context, context_stats = ContextBuilder.build_with_stats(intent, merged_data, context_token_budget)
+        context_span.set_attributes(**context_stats)
     
     # Step 3: Generate intent-specific prompts
     system_prompt, user_prompt = PromptEngine.get_prompts(intent, user_query, context)
     
     # Step 4: Call LLM with error handling
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]
+    extra = {"timeout": timeout} if timeout is not None else {}
+    start = time.perf_counter()
     try:
-        response = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=temperature,
-            max_tokens=max_tokens
-        )
-        
-        answer = response.choices[0].message.content
-        tokens_used = response.usage.total_tokens
-        finish_reason = response.choices[0].finish_reason
+        if stream:
+            answer, usage, finish_reason, ttft_ms = _stream_completion(messages, model, temperature, max_tokens,
+                                                                       start, **extra)
+        else:
+            response = get_gateway().chat(
+                "llm_layer",
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                **extra
+            )
+            answer = response.choices[0].message.content
+            usage = response.usage
+            finish_reason = response.choices[0].finish_reason
+            ttft_ms = None
+        latency_ms = (time.perf_counter() - start) * 1000
+        tokens_used = usage.total_tokens if usage else 0
+        prompt_tokens = usage.prompt_tokens if usage else 0
+        cached_tokens = _cached_tokens(usage)
         
     except Exception as e:
         return {
             'success': False,
             'error': str(e),
             'model': model,
-            'intent': intent
+            'intent': intent,
+            'latency_ms': (time.perf_counter() - start) * 1000
         }
     
     # Step 5: Return comprehensive result
@@ -83,6 +142,15 @@ def llm_layer(
             'embedding_results_count': merged_data['metadata']['embedding_count'],
             'has_results': merged_data['metadata']['has_results'],
             'tokens_used': tokens_used,
+            'prompt_tokens': prompt_tokens,
+            'cached_tokens': cached_tokens,
+            'cache_hit_ratio': cached_tokens / prompt_tokens if prompt_tokens else 0.0,
+            'completion_tokens': usage.completion_tokens if usage else 0,
+            'latency_ms': latency_ms,
+            'ttft_ms': ttft_ms,
+            'context_tokens': context_stats['context_tokens'],
+            'context_tokens_saved': context_stats['context_tokens_saved'],
+            'context_token_budget': context_stats['context_token_budget'],
             'finish_reason': finish_reason,
             'temperature': temperature
         },
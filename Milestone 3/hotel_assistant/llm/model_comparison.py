@@ -1,45 +1,159 @@
 """Model Comparison Utilities"""
-from typing import List, Dict, Any
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from ..config import AVAILABLE_MODELS
+from ..monitoring.stats import summarize
 from .llm_layer import llm_layer
 
+
 def compare_models(
     user_query: str,
     intent: str,
     cypher_output: List[Dict],
     embedding_output: Optional[List[Dict]] = None,
-    models: List[str] = ["gpt-4o-mini", "gpt-4o", "gpt-4-turbo"]
+    models: Optional[List[str]] = None
 ) -> Dict[str, Any]:
-    """Compare multiple models on the same query."""
-    
-    results = {}
-    
-    print(f"\\nComparing {len(models)} models on query: '{user_query}'")
-    print("=" * 80)
-    
-    for model in models:
-        print(f"\\nTesting {model}...")
-        result = llm_layer(
-            user_query=user_query,
-            intent=intent,
-            cypher_output=cypher_output,
-            embedding_output=embedding_output,
-            model=model
-        )
-        results[model] = result
-        
-        if result['success']:
-            print(f"✓ Generated {len(result['response'])} chars, {result['metadata']['tokens_used']} tokens")
-        else:
-            print(f"✗ Error: {result['error']}")
-    
+    """Compare multiple models on the same query (models run concurrently)."""
+    models = list(AVAILABLE_MODELS) if models is None else models
+    case = {'query': user_query, 'intent': intent,
+            'cypher_output': cypher_output, 'embedding_output': embedding_output}
+    suite = compare_models_on_suite([case], models)
+    results = {m: suite['model_results'][m][0] for m in models}
+
     return {
         'query': user_query,
         'intent': intent,
         'model_results': results,
         'comparison': {
             'tokens_used': {m: results[m]['metadata']['tokens_used'] for m in models if results[m]['success']},
-            'response_lengths': {m: len(results[m]['response']) for m in models if results[m]['success']}
+            'response_lengths': {m: len(results[m]['response']) for m in models if results[m]['success']},
+            'latency_ms': {m: results[m]['metadata']['latency_ms'] for m in models if results[m]['success']},
+            'ttft_ms': {m: results[m]['metadata']['ttft_ms'] for m in models if results[m]['success']}
         }
     }
 
-print("compare_models function defined")
\ No newline at end of file
+
+def pipeline_prepare(pipeline=None, use_rag: bool = False) -> Callable[[str], Dict[str, Any]]:
+    """
+    A `prepare` that retrieves like the chat pipeline (classify, extract, Cypher and, with use_rag,
+    the vector search). Without a pipeline, one is created on a new Neo4j connection.
+    """
+    if pipeline is None:
+        from ..pipeline.query_pipeline import create_query_pipeline
+        pipeline = create_query_pipeline()
+    return lambda query: pipeline.retrieve(query, use_rag=use_rag)
+
+
+def compare_models_on_suite(
+    cases: List[Dict[str, Any]],
+    models: Optional[List[str]] = None,
+    prepare: Optional[Callable[[str], Dict[str, Any]]] = None,
+    concurrency_per_model: int = 1,
+    stream: bool = True
+) -> Dict[str, Any]:
+    """
+    Run every model over a query suite concurrently and report latency statistics.
+
+    Each model gets its own worker pool, so the suite takes about as long as the
+    slowest model. Retrieval is done once per case and shared by all models.
+
+    Args:
+        cases: Dicts with 'query' and either 'intent'/'cypher_output'/'embedding_output'
+               or nothing else (e.g. from load_test_cases), in which case they are prepared
+        models: Models to compare (default: AVAILABLE_MODELS)
+        prepare: Callable(query) -> {'intent', 'cypher_output', 'embedding_output'}; defaults to
+                 pipeline_prepare() when a case has no 'cypher_output', so no model answers from empty context
+        concurrency_per_model: In-flight requests per model
+        stream: Stream completions so time-to-first-token is measured
+
+    Returns:
+        Per-model raw results and stats (latency/ttft percentiles, tokens per second, errors)
+    """
+    models = list(AVAILABLE_MODELS) if models is None else models
+    if prepare is None and any('cypher_output' not in case for case in cases):
+        prepare = pipeline_prepare()
+    if prepare is not None:
+        with ThreadPoolExecutor(max_workers=max(1, min(8, len(cases)))) as pool:
+            prepared = list(pool.map(lambda case: {**case, **prepare(case['query'])}, cases))
+    else:
+        prepared = cases
+
+    print(f"\nComparing {len(models)} models on {len(prepared)} queries")
+    print("=" * 80)
+
+    finished_at: Dict[str, float] = {}
+    lock = threading.Lock()
+
+    def run(model: str, case: Dict[str, Any]) -> Dict[str, Any]:
+        result = llm_layer(
+            user_query=case['query'],
+            intent=case.get('intent'),
+            cypher_output=case.get('cypher_output') or [],
+            embedding_output=case.get('embedding_output'),
+            model=model,
+            stream=stream
+        )
+        with lock:
+            finished_at[model] = max(finished_at.get(model, 0.0), time.perf_counter() - start)
+        return result
+
+    start = time.perf_counter()
+    pools = {m: ThreadPoolExecutor(max_workers=concurrency_per_model) for m in models}
+    futures = {m: [pools[m].submit(run, m, case) for case in prepared] for m in models}
+    results = {}
+    try:
+        for model in models:
+            results[model] = []
+            for future in futures[model]:
+                try:
+                    results[model].append(future.result())
+                except Exception as e:
+                    results[model].append({'success': False, 'error': str(e), 'model': model})
+    finally:
+        for pool in pools.values():
+            pool.shutdown(wait=False)
+    wall_time_s = time.perf_counter() - start
+
+    stats = {m: _model_stats(results[m]) for m in models}
+    for model in models:
+        s = stats[model]
+        print(f"{model:15} p50 {_fmt(s['latency_ms']['p50'])} ms | p95 {_fmt(s['latency_ms']['p95'])} ms | "
+              f"ttft p50 {_fmt(s['ttft_ms']['p50'])} ms | {_fmt(s['tokens_per_second'])} tok/s | {s['errors']} errors")
+    print(f"Wall time: {wall_time_s:.2f}s")
+
+    return {
+        'queries': [case['query'] for case in prepared],
+        'model_results': results,
+        'stats': stats,
+        'wall_time_s': wall_time_s,
+        # Time until each model's last query finished, measured from the shared start
+        'model_wall_time_s': finished_at
+    }
+
+
+def _model_stats(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Latency, time-to-first-token, throughput and error stats for one model."""
+    ok = [r for r in results if r.get('success')]
+    latencies = [r['metadata']['latency_ms'] for r in ok]
+    ttfts = [r['metadata']['ttft_ms'] for r in ok if r['metadata'].get('ttft_ms') is not None]
+
+    # Decode throughput: completion tokens over time spent after the first token
+    completion_tokens = sum(r['metadata'].get('completion_tokens', 0) for r in ok)
+    decode_seconds = sum((r['metadata']['latency_ms'] - (r['metadata'].get('ttft_ms') or 0)) / 1000 for r in ok)
+
+    return {
+        'requests': len(results),
+        'errors': len(results) - len(ok),
+        'error_messages': [r.get('error') for r in results if not r.get('success')][:5],
+        'latency_ms': summarize(latencies),
+        'ttft_ms': summarize(ttfts),
+        'tokens_per_second': completion_tokens / decode_seconds if decode_seconds > 0 else None,
+        'total_tokens': sum(r['metadata'].get('tokens_used', 0) for r in ok)
+    }
+
+
+def _fmt(value: Optional[float]) -> str:
+    return "n/a" if value is None else f"{value:.0f}"
@@ -1,14 +1,14 @@
-"""Intent-Specific Prompt Engineering"""
-from typing import Tuple
+"""Intent-Specific Prompt Engineering
 
-class PromptEngine:
-    """Generates optimized prompts for each intent with few-shot examples."""
-    
-    @staticmethod
-    def get_prompts(intent: str, query: str, context: str) -> Tuple[str, str]:
-        """Generate system and user prompts."""
-        
-        base_system = """You are an expert hotel assistant with access to a comprehensive hotel knowledge graph.
+Prompts are precompiled once per intent. Everything static (shared rules, the
+intent's task and its answer instruction) comes first and is byte-identical
+across requests, so provider-side prompt caching can reuse that prefix once it
+reaches the provider's 1024-token minimum (hits come back as cached_tokens); the
+variable context and query are appended last.
+"""
+from typing import Dict, Tuple
+
+BASE_SYSTEM = """You are an expert hotel assistant with access to a comprehensive hotel knowledge graph.
 
 CRITICAL RULES:
 1. Answer EXCLUSIVELY using the provided context data
@@ -16,46 +16,29 @@ CRITICAL RULES:
 3. If data is insufficient, explicitly state what's missing
 4. Be precise, accurate, and cite specific numbers from the context
 5. Maintain a professional yet friendly tone"""
-        
-        if intent == "LIST_HOTELS":
-            system = base_system + """
+
+INTENT_TASKS = {
+    "LIST_HOTELS": """
 
 TASK: Present hotels as a clear, scannable list
 FORMAT:
                 For each hotel, present it as:
                 - A short one-line summary
                 - Key details shown as labeled bullets
+                - For hotels near a place, how far away it is
                 - Use friendly but concise language  
-TONE: Concise and helpful"""
-            
-            user = f"""CONTEXT:
-{context}
-
-USER QUERY: "{query}"
-
-Provide a clear numbered list of hotels:"""
-
-        elif intent == "RECOMMEND_HOTEL":
-            system = base_system + """
+TONE: Concise and helpful""",
+    "RECOMMEND_HOTEL": """
 
 TASK: Recommend hotels and explain WHY
 FORMAT:
        For each recommended hotel, present it as:
        - A short, clear one-line summary explaining why it is recommended
-       - Key details shown as labeled bullet points (location, ratings, notable scores)
+       - Key details shown as labeled bullet points (location, ratings, notable scores, distance when given)
        - Use friendly but concise language  
 TONE: Persuasive but honest
-INCLUDE: Specific scores, review counts, and guest feedback quotes"""
-            
-            user = f"""CONTEXT:
-{context}
-
-USER QUERY: "{query}"
-
-Provide recommendations with clear reasoning:"""
-
-        elif intent == "DESCRIBE_HOTEL":
-            system = base_system + """
+INCLUDE: Specific scores, review counts, and guest feedback quotes""",
+    "DESCRIBE_HOTEL": """
 
 TASK: Provide comprehensive hotel description
 FORMAT:
@@ -65,17 +48,8 @@ FORMAT:
       - Show base ratings and guest review scores distinctly
       - Include brief guest experience snippets when available
 TONE: Informative , balanced and friendly.
-INCLUDE: Base ratings, review scores, and guest experiences"""
-            
-            user = f"""CONTEXT:
-{context}
-
-USER QUERY: "{query}"
-
-Provide a detailed, well-structured description:"""
-
-        elif intent == "COMPARE_HOTELS":
-            system = base_system + """
+INCLUDE: Base ratings, review scores, and guest experiences""",
+    "COMPARE_HOTELS": """
 
 TASK: Compare hotels objectively using base ratings
 FORMAT:
@@ -86,17 +60,8 @@ FORMAT:
       - Summarize key strengths and weaknesses of each hotel
 TONE: Analytical , balanced and friendly
 INCLUDE: Specific rating differences, clear winner per category
-IMPORTANT: Use the BASE RATINGS for comparison (not review scores)"""
-            
-            user = f"""CONTEXT:
-{context}
-
-USER QUERY: "{query}"
-
-Provide a structured comparison:"""
-
-        elif intent == "CHECK_VISA":
-            system = base_system + """
+IMPORTANT: Use the BASE RATINGS for comparison (not review scores)""",
+    "CHECK_VISA": """
 
 TASK: Provide visa requirement information
 FORMAT:
@@ -105,18 +70,55 @@ FORMAT:
       - Present information in short, clearly labeled lines
 TONE: Factual , concise and friendly.
 INCLUDE: Visa type if applicable"""
-            
-            user = f"""CONTEXT:
-{context}
+}
 
-USER QUERY: "{query}"
+# Answer instruction per intent (used to close the user turn before the data)
+INTENT_INSTRUCTIONS = {
+    "LIST_HOTELS": "Provide a clear numbered list of hotels:",
+    "RECOMMEND_HOTEL": "Provide recommendations with clear reasoning:",
+    "DESCRIBE_HOTEL": "Provide a detailed, well-structured description:",
+    "COMPARE_HOTELS": "Provide a structured comparison:",
+    "CHECK_VISA": "Provide clear visa information:"
+}
 
-Provide clear visa information:"""
-        
-        else:
-            system = base_system
-            user = f"Context:\\n{context}\\n\\nQuestion: {query}\\n\\nAnswer:"
-        
-        return system, user
 
-print("PromptEngine class defined")
\ No newline at end of file
+class PromptTemplate:
+    """A precompiled prompt: static system text and user prefix, variable parts appended."""
+
+    __slots__ = ("system", "user_prefix", "query_prefix", "query_suffix")
+
+    def __init__(self, system: str, instruction: str = ""):
+        self.system = system
+        self.user_prefix = (f"{instruction}\n\n" if instruction else "") + "CONTEXT:\n"
+        self.query_prefix = '\n\nUSER QUERY: "'
+        self.query_suffix = '"'
+
+    def render(self, query: str, context: str) -> Tuple[str, str]:
+        return self.system, "".join((self.user_prefix, context, self.query_prefix, query, self.query_suffix))
+
+    @property
+    def static_prefix(self) -> str:
+        """Text shared by every request of this intent (system + start of the user turn)."""
+        return self.system + self.user_prefix
+
+
+def _compile_templates() -> Dict[str, PromptTemplate]:
+    return {intent: PromptTemplate(BASE_SYSTEM + task, INTENT_INSTRUCTIONS[intent])
+            for intent, task in INTENT_TASKS.items()}
+
+
+_TEMPLATES = _compile_templates()
+_GENERIC_TEMPLATE = PromptTemplate(BASE_SYSTEM, "Answer the question using the context below.")
+
+
+class PromptEngine:
+    """Generates optimized prompts for each intent from precompiled templates."""
+
+    @staticmethod
+    def get_template(intent: str) -> PromptTemplate:
+        return _TEMPLATES.get(intent, _GENERIC_TEMPLATE)
+
+    @staticmethod
+    def get_prompts(intent: str, query: str, context: str) -> Tuple[str, str]:
+        """Generate system and user prompts."""
+        return PromptEngine.get_template(intent).render(query, context)
@@ -1,10 +1,7 @@
 """Merge and Rank Results from KG and RAG"""
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from collections import defaultdict
 
-from collections import defaultdict
-from typing import Tuple
-
 def merge_and_rank_results(
     cypher_output: List[Dict],
     embedding_output: Optional[List[Dict]],
@@ -55,5 +52,3 @@ def merge_and_rank_results(
             merged['supporting_reviews'] = unique_embedding[:5]
     
     return merged
-
-print("merge_and_rank_results function defined")
\ No newline at end of file
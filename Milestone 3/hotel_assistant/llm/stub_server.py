@@ -0,0 +1,106 @@
+"""Local OpenAI-Compatible Stub Server
+
+Serves /v1/chat/completions (plain and streamed) with simulated latency so the
+pipeline can be benchmarked or load-tested without network access. Point the
+live client at it with LLM_BASE_URL=http://127.0.0.1:8088/v1.
+
+Usage:
+    python -m hotel_assistant.llm.stub_server --port 8088 --ttft-ms 300 --tokens-per-second 80
+"""
+import argparse
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from ..config import STUB_LLM_TTFT_MS, STUB_LLM_TTFT_SIGMA, STUB_LLM_TOKENS_PER_SECOND
+from .llm_client import LatencyModel, StubEngine
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8088
+
+
+def _make_handler(engine: StubEngine):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status: int, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.rstrip("/") in ("/v1/models", "/models"):
+                self._send_json(200, {"object": "list", "data": [{"id": "stub", "object": "model"}]})
+            else:
+                self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+        def do_POST(self):
+            if self.path.rstrip("/") not in ("/v1/chat/completions", "/chat/completions"):
+                self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+            except (ValueError, json.JSONDecodeError) as e:
+                self._send_json(400, {"error": {"message": f"Invalid JSON body: {e}"}})
+                return
+
+            if not request.get("stream"):
+                self._send_json(200, engine.completion(request))
+                return
+
+            # Server-sent events, one chunk per word, terminated by [DONE]
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            for chunk in engine.stream(request):
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+            self.close_connection = True
+
+    return StubHandler
+
+
+def start_stub_server(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                      latency: Optional[LatencyModel] = None) -> ThreadingHTTPServer:
+    """Start the stub server on a daemon thread and return it (call .shutdown() to stop)."""
+    server = ThreadingHTTPServer((host, port), _make_handler(StubEngine(latency)))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="llm-stub-server", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible stub server")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--ttft-ms", type=float, default=STUB_LLM_TTFT_MS, help="Median time to first token")
+    parser.add_argument("--ttft-sigma", type=float, default=STUB_LLM_TTFT_SIGMA, help="Log-normal spread of ttft")
+    parser.add_argument("--tokens-per-second", type=float, default=STUB_LLM_TOKENS_PER_SECOND)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    latency = LatencyModel(args.ttft_ms, args.ttft_sigma, args.tokens_per_second, args.seed)
+    server = ThreadingHTTPServer((args.host, args.port), _make_handler(StubEngine(latency)))
+    print(f"Stub LLM server listening on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
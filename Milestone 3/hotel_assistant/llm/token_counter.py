@@ -0,0 +1,54 @@
+"""Token Counting for Prompt Budgets"""
+from typing import Any, Dict
+
+CHARS_PER_TOKEN = 4
+FALLBACK_ENCODING = "o200k_base"
+
+_encodings: Dict[str, Any] = {}
+_tiktoken: Any = None
+
+
+def _load_tiktoken():
+    """Import tiktoken on first use (optional; False when it is not installed)."""
+    global _tiktoken
+    if _tiktoken is None:
+        try:
+            import tiktoken
+            _tiktoken = tiktoken
+        except ImportError:  # falls back to a character heuristic
+            _tiktoken = False
+    return _tiktoken
+
+
+def _get_encoding(model: str):
+    """Return a cached tiktoken encoding for the model, or None without tiktoken."""
+    tiktoken = _load_tiktoken()
+    if not tiktoken:
+        return None
+    if model not in _encodings:
+        try:
+            _encodings[model] = tiktoken.encoding_for_model(model)
+        except KeyError:
+            _encodings[model] = tiktoken.get_encoding(FALLBACK_ENCODING)
+    return _encodings[model]
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    """Count tokens in text (exact with tiktoken, ~4 chars per token otherwise)."""
+    if not text:
+        return 0
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = "gpt-4o-mini") -> str:
+    """Cut text down to at most max_tokens tokens."""
+    if max_tokens <= 0:
+        return ""
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+    tokens = encoding.encode(text)
+    return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
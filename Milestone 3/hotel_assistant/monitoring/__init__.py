@@ -0,0 +1 @@
+"""Hotel Assistant Module"""
@@ -0,0 +1,316 @@
+"""Process-Wide Runtime Metrics (counters and latency histograms)
+
+Each metric keeps one shard per thread, so the hot path (inc/observe) only
+touches thread-local state; the shared lock is taken once per thread when its
+shard is created and when a scrape merges the shards. When a thread exits its
+shard is folded into a retired total, so short-lived threads (one per
+Streamlit rerun) do not pile up shards. Exposed in Prometheus text format by
+metrics_server and summarized in the Streamlit sidebar.
+"""
+import bisect
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelKey = Tuple[str, ...]
+
+
+class _ShardHolder:
+    """Thread-local owner of a shard; collected (and the shard retired) when its thread exits."""
+
+    __slots__ = ("shard", "__weakref__")
+
+    def __init__(self, shard: dict):
+        self.shard = shard
+
+
+class _Metric:
+    """Shared label handling and per-thread shards."""
+
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: Dict[int, dict] = {}  # live shards by id (equal-valued shards are still distinct)
+        self._retired: dict = {}  # merged shards of exited threads
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelKey:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _shard(self) -> dict:
+        holder = getattr(self._local, "holder", None)
+        if holder is None:
+            holder = _ShardHolder({})
+            with self._lock:
+                self._shards[id(holder.shard)] = holder.shard
+            weakref.finalize(holder, self._retire, holder.shard)
+            self._local.holder = holder
+        return holder.shard
+
+    def _retire(self, shard: dict):
+        """Fold an exited thread's shard into the retired total."""
+        with self._lock:
+            del self._shards[id(shard)]
+            self._merge(self._retired, shard)
+
+    @staticmethod
+    def _merge(target: dict, shard: dict):
+        raise NotImplementedError
+
+    def _merged(self) -> dict:
+        """The retired total plus every live shard."""
+        merged: dict = {}
+        with self._lock:
+            for shard in [self._retired, *self._shards.values()]:
+                self._merge(merged, dict(shard))
+        return merged
+
+    def _format_labels(self, key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(zip(self.labelnames, key))
+        if extra is not None:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        escaped = (v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, v in pairs)
+        return "{" + ",".join(f'{n}="{v}"' for (n, _), v in zip(pairs, escaped)) + "}"
+
+
+class Counter(_Metric):
+    """Monotonically increasing count per label set."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        shard = self._shard()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0.0) + amount
+
+    @staticmethod
+    def _merge(target: dict, shard: dict):
+        for key, value in shard.items():
+            target[key] = target.get(key, 0.0) + value
+
+    def values(self) -> Dict[LabelKey, float]:
+        return self._merged()
+
+    def total(self) -> float:
+        return sum(self.values().values())
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self.values().items()):
+            lines.append(f"{self.name}{self._format_labels(key)} {value:g}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Bucketed distribution (seconds) per label set, with sum and count."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        shard = self._shard()
+        key = self._key(labels)
+        entry = shard.get(key)
+        if entry is None:
+            # [per-bucket counts (+Inf last), sum, count]
+            entry = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            shard[key] = entry
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe the duration of the block in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    @staticmethod
+    def _merge(target: dict, shard: dict):
+        for key, (counts, total, count) in shard.items():
+            if key in target:
+                prev_counts, prev_total, prev_count = target[key]
+                target[key] = [[a + b for a, b in zip(prev_counts, counts)], prev_total + total, prev_count + count]
+            else:
+                target[key] = [list(counts), total, count]
+
+    def values(self) -> Dict[LabelKey, Tuple[List[int], float, int]]:
+        return {key: tuple(entry) for key, entry in self._merged().items()}
+
+    def quantile(self, q: float, counts: List[int]) -> Optional[float]:
+        """Estimate a quantile by interpolating inside the bucket that contains it."""
+        count = sum(counts)
+        if count == 0:
+            return None
+        rank = q * count
+        cumulative = 0
+        for i, bucket_count in enumerate(counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.buckets[-1]
+
+    def summary(self) -> Dict[LabelKey, Dict[str, Optional[float]]]:
+        """Count, mean and estimated p50/p95 per label set."""
+        return {
+            key: {
+                'count': count,
+                'mean': total / count if count else None,
+                'p50': self.quantile(0.50, counts),
+                'p95': self.quantile(0.95, counts)
+            }
+            for key, (counts, total, count) in self.values().items()
+        }
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total, count) in sorted(self.values().items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{self._format_labels(key, ('le', f'{bound:g}'))} {cumulative}")
+            lines.append(f"{self.name}_bucket{self._format_labels(key, ('le', '+Inf'))} {count}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {total:g}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named collection of metrics; get-or-create so modules can declare them at import."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, help_text: str, labelnames: Sequence[str], **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, help_text, labelnames, **kwargs)
+                self._metrics[name] = metric
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} already registered with a different type or labels")
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help_text, labelnames)
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, labelnames, buckets=buckets)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# Metrics recorded by the assistant
+REQUESTS = REGISTRY.counter(
+    "hotel_assistant_requests_total", "Chat queries processed, by intent and outcome", ["intent", "status"])
+REQUEST_SECONDS = REGISTRY.histogram(
+    "hotel_assistant_request_seconds", "End-to-end query latency by intent", ["intent"])
+CACHE_LOOKUPS = REGISTRY.counter(
+    "hotel_assistant_cache_lookups_total", "Cache lookups by cache and result (hit/miss)", ["cache", "result"])
+NEO4J_QUERY_SECONDS = REGISTRY.histogram(
+    "hotel_assistant_neo4j_query_seconds", "Neo4j latency per QueryLibrary template", ["template"])
+EMBEDDING_ENCODE_SECONDS = REGISTRY.histogram(
+    "hotel_assistant_embedding_encode_seconds", "Query embedding encode time by model", ["model"])
+VECTOR_SEARCH_SECONDS = REGISTRY.histogram(
+    "hotel_assistant_vector_search_seconds", "Vector index search time by index", ["index"])
+LLM_REQUEST_SECONDS = REGISTRY.histogram(
+    "hotel_assistant_llm_request_seconds", "LLM call latency by model and caller", ["model", "caller"],
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0))
+LLM_TOKENS = REGISTRY.counter(
+    "hotel_assistant_llm_tokens_total", "LLM tokens by model and kind (prompt/completion/cached)", ["model", "kind"])
+LLM_ERRORS = REGISTRY.counter(
+    "hotel_assistant_llm_errors_total", "Failed LLM calls by model and caller", ["model", "caller"])
+LLM_RETRIES = REGISTRY.counter(
+    "hotel_assistant_llm_retries_total", "LLM call retries by model", ["model"])
+DEGRADATIONS = REGISTRY.counter(
+    "hotel_assistant_degradations_total", "Queries answered in degraded mode, by degradation", ["kind"])
+ANALYTICS_REFRESH_SECONDS = REGISTRY.histogram(
+    "hotel_assistant_analytics_refresh_seconds", "Analytics job run time by analytic", ["analytic"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0))
+TEMPLATE_FALLBACKS = REGISTRY.counter(
+    "hotel_assistant_template_fallbacks_total", "Templates with a fallback: which branch answered",
+    ["template", "outcome", "speculative"])
+PLANNER_SKIPS = REGISTRY.counter(
+    "hotel_assistant_planner_skipped_stages_total", "Stage calls skipped by the retrieval planner", ["stage", "intent"])
+
+
+def _fallback_rates() -> Dict[str, float]:
+    calls: Dict[str, List[float]] = {}
+    for (template, outcome, _speculative), value in TEMPLATE_FALLBACKS.values().items():
+        counts = calls.setdefault(template, [0.0, 0.0])
+        counts[outcome == "fallback"] += value
+    return {template: fallback / (primary + fallback) for template, (primary, fallback) in calls.items()}
+
+
+def summary() -> Dict[str, object]:
+    """Compact view for the sidebar: requests per intent, cache hit rates and latency p50/p95."""
+    requests: Dict[str, float] = {}
+    for (intent, _status), value in REQUESTS.values().items():
+        requests[intent] = requests.get(intent, 0.0) + value
+
+    cache: Dict[str, Dict[str, float]] = {}
+    for (name, result), value in CACHE_LOOKUPS.values().items():
+        cache.setdefault(name, {'hit': 0.0, 'miss': 0.0})[result] = value
+
+    llm_latency: Dict[str, Dict[str, int]] = {}
+    for (model, _caller), (counts, _total, _count) in LLM_REQUEST_SECONDS.values().items():
+        merged = llm_latency.get(model)
+        llm_latency[model] = counts if merged is None else [a + b for a, b in zip(merged, counts)]
+
+    tokens: Dict[str, float] = {}
+    for (model, kind), value in LLM_TOKENS.values().items():
+        if kind in ("prompt", "completion"):
+            tokens[model] = tokens.get(model, 0.0) + value
+
+    return {
+        'requests_by_intent': requests,
+        'cache_hit_rate': {name: c['hit'] / (c['hit'] + c['miss']) if c['hit'] + c['miss'] else 0.0
+                           for name, c in cache.items()},
+        'request_latency_s': {key[0]: s for key, s in REQUEST_SECONDS.summary().items()},
+        'neo4j_latency_s': {key[0]: s for key, s in NEO4J_QUERY_SECONDS.summary().items()},
+        'llm_latency_s': {model: {'count': sum(counts),
+                                  'p50': LLM_REQUEST_SECONDS.quantile(0.50, counts),
+                                  'p95': LLM_REQUEST_SECONDS.quantile(0.95, counts)}
+                          for model, counts in llm_latency.items()},
+        'llm_tokens': tokens,
+        'degradations': {key[0]: value for key, value in DEGRADATIONS.values().items()},
+        'template_fallback_rate': _fallback_rates(),
+        'planner_skips': {stage: sum(v for (s, _), v in PLANNER_SKIPS.values().items() if s == stage)
+                          for stage in {key[0] for key in PLANNER_SKIPS.values()}}
+    }
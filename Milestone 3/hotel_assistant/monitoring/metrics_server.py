@@ -0,0 +1,80 @@
+"""Local Prometheus Scrape Endpoint
+
+Serves GET /metrics (Prometheus text format) on localhost. The Streamlit app
+starts it once per process; it can also be run on its own for testing.
+
+Usage:
+    python -m hotel_assistant.monitoring.metrics_server --port 9108
+"""
+import argparse
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from ..config import METRICS_HOST, METRICS_PORT
+from .metrics import REGISTRY, MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+
+def _make_handler(registry: MetricsRegistry):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split("?")[0].rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return MetricsHandler
+
+
+def start_metrics_server(host: str = METRICS_HOST, port: int = METRICS_PORT,
+                         registry: MetricsRegistry = REGISTRY) -> Optional[ThreadingHTTPServer]:
+    """Start the endpoint on a daemon thread once per process; None if the port is taken."""
+    global _server
+    with _server_lock:
+        if _server is not None:
+            return _server
+        try:
+            server = ThreadingHTTPServer((host, port), _make_handler(registry))
+        except OSError as e:
+            logger.warning("Metrics endpoint not started on %s:%d: %s", host, port, e)
+            return None
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+        _server = server
+        return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the assistant's metrics in Prometheus format")
+    parser.add_argument("--host", default=METRICS_HOST)
+    parser.add_argument("--port", type=int, default=METRICS_PORT)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), _make_handler(REGISTRY))
+    print(f"Metrics endpoint on http://{args.host}:{args.port}/metrics")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
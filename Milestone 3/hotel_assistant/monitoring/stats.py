@@ -0,0 +1,29 @@
+"""Latency Statistics Helpers"""
+from typing import Dict, List, Optional, Sequence
+
+DEFAULT_PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(values: Sequence[float], pct: float) -> Optional[float]:
+    """Linear-interpolated percentile (0-100) of values, None when empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(values: Sequence[float], percentiles=DEFAULT_PERCENTILES) -> Dict[str, Optional[float]]:
+    """Count, mean, min, max and the requested percentiles (keys p50, p95, ...)."""
+    values: List[float] = [v for v in values if v is not None]
+    summary = {
+        'count': len(values),
+        'mean': sum(values) / len(values) if values else None,
+        'min': min(values) if values else None,
+        'max': max(values) if values else None
+    }
+    for pct in percentiles:
+        summary[f'p{pct}'] = percentile(values, pct)
+    return summary
@@ -0,0 +1,203 @@
+"""Span-Based Request Tracing
+
+A trace is started once per chat query; code below it opens spans with
+`span(name, **attributes)` (or the `traced` decorator). The active span lives in
+a contextvar, so nesting works across function calls and, when work is submitted
+through `contextvars.copy_context().run`, across pool threads too. Finished
+traces are appended as one JSON line each to TRACE_FILE.
+"""
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from ..config import TRACING_ENABLED, TRACE_FILE
+
+logger = logging.getLogger(__name__)
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("current_trace", default=None)
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+_file_lock = threading.Lock()
+
+
+class Span:
+    """One timed operation with free-form attributes (template id, row count, tokens, ...)."""
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = dict(attributes)
+        self.thread = threading.current_thread().name
+        self.start_time = time.time()
+        self._start = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes):
+        self.attributes.update(attributes)
+
+    def end(self, error: Optional[BaseException] = None):
+        if self.duration_ms is None:
+            self.duration_ms = (time.perf_counter() - self._start) * 1000
+            if error is not None:
+                self.error = f"{type(error).__name__}: {error}"
+
+    def to_dict(self, trace_start: float) -> Dict[str, Any]:
+        """A span that never ended (a stage abandoned on timeout or budget) is timed up to now."""
+        abandoned = self.duration_ms is None
+        return {
+            'name': self.name,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'thread': self.thread,
+            'start_ms': (self.start_time - trace_start) * 1000,
+            'duration_ms': (time.perf_counter() - self._start) * 1000 if abandoned else self.duration_ms,
+            'abandoned': abandoned,
+            'attributes': self.attributes,
+            'error': self.error
+        }
+
+
+class Trace:
+    """All spans recorded for one request."""
+
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        self.trace_id = uuid.uuid4().hex
+        self.root = Span(name, self.trace_id, None, attributes)
+        self.spans: List[Span] = [self.root]
+        self._lock = threading.Lock()
+
+    def add(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def to_dict(self) -> Dict[str, Any]:
+        trace_start = self.root.start_time
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start_time)
+        return {
+            'trace_id': self.trace_id,
+            'name': self.root.name,
+            'timestamp': trace_start,
+            'duration_ms': self.root.duration_ms,
+            'attributes': self.root.attributes,
+            'spans': [s.to_dict(trace_start) for s in spans]
+        }
+
+
+class _NoopSpan:
+    """Returned when there is no active trace so callers can set attributes unconditionally."""
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def set_attributes(self, **attributes):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def start_trace(name: str, export: bool = True, **attributes) -> Iterator[Trace]:
+    """Start a new trace; it is written to TRACE_FILE when the block exits."""
+    trace = Trace(name, attributes)
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(trace.root)
+    error = None
+    try:
+        yield trace
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        trace.root.end(error)
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+        if export and TRACING_ENABLED and TRACE_FILE:
+            export_trace(trace)
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Any]:
+    """Record a child span of the current span (no-op outside a trace)."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield _NOOP_SPAN
+        return
+    parent = _current_span.get()
+    s = Span(name, trace.trace_id, parent.span_id if parent is not None else None, attributes)
+    trace.add(s)
+    token = _current_span.set(s)
+    error = None
+    try:
+        yield s
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        s.end(error)
+        _current_span.reset(token)
+
+
+def start_span(name: str, **attributes):
+    """Open a span without making it current; the caller must call .end()."""
+    trace = _current_trace.get()
+    if trace is None:
+        return None
+    parent = _current_span.get()
+    s = Span(name, trace.trace_id, parent.span_id if parent is not None else None, attributes)
+    trace.add(s)
+    return s
+
+
+def traced(name: str, **attributes) -> Callable:
+    """Decorator that wraps a function in a span and records the row count of list results."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name, **attributes) as s:
+                result = fn(*args, **kwargs)
+                if isinstance(result, list):
+                    s.set_attribute('rows', len(result))
+                return result
+        return wrapper
+    return decorator
+
+
+def export_trace(trace: Trace, path: Optional[str] = None):
+    """Append the trace as one JSON line."""
+    path = path or TRACE_FILE
+    line = json.dumps(trace.to_dict(), default=str)
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with _file_lock, open(path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    except OSError as e:
+        logger.warning("Could not write trace to %s: %s", path, e)
+
+
+def load_traces(path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Read traces written by export_trace (for offline analysis)."""
+    path = path or TRACE_FILE
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
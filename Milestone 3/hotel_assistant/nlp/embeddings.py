@@ -1,7 +1,8 @@
 """Semantic Search using Vector Embeddings"""
 from typing import List, Dict, Any
-from sentence_transformers import SentenceTransformer
 from ..database.neo4j_connection import Neo4jConnection
+from ..monitoring.metrics import EMBEDDING_ENCODE_SECONDS, VECTOR_SEARCH_SECONDS
+from ..monitoring.tracing import span
 
 _embedder_minilm = None
 _embedder_mpnet = None
@@ -11,6 +12,8 @@ def get_embedder_minilm():
     """Lazy load MiniLM embedder"""
     global _embedder_minilm
     if _embedder_minilm is None:
+        # sentence_transformers pulls in torch/transformers, so it is only imported once RAG needs it
+        from sentence_transformers import SentenceTransformer
         _embedder_minilm = SentenceTransformer('all-MiniLM-L6-v2')
     return _embedder_minilm
 
@@ -18,6 +21,7 @@ def get_embedder_mpnet():
     """Lazy load MPNet embedder"""
     global _embedder_mpnet
     if _embedder_mpnet is None:
+        from sentence_transformers import SentenceTransformer
         _embedder_mpnet = SentenceTransformer('all-mpnet-base-v2')
     return _embedder_mpnet
 
@@ -41,7 +45,8 @@ def semantic_search_minilm(query: str, top_k: int = 5, threshold: float = 0.65):
         List of results with similarity >= threshold
     """
     embedder = get_embedder_minilm()
-    query_embedding = embedder.encode([query], convert_to_numpy=True)[0].tolist()
+    with span("embedding.encode", model="minilm"), EMBEDDING_ENCODE_SECONDS.time(model="minilm"):
+        query_embedding = embedder.encode([query], convert_to_numpy=True)[0].tolist()
 
     search_query = """
     CALL db.index.vector.queryNodes('review_minilm_index', $top_k, $query_embedding)
@@ -56,10 +61,13 @@ def semantic_search_minilm(query: str, top_k: int = 5, threshold: float = 0.65):
     """
 
     conn = get_conn_rag()
-    results = conn.execute_query(search_query, {
-        'query_embedding': query_embedding,
-        'top_k': top_k
-    })
+    with span("vector.search", index="review_minilm_index", top_k=top_k) as search_span, \
+            VECTOR_SEARCH_SECONDS.time(index="review_minilm_index"):
+        results = conn.execute_query(search_query, {
+            'query_embedding': query_embedding,
+            'top_k': top_k
+        })
+        search_span.set_attribute('rows', len(results))
 
     # Filter by similarity threshold
     filtered_results = [r for r in results if r['score'] >= threshold]
@@ -79,7 +87,8 @@ def semantic_search_mpnet(query: str, top_k: int = 5, threshold: float = 0.65):
         List of results with similarity >= threshold
     """
     embedder = get_embedder_mpnet()
-    query_embedding = embedder.encode([query], convert_to_numpy=True)[0].tolist()
+    with span("embedding.encode", model="mpnet"), EMBEDDING_ENCODE_SECONDS.time(model="mpnet"):
+        query_embedding = embedder.encode([query], convert_to_numpy=True)[0].tolist()
 
     search_query = """
     CALL db.index.vector.queryNodes('review_mpnet_index', $top_k, $query_embedding)
@@ -94,10 +103,13 @@ def semantic_search_mpnet(query: str, top_k: int = 5, threshold: float = 0.65):
     """
 
     conn = get_conn_rag()
-    results = conn.execute_query(search_query, {
-        'query_embedding': query_embedding,
-        'top_k': top_k
-    })
+    with span("vector.search", index="review_mpnet_index", top_k=top_k) as search_span, \
+            VECTOR_SEARCH_SECONDS.time(index="review_mpnet_index"):
+        results = conn.execute_query(search_query, {
+            'query_embedding': query_embedding,
+            'top_k': top_k
+        })
+        search_span.set_attribute('rows', len(results))
 
     # Filter by similarity threshold
     filtered_results = [r for r in results if r['score'] >= threshold]
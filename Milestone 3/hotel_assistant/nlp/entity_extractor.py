@@ -1,16 +1,20 @@
 """Entity Extraction from User Queries"""
-import os
 import json
+import logging
 from typing import Dict, Any
-from openai import OpenAI
+from ..llm.gateway import get_gateway
+from ..monitoring.tracing import traced
+
+logger = logging.getLogger(__name__)
 
 SCHEMAS = {
-    "LIST_HOTELS": {"city": None, "country": None, "star_rating": None},
+    "LIST_HOTELS": {"city": None, "country": None, "star_rating": None, "near": None, "radius_km": None},
     "RECOMMEND_HOTEL": {"city": None, "country": None, "traveller_type": None,
-                        "age_group": None, "user_gender": None, "star_rating": None, "aspects": None},
+                        "age_group": None, "user_gender": None, "star_rating": None, "aspects": None,
+                        "near": None, "radius_km": None},
     "DESCRIBE_HOTEL": {"hotel_name": None, "aspects": None},
     "COMPARE_HOTELS": {"hotel1": None, "hotel2": None, "traveller_type": None, "aspects": None},
-    "CHECK_VISA": {"from_country": None, "to_country": None}
+    "CHECK_VISA": {"from_country": None, "to_country": None, "destinations": None}
 }
 
 ALLOWED_ASPECTS = ["cleanliness", "comfort", "facilities", "location", "staff", "value_for_money"]
@@ -26,8 +30,7 @@ def enforce_schema(intent: str, entities: Dict[str, Any]) -> Dict[str, Any]:
             result[key] = None
     return result
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
+@traced("entities.extract")
 def extract_entities(text: str, intent: str) -> Dict[str, Any]:
     if intent not in SCHEMAS:
         return dict(SCHEMAS.get("LIST_HOTELS", {}))
@@ -48,11 +51,16 @@ def extract_entities(text: str, intent: str) -> Dict[str, Any]:
     7. traveller_type: family, solo, couple, business, group
     8. user_gender: male, female
     9. star_rating: 1-5 (numeric)
+    10. Countries by full name (e.g., "United Kingdom", not "UK")
+    11. destinations: list of countries in travel order, only for trips to more than one country
+    12. near: landmark, hotel or "lat, lon" the hotel should be close to (e.g., "near the Eiffel Tower" -> "Eiffel Tower")
+    13. radius_km: distance limit in km, only if stated (convert miles: 1 mile = 1.6 km)
     
     Return ONLY JSON matching: {SCHEMAS[intent]}"""
     
     try:
-        response = client.chat.completions.create(
+        response = get_gateway().chat(
+            "entity_extractor",
             model="gpt-4o-mini",
             messages=[{"role": "user", "content": prompt}],
             temperature=0.0,
@@ -69,5 +77,5 @@ def extract_entities(text: str, intent: str) -> Dict[str, Any]:
         entities = json.loads(raw)
         return enforce_schema(intent, entities)
     except Exception as e:
-        print(f"Error: {e}")
+        logger.warning("Entity extraction failed for intent %s: %s", intent, e)
         return dict(SCHEMAS[intent])
\ No newline at end of file
@@ -0,0 +1,90 @@
+"""Resolving "near X" Entities to Coordinates
+
+The entity extractor returns `near` as free text. It can be one of:
+- coordinates ("48.85, 2.29");
+- a landmark from LANDMARKS;
+- a hotel name;
+- a city name (the centre of its hotels).
+
+resolve_location() turns any of these into (lat, lon, label), or returns None
+when the text is none of them.
+"""
+import re
+from typing import Optional, Tuple
+
+# Well-known sights in the dataset's cities
+LANDMARKS = {
+    "times square": (40.7580, -73.9855),
+    "central park": (40.7829, -73.9654),
+    "empire state building": (40.7484, -73.9857),
+    "big ben": (51.5007, -0.1246),
+    "buckingham palace": (51.5014, -0.1419),
+    "tower of london": (51.5081, -0.0759),
+    "eiffel tower": (48.8584, 2.2945),
+    "louvre": (48.8606, 2.3376),
+    "notre dame": (48.8530, 2.3499),
+    "tokyo tower": (35.6586, 139.7454),
+    "shibuya crossing": (35.6595, 139.7005),
+    "burj khalifa": (25.1972, 55.2744),
+    "dubai mall": (25.1985, 55.2796),
+    "marina bay sands": (1.2834, 103.8607),
+    "sydney opera house": (-33.8568, 151.2153),
+    "bondi beach": (-33.8908, 151.2743),
+    "copacabana beach": (-22.9711, -43.1822),
+    "christ the redeemer": (-22.9519, -43.2105),
+    "brandenburg gate": (52.5163, 13.3777),
+    "cn tower": (43.6426, -79.3871),
+    "the bund": (31.2400, 121.4900),
+    "zocalo": (19.4326, -99.1332),
+    "gateway of india": (18.9220, 72.8347),
+    "colosseum": (41.8902, 12.4922),
+    "vatican": (41.9029, 12.4534),
+    "table mountain": (-33.9628, 18.4098),
+    "gyeongbokgung palace": (37.5796, 126.9770),
+    "red square": (55.7539, 37.6208),
+    "kremlin": (55.7520, 37.6175),
+    "pyramids of giza": (29.9792, 31.1342),
+    "sagrada familia": (41.4036, 2.1744),
+    "grand palace": (13.7500, 100.4913),
+    "hagia sophia": (41.0086, 28.9802),
+    "rijksmuseum": (52.3600, 4.8852),
+    "anne frank house": (52.3752, 4.8840),
+    "obelisco": (-34.6037, -58.3816),
+    "lekki conservation centre": (6.4414, 3.5358),
+    "te papa": (-41.2905, 174.7821),
+}
+
+_COORDINATES = re.compile(r'^\s*\(?\s*(-?\d{1,2}(?:\.\d+)?)\s*,\s*(-?\d{1,3}(?:\.\d+)?)\s*\)?\s*$')
+
+
+def resolve_location(text: Optional[str], geo_index=None) -> Optional[Tuple[float, float, str]]:
+    """
+    (lat, lon, label) for a `near` entity, or None.
+
+    Args:
+        geo_index: HotelGeoIndex used for hotel and city names
+    """
+    if not text or not str(text).strip():
+        return None
+    text = str(text).strip()
+    match = _COORDINATES.match(text)
+    if match:
+        lat, lon = float(match.group(1)), float(match.group(2))
+        if -90 <= lat <= 90 and -180 <= lon <= 180:
+            return lat, lon, f"{lat:.4f}, {lon:.4f}"
+        return None
+
+    name = text.casefold()
+    for name in (name, re.sub(r'^the\s+', '', name)):
+        if name in LANDMARKS:
+            lat, lon = LANDMARKS[name]
+            return lat, lon, text
+
+    if geo_index is not None:
+        hotel = geo_index.hotel(text)
+        if hotel is not None:
+            return float(hotel['lat']), float(hotel['lon']), hotel['hotel_name']
+        centre = geo_index.city_centre(text)
+        if centre is not None:
+            return centre[0], centre[1], text
+    return None
@@ -1,15 +1,19 @@
 """Intent Classification using OpenAI"""
-import os
+import logging
 from typing import Optional, Dict, Any
-from openai import OpenAI
+from ..llm.gateway import get_gateway
+from ..monitoring.tracing import traced
+
+logger = logging.getLogger(__name__)
 
 SCHEMAS: Dict[str, Dict[str, Any]] = {
-    "LIST_HOTELS": {"city": None, "country": None, "star_rating": None},
+    "LIST_HOTELS": {"city": None, "country": None, "star_rating": None, "near": None, "radius_km": None},
     "RECOMMEND_HOTEL": {"city": None, "country": None, "traveller_type": None, 
-                        "age_group": None, "user_gender": None, "star_rating": None, "aspects": None},
+                        "age_group": None, "user_gender": None, "star_rating": None, "aspects": None,
+                        "near": None, "radius_km": None},
     "DESCRIBE_HOTEL": {"hotel_name": None, "aspects": None},
     "COMPARE_HOTELS": {"hotel1": None, "hotel2": None, "traveller_type": None, "aspects": None},
-    "CHECK_VISA": {"from_country": None, "to_country": None}
+    "CHECK_VISA": {"from_country": None, "to_country": None, "destinations": None}
 }
 
 ALLOWED_ASPECTS = ["cleanliness", "comfort", "facilities", "location", "staff", "value_for_money"]
@@ -18,7 +22,7 @@ ALLOWED_ASPECTS = ["cleanliness", "comfort", "facilities", "location", "staff",
 class IntentClassifier:
     
     def __init__(self):
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.gateway = get_gateway()
         self.model = "gpt-4o-mini"
         self.intents = {
             "LIST_HOTELS": "Find multiple hotels matching filters",
@@ -28,6 +32,7 @@ class IntentClassifier:
             "CHECK_VISA": "Check visa requirements"
         }
     
+    @traced("intent.classify")
     def classify(self, user_query: str) -> Optional[str]:
         prompt = f"""Classify this query into ONE intent: {list(self.intents.keys())} or return NONE.
         
@@ -43,7 +48,8 @@ class IntentClassifier:
         Return ONLY the intent name or NONE."""
         
         try:
-            response = self.client.chat.completions.create(
+            response = self.gateway.chat(
+                "intent_classifier",
                 model=self.model,
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.0,
@@ -52,5 +58,5 @@ class IntentClassifier:
             intent = response.choices[0].message.content.strip().upper()
             return intent if intent in self.intents else None
         except Exception as e:
-            print(f"Error: {e}")
+            logger.warning("Intent classification failed: %s", e)
             return None
\ No newline at end of file
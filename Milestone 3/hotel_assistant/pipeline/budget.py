@@ -0,0 +1,84 @@
+"""Request Latency Budget and Graceful Degradation
+
+A query gets one latency budget. The degradable stages (Cypher, vector search)
+get a share of it as their timeout and the LLM gets whatever is left. When a
+stage overruns, the pipeline degrades instead of waiting:
+
+- vector search over its share -> RAG is skipped
+- Cypher over its share        -> last good rows for the same query (stale) or none
+- too little time for the LLM  -> smaller model, or a templated answer from the rows
+
+Every degradation is recorded on the budget and surfaced in the answer metadata.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..config import KG_FALLBACK_CACHE_SIZE, LATENCY_BUDGET_SHARES, REQUEST_LATENCY_BUDGET_MS
+from ..monitoring.metrics import CACHE_LOOKUPS, DEGRADATIONS
+
+
+class LatencyBudget:
+    """Deadline for one request; a budget of 0 disables degradation."""
+
+    def __init__(self, total_ms: float = REQUEST_LATENCY_BUDGET_MS,
+                 shares: Optional[Dict[str, float]] = None):
+        self.total_ms = total_ms
+        self.enabled = total_ms > 0
+        self.shares = dict(LATENCY_BUDGET_SHARES if shares is None else shares)
+        self.degradations: List[Dict[str, Any]] = []
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._start) * 1000
+
+    def remaining_ms(self) -> float:
+        if not self.enabled:
+            return float("inf")
+        return max(self.total_ms - self.elapsed_ms(), 0.0)
+
+    def stage_timeout(self, stage: str, default: Optional[float]) -> Optional[float]:
+        """Stage timeout in seconds: its share of the budget, capped by what is left and the default."""
+        if not self.enabled:
+            return default
+        limit = self.remaining_ms()
+        if stage in self.shares:
+            limit = min(limit, self.shares[stage] * self.total_ms)
+        limit /= 1000
+        return limit if default is None else min(default, limit)
+
+    def degrade(self, kind: str, **details):
+        """Record a degradation (also counted in the metrics registry)."""
+        with self._lock:
+            self.degradations.append({'kind': kind, 'at_ms': round(self.elapsed_ms(), 1), **details})
+        DEGRADATIONS.inc(kind=kind)
+
+
+class StaleResultCache:
+    """Last good Cypher rows per (intent, entities), served when the live query overruns."""
+
+    def __init__(self, max_entries: int = KG_FALLBACK_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._items: "OrderedDict[Tuple, Tuple[float, List[Dict]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(intent: Optional[str], entities: Optional[Dict[str, Any]]) -> Tuple:
+        return intent, repr(sorted((entities or {}).items()))
+
+    def put(self, intent: Optional[str], entities: Optional[Dict[str, Any]], rows: List[Dict]):
+        key = self.key(intent, entities)
+        with self._lock:
+            self._items[key] = (time.time(), rows)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def get(self, intent: Optional[str], entities: Optional[Dict[str, Any]]) -> Optional[Tuple[float, List[Dict]]]:
+        """(stored_at, rows) or None."""
+        with self._lock:
+            entry = self._items.get(self.key(intent, entities))
+        CACHE_LOOKUPS.inc(cache="kg_fallback", result="hit" if entry is not None else "miss")
+        return entry
@@ -0,0 +1,195 @@
+"""Dependency-Aware Stage Orchestrator
+
+Stages declare which other stages they depend on; independent stages run in
+parallel on a shared thread pool and each stage can have its own timeout.
+"""
+import contextvars
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+from ..config import PIPELINE_MAX_WORKERS
+from ..monitoring.tracing import span
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Process-wide pool shared by all pipeline runs."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=PIPELINE_MAX_WORKERS, thread_name_prefix="pipeline")
+        return _executor
+
+
+class StageError(RuntimeError):
+    """A required stage failed or timed out."""
+
+    def __init__(self, stage: str, message: str):
+        super().__init__(f"Stage '{stage}' {message}")
+        self.stage = stage
+
+
+class Stage:
+    """
+    One pipeline step.
+
+    Args:
+        name: Unique stage name; its result is stored under this key
+        fn: Callable(ctx) -> result, where ctx holds the run inputs and dependency results
+        depends_on: Names of stages that must finish first
+        timeout: Seconds before the stage is abandoned (None = no limit), or a
+            callable(ctx) -> seconds evaluated when the stage starts
+        required: If False, failures/timeouts yield `default` instead of failing the run
+        default: Result used when the stage is skipped, fails or times out
+        when: Optional callable(ctx) -> bool; the stage is skipped when it returns False
+        fallback: Optional callable(ctx, error) -> result used when the stage fails or
+            times out; if it raises, the original failure stands
+    """
+
+    def __init__(self, name: str, fn: Callable[[Dict[str, Any]], Any], depends_on: Iterable[str] = (),
+                 timeout: Union[None, float, Callable[[Dict[str, Any]], Optional[float]]] = None,
+                 required: bool = True, default: Any = None,
+                 when: Optional[Callable[[Dict[str, Any]], bool]] = None,
+                 fallback: Optional[Callable[[Dict[str, Any], str], Any]] = None):
+        self.name = name
+        self.fn = fn
+        self.depends_on = tuple(depends_on)
+        self.timeout = timeout
+        self.required = required
+        self.default = default
+        self.when = when
+        self.fallback = fallback
+
+
+class PipelineRun:
+    """Outcome of one orchestrated run."""
+
+    def __init__(self):
+        self.results: Dict[str, Any] = {}
+        self.timings_ms: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+        self.skipped: List[str] = []
+        self.total_ms = 0.0
+
+
+def _run_stage(stage: Stage, ctx: Dict[str, Any]) -> Any:
+    with span(f"stage.{stage.name}"):
+        return stage.fn(ctx)
+
+
+class PipelineOrchestrator:
+    """Runs a DAG of stages, starting each stage as soon as its dependencies are done."""
+
+    def __init__(self, stages: List[Stage], executor: Optional[ThreadPoolExecutor] = None):
+        self.stages = {stage.name: stage for stage in stages}
+        self._executor = executor
+        for stage in stages:
+            missing = [d for d in stage.depends_on if d not in self.stages]
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stages {missing}")
+        self._order = self._topological_order()
+
+    def _topological_order(self) -> List[str]:
+        order, visiting, done = [], set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependency cycle at stage '{name}'")
+            visiting.add(name)
+            for dep in self.stages[name].depends_on:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+            order.append(name)
+
+        for name in self.stages:
+            visit(name)
+        return order
+
+    def run(self, inputs: Dict[str, Any]) -> PipelineRun:
+        """
+        Execute all stages.
+
+        Raises:
+            StageError: a required stage failed or timed out
+        """
+        executor = self._executor or get_executor()
+        run = PipelineRun()
+        ctx = dict(inputs)
+        pending = list(self._order)
+        running: Dict[Future, str] = {}
+        started: Dict[str, float] = {}
+        timeouts: Dict[str, Optional[float]] = {}
+        run_start = time.perf_counter()
+
+        def finish(name: str, result: Any, error: Optional[str] = None):
+            stage = self.stages[name]
+            if error is not None:
+                run.errors[name] = error
+                if stage.fallback is not None:
+                    try:
+                        result = stage.fallback(dict(ctx), error)
+                    except Exception:
+                        pass
+                    else:
+                        run.results[name] = result
+                        ctx[name] = result
+                        return
+                if stage.required:
+                    raise StageError(name, error)
+                result = stage.default
+            run.results[name] = result
+            ctx[name] = result
+
+        while pending or running:
+            # Start every stage whose dependencies have all produced a result
+            for name in list(pending):
+                stage = self.stages[name]
+                if not all(dep in run.results for dep in stage.depends_on):
+                    continue
+                pending.remove(name)
+                if stage.when is not None and not stage.when(ctx):
+                    run.skipped.append(name)
+                    finish(name, stage.default)
+                    continue
+                timeouts[name] = stage.timeout(ctx) if callable(stage.timeout) else stage.timeout
+                started[name] = time.perf_counter()
+                # Copy the caller's context so the stage's spans join the current trace
+                stage_ctx = contextvars.copy_context()
+                running[executor.submit(stage_ctx.run, _run_stage, stage, dict(ctx))] = name
+
+            if not running:
+                # Skipped stages may have unblocked others; otherwise everything is done
+                if pending:
+                    continue
+                break
+
+            now = time.perf_counter()
+            deadlines = [started[n] + timeouts[n] - now for n in running.values() if timeouts[n] is not None]
+            done, _ = wait(list(running), timeout=max(min(deadlines), 0) if deadlines else None,
+                           return_when=FIRST_COMPLETED)
+
+            for future in done:
+                name = running.pop(future)
+                run.timings_ms[name] = (time.perf_counter() - started[name]) * 1000
+                error = future.exception()
+                finish(name, None if error else future.result(), f"failed: {error}" if error else None)
+
+            # Abandon stages past their timeout (the worker thread finishes in the background)
+            now = time.perf_counter()
+            for future, name in list(running.items()):
+                timeout = timeouts[name]
+                if timeout is not None and now - started[name] >= timeout:
+                    running.pop(future)
+                    future.cancel()
+                    run.timings_ms[name] = (now - started[name]) * 1000
+                    finish(name, None, f"timed out after {timeout:.1f}s")
+
+        run.total_ms = (time.perf_counter() - run_start) * 1000
+        return run
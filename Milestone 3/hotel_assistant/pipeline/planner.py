@@ -0,0 +1,88 @@
+"""Intent-Aware Retrieval Planner
+
+Decides per query which stages are worth running once the intent and entities
+are known:
+
+- entity extraction only for a recognised intent
+- the KG template only when its required entities are present
+- semantic search only where reviews feed the answer, with a per-intent top_k
+  (more candidates when the KG has nothing to match on)
+- the LLM only when the KG rows cannot be rendered directly (visa answers)
+"""
+from typing import Any, Dict, List, Optional
+
+from ..config import INTENT_TYPES, RAG_TOP_K_BY_INTENT, RAG_TOP_K_WITHOUT_KG
+
+# Entities a KG template needs before select_and_execute_query can run one
+_KG_REQUIREMENTS = {
+    "LIST_HOTELS": lambda e: bool(e.get('city') or e.get('country') or e.get('star_rating') or e.get('near')),
+    # Traveller type alone: the precomputed any-city collaborative-filtering list
+    "RECOMMEND_HOTEL": lambda e: bool(e.get('city') or e.get('near') or e.get('traveller_type')),
+    "DESCRIBE_HOTEL": lambda e: bool(e.get('hotel_name')),
+    "COMPARE_HOTELS": lambda e: bool(e.get('hotel1') and e.get('hotel2')),
+    "CHECK_VISA": lambda e: bool(e.get('from_country') and (e.get('to_country') or e.get('destinations')))
+}
+
+# Intents whose KG row is the complete answer
+_TEMPLATED_INTENTS = {"CHECK_VISA"}
+
+# Intents that search only for some plans, so the search waits for the plan
+_SEARCH_AFTER_PLAN = {"LIST_HOTELS"}
+
+
+def needs_extraction(intent: Optional[str]) -> bool:
+    return intent in INTENT_TYPES
+
+
+class RetrievalPlan:
+    """Stages to run for one query and why."""
+
+    def __init__(self, intent: Optional[str], kg: bool, rag_top_k: int, reasons: List[str]):
+        self.intent = intent
+        self.kg = kg
+        self.rag_top_k = rag_top_k
+        self.reasons = reasons
+
+    def needs_llm(self, cypher_results: Optional[List[Dict[str, Any]]]) -> bool:
+        """False when the KG rows can be rendered as the answer without a model call."""
+        return not (self.intent in _TEMPLATED_INTENTS and cypher_results)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'intent': self.intent, 'kg': self.kg, 'rag_top_k': self.rag_top_k, 'reasons': self.reasons}
+
+
+def max_rag_top_k(intent: Optional[str], use_rag: bool = True) -> int:
+    """
+    The top_k to search with before the entities are extracted (0 to wait for the plan).
+
+    Only intents whose every plan searches start early, with the largest top_k any
+    of their plans asks for; plan_retrieval then decides how many results are used.
+    A listing searches only when the KG has no filters, so it waits for the plan.
+    """
+    if not use_rag or intent in _TEMPLATED_INTENTS or intent in _SEARCH_AFTER_PLAN:
+        return 0
+    return max(RAG_TOP_K_BY_INTENT.get(intent, 0), RAG_TOP_K_WITHOUT_KG)
+
+
+def plan_retrieval(intent: Optional[str], entities: Optional[Dict[str, Any]], use_rag: bool = True) -> RetrievalPlan:
+    """Build the plan from the classified intent and extracted entities."""
+    entities = entities or {}
+    requirement = _KG_REQUIREMENTS.get(intent)
+    kg = requirement is not None and requirement(entities)
+    reasons = [] if kg else [f"no KG template applies to {intent or 'unclassified'} query"]
+
+    if not use_rag:
+        rag_top_k = 0
+        reasons.append("semantic search turned off")
+    elif intent == "LIST_HOTELS" and kg:
+        rag_top_k = 0
+        reasons.append("listing is fully answered by the KG filters")
+    elif intent in RAG_TOP_K_BY_INTENT and kg:
+        rag_top_k = RAG_TOP_K_BY_INTENT[intent]
+    elif intent in _TEMPLATED_INTENTS:
+        rag_top_k = 0
+        reasons.append("reviews do not answer visa questions")
+    else:
+        rag_top_k = RAG_TOP_K_WITHOUT_KG
+        reasons.append("reviews are the only evidence")
+    return RetrievalPlan(intent, kg, rag_top_k, reasons)
@@ -0,0 +1,285 @@
+"""End-to-End Query Pipeline shared by the Streamlit app and batch/CLI callers"""
+import time
+from typing import Any, Callable, Dict, Optional
+
+from ..config import (BUDGET_FALLBACK_MODEL, DEFAULT_LLM_MODEL, DEFAULT_SIMILARITY_THRESHOLD,
+                      LLM_MIN_BUDGET_MS, PIPELINE_STAGE_TIMEOUTS_S, REQUEST_LATENCY_BUDGET_MS)
+from ..llm.answer_templates import templated_response
+from ..monitoring.metrics import PLANNER_SKIPS, REQUESTS, REQUEST_SECONDS
+from ..monitoring.tracing import start_trace
+from .budget import LatencyBudget, StaleResultCache
+from .orchestrator import PipelineOrchestrator, Stage, StageError
+from .planner import max_rag_top_k, needs_extraction, plan_retrieval
+
+
+class QueryPipeline:
+    """
+    Classify, then extract -> plan -> Cypher alongside the vector search, then the LLM.
+
+    The vector search starts as soon as the intent is known, with the largest
+    top_k the intent's plan can ask for. The retrieval planner (planner.py)
+    then decides from the intent and entities whether the KG template runs,
+    how many of the searched reviews are used (possibly none) and whether the
+    answer needs the LLM at all; extraction is skipped for unclassified queries.
+
+    Each query runs under a LatencyBudget (see budget.py): Cypher and vector
+    search overruns and a short LLM budget degrade the answer instead of
+    failing or waiting.
+    """
+
+    def __init__(self, conn, intent_classifier,
+                 select_and_execute_query: Optional[Callable] = None,
+                 extract_entities: Optional[Callable] = None,
+                 llm_layer: Optional[Callable] = None,
+                 semantic_search: Optional[Dict[str, Callable]] = None,
+                 stage_timeouts: Optional[Dict[str, float]] = None,
+                 latency_budget_ms: float = REQUEST_LATENCY_BUDGET_MS):
+        if select_and_execute_query is None:
+            from ..database.query_executor import select_and_execute_query
+        if extract_entities is None:
+            from ..nlp.entity_extractor import extract_entities
+        if llm_layer is None:
+            from ..llm.llm_layer import llm_layer
+
+        self.conn = conn
+        self.intent_classifier = intent_classifier
+        self.select_and_execute_query = select_and_execute_query
+        self.extract_entities = extract_entities
+        self.llm_layer = llm_layer
+        self._semantic_search = semantic_search
+        self._custom_search = semantic_search is not None
+        self.latency_budget_ms = latency_budget_ms
+        self.stale_results = StaleResultCache()
+        timeouts = dict(PIPELINE_STAGE_TIMEOUTS_S, **(stage_timeouts or {}))
+
+        def budgeted(stage):
+            return lambda ctx: ctx["budget"].stage_timeout(stage, timeouts[stage])
+
+        stages = [
+            Stage("classify", self._classify, timeout=timeouts["classify"]),
+            Stage("extract", self._extract, depends_on=["classify"], timeout=timeouts["extract"],
+                  default={}, when=lambda ctx: needs_extraction(ctx["classify"])),
+            Stage("plan", self._plan, depends_on=["classify", "extract"]),
+            Stage("cypher", self._cypher, depends_on=["classify", "extract", "plan"], timeout=budgeted("cypher"),
+                  default=[], when=lambda ctx: ctx["plan"].kg, fallback=self._cypher_fallback),
+            # Speculative: runs in parallel with extraction; the plan trims its results afterwards
+            Stage("vector_search", self._vector_search, depends_on=["classify"], timeout=budgeted("vector_search"),
+                  required=False, default=[], when=lambda ctx: max_rag_top_k(ctx["classify"], ctx["use_rag"]) > 0,
+                  fallback=self._skip_rag),
+            # Intents the plan may answer without reviews (listings) search only once it asks for them
+            Stage("planned_vector_search", self._planned_vector_search, depends_on=["classify", "plan"],
+                  timeout=budgeted("vector_search"), required=False, default=[],
+                  when=lambda ctx: (max_rag_top_k(ctx["classify"], ctx["use_rag"]) == 0
+                                    and ctx["plan"].rag_top_k > 0),
+                  fallback=self._skip_rag),
+            Stage("llm", self._llm,
+                  depends_on=["classify", "plan", "cypher", "vector_search", "planned_vector_search"],
+                  timeout=budgeted("llm"), fallback=self._llm_fallback)
+        ]
+        self.orchestrator = PipelineOrchestrator(stages)
+        self.retrieval_orchestrator = PipelineOrchestrator([stage for stage in stages if stage.name != "llm"])
+
+    def semantic_search(self, embedding_model: str) -> Callable:
+        """Search function for an embedding model ("minilm" or "mpnet"), imported on first use."""
+        if self._semantic_search is None:
+            from ..nlp.embeddings import semantic_search_minilm, semantic_search_mpnet
+            self._semantic_search = {"minilm": semantic_search_minilm, "mpnet": semantic_search_mpnet}
+        return self._semantic_search.get(embedding_model, self._semantic_search["mpnet"])
+
+    def warm_embedder(self, embedding_model: str):
+        """
+        Load the embedding model (and torch) before its first search.
+
+        Loading takes far longer than the vector_search stage timeout, so it is
+        done up front instead of inside the stage. No-op for injected search functions.
+        """
+        if self._custom_search:
+            return
+        from ..nlp.embeddings import get_embedder_minilm, get_embedder_mpnet
+        (get_embedder_minilm if embedding_model == "minilm" else get_embedder_mpnet)()
+
+    def _classify(self, ctx):
+        return self.intent_classifier.classify(ctx["query"])
+
+    def _extract(self, ctx):
+        return self.extract_entities(ctx["query"], ctx["classify"])
+
+    @staticmethod
+    def _plan(ctx):
+        return plan_retrieval(ctx["classify"], ctx["extract"], ctx["use_rag"])
+
+    def _cypher(self, ctx):
+        rows = self.select_and_execute_query(self.conn, ctx["classify"], ctx["extract"])
+        if rows:
+            self.stale_results.put(ctx["classify"], ctx["extract"], rows)
+        return rows
+
+    def _cypher_fallback(self, ctx, error: str):
+        """Over budget: serve the last good rows for the same query, else continue without KG rows."""
+        budget = ctx["budget"]
+        if not budget.enabled:
+            raise RuntimeError(error)
+        cached = self.stale_results.get(ctx["classify"], ctx["extract"])
+        if cached is not None:
+            stored_at, rows = cached
+            budget.degrade("kg_stale", error=error, age_s=round(time.time() - stored_at, 1))
+            return rows
+        budget.degrade("kg_skipped", error=error)
+        return []
+
+    def _search(self, ctx, top_k: int):
+        search = self.semantic_search(ctx["embedding_model"])
+        return search(ctx["query"], top_k=top_k, threshold=DEFAULT_SIMILARITY_THRESHOLD)
+
+    def _vector_search(self, ctx):
+        return self._search(ctx, max_rag_top_k(ctx["classify"], ctx["use_rag"]))
+
+    def _planned_vector_search(self, ctx):
+        return self._search(ctx, ctx["plan"].rag_top_k)
+
+    @staticmethod
+    def _planned_reviews(results) -> list:
+        """The vector search results the plan uses (results are best first, so its top_k is a prefix)."""
+        reviews = results["vector_search"] or results["planned_vector_search"] or []
+        return reviews[:results["plan"].rag_top_k]
+
+    @staticmethod
+    def _skip_rag(ctx, error: str):
+        ctx["budget"].degrade("rag_skipped", error=error)
+        return []
+
+    def _llm(self, ctx):
+        if not ctx["plan"].needs_llm(ctx["cypher"]):
+            PLANNER_SKIPS.inc(stage="llm", intent=ctx["classify"] or "NONE")
+            return templated_response(ctx["query"], ctx["classify"], ctx["cypher"], "answered from the KG")
+
+        budget, model = ctx["budget"], ctx["model"]
+        kwargs = {}
+        if budget.enabled:
+            remaining = budget.remaining_ms()
+            if remaining < LLM_MIN_BUDGET_MS.get(model, 0):
+                fallback_ok = remaining >= LLM_MIN_BUDGET_MS.get(BUDGET_FALLBACK_MODEL, 0)
+                if model == BUDGET_FALLBACK_MODEL or not fallback_ok:
+                    budget.degrade("templated_answer", reason="budget exhausted", remaining_ms=round(remaining))
+                    return templated_response(ctx["query"], ctx["classify"], ctx["cypher"], "budget exhausted")
+                budget.degrade("smaller_model", requested=model, used=BUDGET_FALLBACK_MODEL,
+                               remaining_ms=round(remaining))
+                model = BUDGET_FALLBACK_MODEL
+            kwargs["timeout"] = remaining / 1000
+
+        response = self.llm_layer(ctx["query"], ctx["classify"], ctx["cypher"],
+                                  self._planned_reviews(ctx) if ctx["use_rag"] else None, model=model, **kwargs)
+        if budget.enabled and not response.get('success'):
+            return self._llm_fallback(ctx, response.get('error', 'LLM call failed'))
+        return response
+
+    @staticmethod
+    def _llm_fallback(ctx, error: str):
+        """LLM overran the budget or failed under it: answer from the KG rows."""
+        budget = ctx["budget"]
+        if not budget.enabled:
+            raise RuntimeError(error)
+        budget.degrade("templated_answer", reason=error)
+        return templated_response(ctx["query"], ctx["classify"], ctx["cypher"], error)
+
+    @staticmethod
+    def _count_planner_skips(run, use_rag: bool):
+        intent = run.results["classify"] or "NONE"
+        for stage in run.skipped:
+            if stage in ("extract", "cypher"):
+                PLANNER_SKIPS.inc(stage=stage, intent=intent)
+        # Neither search ran; a search the user turned off is not a planner decision
+        searches = ("vector_search", "planned_vector_search")
+        if use_rag and all(stage in run.skipped for stage in searches):
+            PLANNER_SKIPS.inc(stage="vector_search", intent=intent)
+
+    def process(self, user_query: str, use_rag: bool = True, model: str = DEFAULT_LLM_MODEL,
+                embedding_model: str = "mpnet", latency_budget_ms: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Answer one query.
+
+        Args:
+            latency_budget_ms: Overrides the pipeline's budget for this query (0 disables degradation)
+
+        Returns:
+            {'success', 'intent', 'entities', 'cypher_results', 'next_cursor', 'embedding_results',
+             'llm_response', 'timings', 'degradations', 'trace'} or {'success': False, 'error', ...} on failure
+        """
+        if use_rag:
+            self.warm_embedder(embedding_model)
+        inputs = {"query": user_query, "use_rag": use_rag, "model": model, "embedding_model": embedding_model}
+        # Started after the embedder warm-up: model loading is a one-off, not request latency
+        budget = LatencyBudget(self.latency_budget_ms if latency_budget_ms is None else latency_budget_ms)
+        run, failure = None, None
+        with start_trace("query", **inputs) as trace:
+            try:
+                run = self.orchestrator.run({**inputs, "budget": budget})
+                trace.root.set_attribute('intent', run.results["classify"])
+                trace.root.set_attribute('plan', run.results["plan"].to_dict())
+                self._count_planner_skips(run, use_rag)
+                if budget.degradations:
+                    trace.root.set_attribute('degradations', [d['kind'] for d in budget.degradations])
+            except StageError as e:
+                trace.root.set_attribute('failed_stage', e.stage)
+                failure = {'success': False, 'error': str(e), 'failed_stage': e.stage}
+            except Exception as e:
+                failure = {'success': False, 'error': str(e)}
+
+        intent = run.results["classify"] if run is not None else None
+        answered = failure is None and (run.results["llm"] or {}).get('success', False)
+        REQUESTS.inc(intent=intent or "NONE", status="ok" if answered else "error")
+        REQUEST_SECONDS.observe(trace.root.duration_ms / 1000, intent=intent or "NONE")
+        if failure is not None:
+            return {**failure, 'degradations': budget.degradations, 'trace': trace.to_dict()}
+
+        llm_response = run.results["llm"]
+        if budget.degradations and llm_response.get('metadata') is not None:
+            llm_response['metadata']['degradations'] = [d['kind'] for d in budget.degradations]
+        return {
+            'success': True,
+            'intent': run.results["classify"],
+            'entities': run.results["extract"],
+            'cypher_results': run.results["cypher"],
+            'next_cursor': getattr(run.results["cypher"], 'next_cursor', None),
+            'embedding_results': self._planned_reviews(run.results),
+            'llm_response': run.results["llm"],
+            'timings': {**run.timings_ms, 'total': run.total_ms},
+            'plan': run.results["plan"].to_dict(),
+            'stage_errors': run.errors,
+            'degradations': budget.degradations,
+            'trace': trace.to_dict()
+        }
+
+    def retrieve(self, user_query: str, use_rag: bool = False, embedding_model: str = "mpnet") -> Dict[str, Any]:
+        """
+        Every stage but the LLM, without a latency budget: the inputs llm_layer gets for this query.
+
+        Returns:
+            {'intent', 'entities', 'cypher_output', 'embedding_output'} (embedding_output is None without RAG)
+        """
+        if use_rag:
+            self.warm_embedder(embedding_model)
+        run = self.retrieval_orchestrator.run({"query": user_query, "use_rag": use_rag, "model": None,
+                                               "embedding_model": embedding_model, "budget": LatencyBudget(0)})
+        return {'intent': run.results["classify"], 'entities': run.results["extract"],
+                'cypher_output': run.results["cypher"] or [],
+                'embedding_output': self._planned_reviews(run.results) if use_rag else None}
+
+    def more_results(self, intent: str, entities: Dict[str, Any], cursor: str):
+        """
+        The next page of an answer's KG rows (a database.pagination.Page), from its 'next_cursor'.
+
+        Only the Cypher stage runs again: the answer text stays the first page's.
+        """
+        with start_trace("more_results", intent=intent):
+            return self.select_and_execute_query(self.conn, intent, entities, cursor=cursor)
+
+
+def create_query_pipeline(conn=None) -> QueryPipeline:
+    """Build a pipeline with a new Neo4j connection (driver pool) and intent classifier."""
+    from ..database.neo4j_connection import Neo4jConnection
+    from ..database.visa_matrix import get_visa_matrix
+    from ..nlp.intent_classifier import IntentClassifier
+    conn = conn if conn is not None else Neo4jConnection()
+    get_visa_matrix(conn)
+    return QueryPipeline(conn, IntentClassifier())
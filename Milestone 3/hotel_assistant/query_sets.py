@@ -0,0 +1,68 @@
+"""Query Set Loaders (Test_Cases and other query files)"""
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+TEST_CASES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Test_Cases')
+
+_INTENT_HEADER = re.compile(r'^\d+\.\s+([A-Z_]+)')
+_QUOTED_QUERY = re.compile(r'^"(.+)"$')
+
+
+def load_test_cases(path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Parse the Test_Cases file into query dicts.
+
+    Sections like "1. LIST_HOTELS (5 templates)" set the expected intent,
+    lines like "With Star Rating:" set the category and quoted lines are queries.
+
+    Returns:
+        [{'query', 'expected_intent', 'category'}, ...] in file order
+    """
+    cases = []
+    intent, category = None, None
+    with open(path or TEST_CASES_PATH, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            header = _INTENT_HEADER.match(line)
+            query = _QUOTED_QUERY.match(line)
+            if header:
+                intent, category = header.group(1), None
+            elif query:
+                cases.append({'query': query.group(1), 'expected_intent': intent, 'category': category})
+            elif line.endswith(':'):
+                category = line[:-1]
+    return cases
+
+
+def load_queries(path: str) -> List[Dict[str, Any]]:
+    """
+    Load queries from a JSONL, plain-text or Test_Cases file.
+
+    - .jsonl: one object per line with a 'query' key (other keys, e.g. 'id', are kept)
+    - Test_Cases format (quoted queries under numbered intent headers): via load_test_cases
+    - anything else: one query per line; blank lines and lines starting with '#' are skipped
+
+    Returns:
+        [{'query', ...}, ...] in file order
+    """
+    if path.endswith('.jsonl'):
+        queries = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if not isinstance(record, dict) or not record.get('query'):
+                    raise ValueError(f"{path}:{number}: expected an object with a 'query' key")
+                queries.append(record)
+        return queries
+
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = [line.strip() for line in f]
+    if any(_INTENT_HEADER.match(line) for line in lines) and any(_QUOTED_QUERY.match(line) for line in lines):
+        return load_test_cases(path)
+    return [{'query': line} for line in lines if line and not line.startswith('#')]